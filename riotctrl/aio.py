@@ -0,0 +1,207 @@
+"""Asyncio RIOTctrl abstraction.
+
+Define a RIOTCtrl class that can be driven from an asyncio event loop, so
+many nodes can be handled without one thread per node.
+
+Requires ``pexpect>=4.9`` on Python 3.11 and later.
+"""
+
+# Coroutines mirror the RIOTCtrl blocking methods
+# pylint: disable=duplicate-code
+
+import time
+import asyncio
+import functools
+import subprocess
+
+import pexpect
+
+from riotctrl.ctrl import RIOTCtrl, DEVNULL
+from riotctrl.env import materialize
+from riotctrl.reset import make_reset
+from riotctrl.stats import timed
+
+
+class AsyncRIOTCtrl(RIOTCtrl):
+    """RIOTCtrl with coroutine versions of its blocking methods.
+
+    Coroutine methods are prefixed with ``a`` (``amake_run``, ``aflash``,
+    ``areset``, ``astart_term`` and ``arun_term``). All the `RIOTCtrl`
+    blocking methods are still available.
+
+    Use ``async_=True`` with ``ctrl.term.expect`` and ``ctrl.term.expect_exact``
+    to wait for terminal output without blocking the event loop.
+    """
+
+    async def amake_run(self, targets, stdout=None, stderr=None, **kwargs):
+        """Call make `targets` for current RIOTctrl context.
+
+        It is using `asyncio.create_subprocess_exec` internally.
+
+        :param targets: make targets
+        :param stdout: stdout parameter passed to create_subprocess_exec
+        :param stderr: stderr parameter passed to create_subprocess_exec
+        :param **kwargs: kwargs passed to create_subprocess_exec
+        :return: subprocess.CompletedProcess object
+        """
+        command = self.make_command(targets)
+        with timed(self.stats, "make_run"):
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                env=materialize(self.env),
+                stdout=stdout,
+                stderr=stderr,
+                **kwargs
+            )
+            out, err = await proc.communicate()
+        return subprocess.CompletedProcess(command, proc.returncode, out, err)
+
+    async def aflash(self, stdout=DEVNULL, stderr=DEVNULL, force=False, **kwargs):
+        """Flash application in ``ctrl.application_directory`` to ctrl.
+
+        See `RIOTCtrl.flash`. A `build_cache` or a `build_scheduler` is shared
+        with threads so the build goes through the event loop's default
+        executor.
+
+        :param stdout: stdout parameter passed to ctrl.amake_run
+                       (default: DEVNULL)
+        :param stderr: stderr parameter passed to ctrl.amake_run
+                       (default: DEVNULL)
+        :param force: flash even if already flashed (default: False)
+        :param **kwargs: kwargs passed to create_subprocess_exec
+        :return: subprocess.CompletedProcess object
+        """
+        targets = self.FLASH_TARGETS
+        if (
+            self.build_cache is not None
+            or self.flash_record is not None
+            or self.build_scheduler is not None
+        ):
+            build = functools.partial(self._build, stdout=stdout, stderr=stderr)
+            res = await asyncio.get_event_loop().run_in_executor(None, build)
+            if res.returncode:
+                return res
+            targets = self.FLASH_ONLY_TARGETS
+        digest = None
+        if self.flash_record is not None:
+            digest = self.flash_record.image_hash(self)
+            if not force and self.flash_record.check(self, digest):
+                return subprocess.CompletedProcess(self.make_command(targets), 0)
+        res = await self.amake_run(targets, stdout=stdout, stderr=stderr, **kwargs)
+        if self.flash_record is not None and res.returncode == 0:
+            self.flash_record.record(self, digest)
+        return res
+
+    async def areset(self):
+        """Reset current ctrl.
+
+        See `RIOTCtrl.reset`. Reset strategies other than make are run in the
+        event loop's default executor.
+        """
+        strategy = self._reset_strategy()
+        with timed(self.stats, "reset"):
+            if strategy is make_reset:
+                # Make reset yields error on some boards even if successful
+                # Ignore printed errors and returncode
+                await self.amake_run(self.RESET_TARGETS, stdout=DEVNULL, stderr=DEVNULL)
+            else:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, strategy, self)
+
+    def arun_term(self, reset=True, **startkwargs):
+        """Terminal asynchronous context manager."""
+        return _AsyncTermContext(self, reset, startkwargs)
+
+    async def astart_term(
+        self,
+        ready_pattern=None,
+        ready_prompt=None,
+        ready_tty=None,
+        ready_timeout=None,
+        **spawnkwargs
+    ):  # pylint:disable=too-many-arguments
+        """Start the terminal.
+
+        See `RIOTCtrl.start_term`.
+
+        :return: time in seconds it took for the terminal to be ready,
+                 also stored in `term_ready_time`
+        """
+        self.stop_term()
+
+        start = time.monotonic()
+        self._spawn_term(**spawnkwargs)
+
+        if ready_pattern is None and ready_prompt is None and ready_tty is None:
+            # on many platforms, the termprog needs a short while to be ready
+            await asyncio.sleep(self.TERM_STARTED_DELAY)
+        else:
+            if ready_timeout is None:
+                ready_timeout = self.TERM_READY_TIMEOUT
+            deadline = start + ready_timeout
+            if ready_tty is not None:
+                await self._await_term_tty(ready_tty, deadline)
+            if ready_pattern is not None:
+                await self.term.expect(
+                    ready_pattern, timeout=self._remaining(deadline), async_=True
+                )
+            if ready_prompt is not None:
+                await self._await_term_prompt(ready_prompt, deadline)
+
+        return self._term_ready(start)
+
+    async def _await_term_prompt(self, prompt, deadline):
+        """Probe the terminal with newlines until `prompt` is answered."""
+        while True:
+            self.term.sendline("")
+            timeout = min(self.TERM_READY_PROBE_INTERVAL, self._remaining(deadline))
+            try:
+                await self.term.expect_exact(prompt, timeout=timeout, async_=True)
+                return
+            except pexpect.TIMEOUT:
+                if self._remaining(deadline) <= 0:
+                    raise
+
+    async def _await_term_tty(self, tty, deadline):
+        """Wait until `tty` is opened by the terminal process tree."""
+        tty = self._ready_tty_path(tty)
+        while tty not in self._term_open_paths():
+            if self._remaining(deadline) <= 0:
+                raise pexpect.TIMEOUT(tty)
+            await asyncio.sleep(self.TERM_READY_POLL_INTERVAL)
+
+    def stop_term(self):
+        """Safe 'term.close'.
+
+        Also stops watching the terminal from the event loop.
+        """
+        pw_transport = getattr(self.term, "async_pw_transport", None)
+        if pw_transport is not None:
+            _, transport = pw_transport
+            transport.close()
+        super().stop_term()
+
+
+class _AsyncTermContext:
+    """Asynchronous context manager of `AsyncRIOTCtrl.arun_term`.
+
+    A class rather than ``contextlib.asynccontextmanager`` (Python >= 3.7).
+    """
+
+    def __init__(self, ctrl, reset, startkwargs):
+        self.ctrl = ctrl
+        self.reset = reset
+        self.startkwargs = startkwargs
+
+    async def __aenter__(self):
+        try:
+            await self.ctrl.astart_term(**self.startkwargs)
+            if self.reset:
+                await self.ctrl.areset()
+        except BaseException:
+            self.ctrl.stop_term()
+            raise
+        return self.ctrl.term
+
+    async def __aexit__(self, *exc):
+        self.ctrl.stop_term()
@@ -0,0 +1,264 @@
+"""Build helpers for RIOTCtrl.
+
+Define classes to share builds and build resources between RIOTCtrl
+objects.
+"""
+
+import os
+import time
+import select
+import logging
+import threading
+import subprocess
+
+
+class BuildCache:
+    """Build an application only once per build context.
+
+    RIOTCtrl objects with the same `application_directory` and the same values
+    for their `BUILD_ENV_KEYS` environment variables share the same build.
+    Only successful builds are cached.
+
+    Set as `build_cache` of a RIOTCtrl (or given to a RIOTCtrlBoardFactory),
+    `RIOTCtrl.flash` builds through the cache and then only runs
+    `FLASH_ONLY_TARGETS`.
+    """
+
+    def __init__(self):
+        self._builds = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def key(ctrl):
+        """Build context of `ctrl`.
+
+        :param ctrl: a RIOTCtrl object
+        :return: hashable key identifying the build result
+        """
+        env = tuple((name, ctrl.env.get(name)) for name in ctrl.BUILD_ENV_KEYS)
+        return (ctrl.application_directory, env)
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def build(self, ctrl, *runargs, **runkwargs):
+        """Build the application of `ctrl` if not already built.
+
+        Concurrent calls for the same build context wait for a single build.
+
+        :param ctrl: a RIOTCtrl object
+        :param *runargs: args passed to ctrl.make_run
+        :param *runkwargs: kwargs passed to ctrl.make_run
+        :return: subprocess.CompletedProcess object of the build
+        """
+        key = self.key(ctrl)
+        with self._key_lock(key):
+            if key in self._builds:
+                result, duration = self._builds[key]
+                with self._lock:
+                    self.hits += 1
+                    self.saved_time += duration
+                self.logger.info("Build cache hit for %s, saved %.3fs", key, duration)
+                return result
+
+            start = time.monotonic()
+            result = ctrl.make_run(ctrl.BUILD_TARGETS, *runargs, **runkwargs)
+            duration = time.monotonic() - start
+            with self._lock:
+                self.misses += 1
+            self.logger.info("Build cache miss for %s, built in %.3fs", key, duration)
+            if result.returncode == 0:
+                self._builds[key] = (result, duration)
+            return result
+
+    def invalidate(self, ctrl=None):
+        """Forget cached builds.
+
+        :param ctrl: only forget the build of this RIOTCtrl context,
+                     all builds if None
+        """
+        with self._lock:
+            if ctrl is None:
+                self._builds.clear()
+            else:
+                self._builds.pop(self.key(ctrl), None)
+
+    def stats(self):
+        """Cache statistics.
+
+        :return: dict with the number of `hits` and `misses`, and the
+                 `saved_time` in seconds (build time of the hits)
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "saved_time": self.saved_time,
+            }
+
+
+def strip_jobs_args(command):
+    """Remove the ``-j``/``--jobs`` arguments of a make command.
+
+    :param command: make command as a list of arguments
+    :return: the command without jobs arguments
+    """
+    stripped = command[:1]
+    args = iter(command[1:])
+    for arg in args:
+        if arg in ("-j", "--jobs"):
+            # optional count as next argument
+            arg = next(args, None)
+            if arg is not None and not arg.isdigit():
+                stripped.append(arg)
+        elif not arg.startswith(("--jobs=", "-j")):
+            stripped.append(arg)
+    return stripped
+
+
+class BuildScheduler:  # pylint:disable=too-many-instance-attributes
+    """Share a budget of make job slots between concurrent make runs.
+
+    Set as `build_scheduler` of RIOTCtrl objects (or given to a
+    RIOTCtrlBoardFactory), their builds (`make_run` of `BUILD_TARGETS`, also
+    the build part of `flash`) go through `run`: builds for many nodes run in
+    parallel without running more than `jobs` jobs in total. Other make runs,
+    e.g. evaluating make variables, resetting or flash only, do not take job
+    slots.
+
+    With `jobserver`, all make runs share a GNU make jobserver: a make run
+    waits for a slot to start, then its make takes free slots for parallel
+    jobs (GNU make >= 4.2). Otherwise each make run waits for `make_jobs`
+    slots and runs with ``-j<make_jobs>``.
+
+    ``-j`` arguments of the make commands, e.g. from `MAKE_ARGS`, are removed
+    as they would override the budget.
+
+    :param jobs: total number of job slots (default: number of CPUs)
+    :param jobserver: share a GNU make jobserver (default: True)
+    :param make_jobs: slots taken by each make run without `jobserver`
+                      (default: 1)
+    """
+
+    TOKEN = b"+"
+
+    def __init__(self, jobs=None, jobserver=True, make_jobs=1):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.jobserver = jobserver
+        self.make_jobs = min(make_jobs, self.jobs)
+
+        self.runs = 0
+        self.wait_time = 0.0
+        self._lock = threading.Lock()
+        self._fds = None
+        if jobserver:
+            self._fds = os.pipe()
+            os.write(self._fds[1], self.TOKEN * self.jobs)
+        else:
+            self._slots = threading.Semaphore(self.jobs)
+            # acquiring many slots must not interleave between make runs
+            self._acquire_lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the jobserver, no make must be running."""
+        fds, self._fds = self._fds, None
+        if fds is not None:
+            for fd in fds:
+                os.close(fd)
+
+    def _acquire(self):
+        """Take the slots of a make run.
+
+        :return: the tokens to give back
+        """
+        if not self.jobserver:
+            with self._acquire_lock:
+                for _ in range(self.make_jobs):
+                    self._slots.acquire()  # pylint:disable=consider-using-with
+            return self.make_jobs
+        while True:
+            # make may set the shared pipe non-blocking
+            select.select([self._fds[0]], [], [])
+            try:
+                token = os.read(self._fds[0], 1)
+            except BlockingIOError:
+                continue
+            if token:
+                return token
+
+    def _release(self, tokens):
+        if not self.jobserver:
+            for _ in range(tokens):
+                self._slots.release()
+        else:
+            os.write(self._fds[1], tokens)
+
+    def make_flags(self, env):
+        """``MAKEFLAGS`` of make runs, passing the jobserver to make.
+
+        :param env: environment of the make run
+        """
+        flags = [
+            flag
+            for flag in (env.get("MAKEFLAGS") or "").split()
+            if not flag.startswith(("-j", "--jobserver"))
+        ]
+        if self.jobserver:
+            flags.insert(0, "--jobserver-auth={},{}".format(*self._fds))
+            flags.insert(0, "-j{}".format(self.jobs))
+        return " ".join(flags)
+
+    def run(self, command, *runargs, env=None, **runkwargs):
+        """Run make `command` once its slots are available.
+
+        :param command: make command as a list of arguments
+        :param *runargs: args passed to subprocess.run
+        :param env: environment of make (default: `os.environ`)
+        :param *runkwargs: kwargs passed to subprocess.run
+        :return: subprocess.CompletedProcess object
+        """
+        command = strip_jobs_args(command)
+        env = dict(os.environ if env is None else env)
+        env["MAKEFLAGS"] = self.make_flags(env)
+        if self.jobserver:
+            runkwargs["pass_fds"] = tuple(runkwargs.get("pass_fds", ())) + self._fds
+        else:
+            command.insert(1, "-j{}".format(self.make_jobs))
+
+        start = time.monotonic()
+        tokens = self._acquire()
+        waited = time.monotonic() - start
+        with self._lock:
+            self.runs += 1
+            self.wait_time += waited
+        self.logger.debug("%s started after waiting %.3fs", command, waited)
+        try:
+            # pylint:disable=subprocess-run-check
+            return subprocess.run(command, *runargs, env=env, **runkwargs)
+        finally:
+            self._release(tokens)
+
+    def stats(self):
+        """Scheduler statistics.
+
+        :return: dict with the number of `jobs` slots, of make `runs` and the
+                 `wait_time` in seconds spent waiting for slots
+        """
+        with self._lock:
+            return {"jobs": self.jobs, "runs": self.runs, "wait_time": self.wait_time}
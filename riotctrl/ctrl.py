@@ -5,80 +5,58 @@ Define class to abstract a node over the RIOT build system.
 
 import abc
 import os
+import sys
 import time
+import shlex
 import signal
+import termios
 import logging
+import threading
 import subprocess
 import contextlib
+from tty import setraw
 
-import pexpect
+from riotctrl.env import Env, fingerprint, materialize
+from riotctrl.lazy import LazyAttribute
+from riotctrl.reset import NATIVE_BOARDS, make_reset, native_reset
+from riotctrl.session import TermSession
+from riotctrl.stats import Stats, timed
 
 
 DEVNULL = subprocess.DEVNULL
 MAKE = os.environ.get("MAKE", "make")
 
+# Make variables cache shared by all RIOTCtrl, see `RIOTCtrl.make_vars`
+_MAKE_VARS_CACHE = {}
+_MAKE_VARS_CACHE_LOCK = threading.Lock()
 
-class TermSpawn(pexpect.spawn):
-    """Subclass to adapt the behaviour to our need.
 
-    * change default `__init__` values
-      * disable local 'echo' to not match send messages
-      * 'utf-8/replace' by default
-      * default timeout
-    * tweak exception:
-      * replace the value with the called pattern
-      * remove exception context from inside pexpect implementation
-    """
+def clear_make_vars_cache():
+    """Forget all make variables cached by `RIOTCtrl.make_vars`."""
+    with _MAKE_VARS_CACHE_LOCK:
+        _MAKE_VARS_CACHE.clear()
 
-    def __init__(
-        self,
-        command,
-        timeout=10,
-        echo=False,
-        encoding="utf-8",
-        codec_errors="replace",
-        **kwargs
-    ):  # pylint:disable=too-many-arguments
-        super().__init__(
-            command,
-            timeout=timeout,
-            echo=echo,
-            encoding=encoding,
-            codec_errors=codec_errors,
-            **kwargs
-        )
 
-    def expect(self, pattern, *args, **kwargs):
-        # pylint:disable=signature-differs
-        try:
-            return super().expect(pattern, *args, **kwargs)
-        except (pexpect.TIMEOUT, pexpect.EOF) as exc:
-            raise self._pexpect_exception(exc, pattern)
+# Terminal classes moved to riotctrl.term, only imported with a terminal
+_TERM_NAMES = ("TermSpawnMixin", "TermSpawn", "TermFdSpawn")
 
-    def expect_exact(self, pattern, *args, **kwargs):
-        # pylint:disable=arguments-differ
-        try:
-            return super().expect_exact(pattern, *args, **kwargs)
-        except (pexpect.TIMEOUT, pexpect.EOF) as exc:
-            raise self._pexpect_exception(exc, pattern)
+if sys.version_info < (3, 7):  # pragma: no cover
+    # No module __getattr__ (PEP 562), import them eagerly
+    # pylint:disable-next=unused-import
+    from riotctrl.term import TermSpawnMixin, TermSpawn, TermFdSpawn  # noqa: F401
 
-    @staticmethod
-    def _pexpect_exception(exc, pattern):
-        """Tweak pexpect exception.
 
-        * Put the calling 'pattern' as value
-        * Remove exception context
-        """
-        exc.pexpect_value = exc.value
-        exc.value = pattern
+def __getattr__(name):
+    if name in _TERM_NAMES:
+        # pylint:disable=import-outside-toplevel
+        import riotctrl.term
 
-        # Remove exception context
-        exc.__cause__ = None
-        exc.__traceback__ = None
-        return exc
+        return getattr(riotctrl.term, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
-class RIOTCtrl:
+# Optional features (build cache, stats, session) each add an attribute
+class RIOTCtrl:  # pylint:disable=too-many-instance-attributes
     """Class abstracting a RIOTctrl in an application.
 
     This should abstract the build system integration.
@@ -88,32 +66,133 @@ class RIOTCtrl:
                 These overwrites values coming from `os.environ` and can help
                 define factories where environment comes from a file or if the
                 script is not executed from the build system context.
+                Stored as a riotctrl.env.Env in `env`, sharing the
+                `os.environ` copy with other RIOTCtrl objects.
 
     Environment variable configuration
 
     :environment BOARD: current RIOT board type.
     :environment RIOT_TERM_START_DELAY: delay before `make term` is said to be
-                                        ready after calling.
+                                        ready after calling, when no readiness
+                                        condition is given to `start_term`.
+    :environment RIOT_TERM_READY_TIMEOUT: maximum time to wait for a readiness
+                                          condition given to `start_term`.
+    :environment PORT: serial port opened with `TERM_MODE` 'serial'.
+    :environment BAUD: serial port baudrate with `TERM_MODE` 'serial'
+                       (default: 115200).
+
+    The terminal is started according to `TERM_MODE`:
+
+    * 'make': run `make cleanterm`
+    * 'direct': run the `TERMPROG` and `TERMFLAGS` make variables command,
+      only evaluated through make once, see `term_command`
+    * 'serial': open `PORT` in-process, without any terminal program
+
+    Statistics are disabled by default, see `enable_stats`.
+
+    Terminal sessions are disabled by default, see `enable_term_session`.
+
+    `reset` can be done without make by setting a `reset_strategy`, see
+    riotctrl.reset.
+
+    `flash` can skip flashing an already flashed firmware with a
+    `flash_record`, see riotctrl.flash.
     """
 
-    TERM_SPAWN_CLASS = TermSpawn
+    TERM_SPAWN_CLASS = LazyAttribute("riotctrl.term", "TermSpawn")
     TERM_STARTED_DELAY = int(os.environ.get("RIOT_TERM_START_DELAY") or 3)
+    TERM_READY_TIMEOUT = int(os.environ.get("RIOT_TERM_READY_TIMEOUT") or 10)
+    TERM_READY_PROBE_INTERVAL = 0.2
+    TERM_READY_POLL_INTERVAL = 0.01
+    TERM_MODE = "make"
+    TERM_FD_SPAWN_CLASS = LazyAttribute("riotctrl.term", "TermFdSpawn")
+    TERM_COMMAND_VARS = ("TERMPROG", "TERMFLAGS")
+    DEFAULT_BAUD = 115200
 
     MAKE_ARGS = ()
+    BUILD_TARGETS = ("all",)
     FLASH_TARGETS = ("flash",)
+    FLASH_ONLY_TARGETS = ("flash-only",)
     RESET_TARGETS = ("reset",)
     TERM_TARGETS = ("cleanterm",)
+    MAKE_VARS_TARGET = "riotctrl-print-make-vars"
+
+    # Environment variables changing the build result, used as build cache key
+    BUILD_ENV_KEYS = (
+        "BOARD",
+        "RIOTBASE",
+        "BINDIR",
+        "TOOLCHAIN",
+        "CFLAGS",
+        "USEMODULE",
+        "USEPKG",
+        "DISABLE_MODULE",
+        "DEVELHELP",
+        "LTO",
+    )
 
     def __init__(self, application_directory=".", env=None):
         self._application_directory = application_directory
 
-        self.env = os.environ.copy()
-        self.env.update(env or {})
+        self.env = Env(env)
 
-        self.term = None  # type: pexpect.spawn
+        self.term = None  # type: riotctrl.term.TermSpawn
+        self.term_ready_time = None
+        self.build_cache = None  # type: riotctrl.build.BuildCache
+        self.build_scheduler = None  # type: riotctrl.build.BuildScheduler
+        self.stats = None  # type: riotctrl.stats.Stats
+        self.term_session = None  # type: riotctrl.session.TermSession
+        self.reset_strategy = None
+        self.flash_record = None  # type: riotctrl.flash.FlashRecord
 
         self.logger = logging.getLogger(__name__)
 
+    def enable_stats(self, sinks=None):
+        """Record statistics of this ctrl and its terminal.
+
+        Latencies of `make_run`, `start_term`, `stop_term` and the
+        terminal operations are recorded, see `TermSpawn`.
+
+        :param sinks: list of sinks, see riotctrl.stats.Stats
+        :return: riotctrl.stats.Stats object, also stored in `stats`
+        """
+        labels = {
+            "board": self.env.get("BOARD"),
+            "application_directory": self.application_directory,
+        }
+        self.stats = Stats(labels=labels, sinks=sinks)
+        if self.term is not None:
+            self.term.stats = self.stats
+        return self.stats
+
+    def disable_stats(self):
+        """Stop recording statistics."""
+        self.stats = None
+        if self.term is not None:
+            self.term.stats = None
+
+    def enable_term_session(self, idle_timeout=None, reset=False, **startkwargs):
+        """Keep the terminal open across `ShellInteraction` calls.
+
+        :param idle_timeout: seconds without use before the terminal is
+                             stopped, never stopped if None
+        :param reset: reset the node each time the terminal is started
+        :param **startkwargs: kwargs passed to `start_term`
+        :return: riotctrl.session.TermSession object, also stored in
+                 `term_session`
+        """
+        self.disable_term_session()
+        self.term_session = TermSession(
+            self, idle_timeout=idle_timeout, reset=reset, **startkwargs
+        )
+        return self.term_session
+
+    def disable_term_session(self):
+        """Close the terminal session, stopping the terminal."""
+        if self.term_session is not None:
+            self.term_session.close()
+            self.term_session = None
+
     @property
     def application_directory(self):
         """Absolute path to the current directory."""
@@ -123,26 +202,74 @@ class RIOTCtrl:
         """Return board type."""
         return self.env["BOARD"]
 
-    def flash(self, *runargs, stdout=DEVNULL, stderr=DEVNULL, **runkwargs):
+    def flash(self, *runargs, stdout=DEVNULL, stderr=DEVNULL, force=False, **runkwargs):
         """Flash application in ``ctrl.application_directory`` to ctrl.
 
+        With a `build_cache`, the application is only built once per build
+        context (see `BUILD_ENV_KEYS`) and only `FLASH_ONLY_TARGETS` are run
+        for this ctrl.
+
+        With a `flash_record`, flashing is skipped when the built firmware is
+        recorded as already flashed on the node.
+
+        With a `build_scheduler`, the application is built first through it,
+        then only `FLASH_ONLY_TARGETS` are run outside of it.
+
         :param stdout: stdout parameter passed to ctrl.make_run
                        (default: DEVNULL)
         :param stderr: stdout parameter passed to ctrl.make_run
                        (default: DEVNULL)
+        :param force: flash even if already flashed (default: False)
         :param *runargs: args passed to subprocess.run
         :param *runkwargs: kwargs passed to subprocess.run
-        :return: subprocess.CompletedProcess object
+        :return: subprocess.CompletedProcess object, the one of the build if
+                 it failed. When skipped, its `returncode` is 0 and `stdout`
+                 and `stderr` are None.
         """
-        return self.make_run(
-            self.FLASH_TARGETS, *runargs, stdout=stdout, stderr=stderr, **runkwargs
+        targets = self.FLASH_TARGETS
+        if (
+            self.build_cache is not None
+            or self.flash_record is not None
+            or self.build_scheduler is not None
+        ):
+            build = self._build(*runargs, stdout=stdout, stderr=stderr, **runkwargs)
+            if build.returncode:
+                return build
+            targets = self.FLASH_ONLY_TARGETS
+        digest = None
+        if self.flash_record is not None:
+            digest = self.flash_record.image_hash(self)
+            if not force and self.flash_record.check(self, digest):
+                return subprocess.CompletedProcess(self.make_command(targets), 0)
+        res = self.make_run(
+            targets, *runargs, stdout=stdout, stderr=stderr, **runkwargs
         )
+        if self.flash_record is not None and res.returncode == 0:
+            self.flash_record.record(self, digest)
+        return res
+
+    def _build(self, *runargs, **runkwargs):
+        """Build the application, through `build_cache` if set."""
+        if self.build_cache is not None:
+            return self.build_cache.build(self, *runargs, **runkwargs)
+        return self.make_run(self.BUILD_TARGETS, *runargs, **runkwargs)
 
     def reset(self):
-        """Reset current ctrl."""
-        # Make reset yields error on some boards even if successful
-        # Ignore printed errors and returncode
-        self.make_run(self.RESET_TARGETS, stdout=DEVNULL, stderr=DEVNULL)
+        """Reset current ctrl.
+
+        Uses `reset_strategy` if set, signals the firmware process on native
+        boards and runs `make reset` otherwise, see riotctrl.reset.
+        """
+        with timed(self.stats, "reset"):
+            self._reset_strategy()(self)
+
+    def _reset_strategy(self):
+        """Reset strategy of current ctrl."""
+        if self.reset_strategy is not None:
+            return self.reset_strategy
+        if self.env.get("BOARD") in NATIVE_BOARDS:
+            return native_reset
+        return make_reset
 
     @contextlib.contextmanager
     def run_term(self, reset=True, **startkwargs):
@@ -155,21 +282,185 @@ class RIOTCtrl:
         finally:
             self.stop_term()
 
-    def start_term(self, **spawnkwargs):
+    def start_term(
+        self,
+        ready_pattern=None,
+        ready_prompt=None,
+        ready_tty=None,
+        ready_timeout=None,
+        **spawnkwargs
+    ):  # pylint:disable=too-many-arguments
         """Start the terminal.
 
         The function is blocking until it is ready.
-        It waits some time until the terminal is ready and resets the ctrl.
+
+        Without any readiness condition, it waits `TERM_STARTED_DELAY` seconds.
+        Otherwise it returns as soon as all the given conditions hold, checked
+        in the order `ready_tty`, `ready_pattern` and `ready_prompt`.
+
+        :param ready_pattern: pattern (or list of patterns) expected on the
+                              terminal output. The matched output is consumed.
+        :param ready_prompt: prompt that must be answered to a probe newline.
+                             The newline is resent every
+                             `TERM_READY_PROBE_INTERVAL` seconds.
+        :param ready_tty: path of a tty that must be opened by the terminal
+                          process (or one of its children). `True` uses the
+                          `PORT` environment variable. Linux only.
+        :param ready_timeout: maximum time to wait for the conditions
+                              (default: `TERM_READY_TIMEOUT`).
+        :param **spawnkwargs: kwargs passed to `TERM_SPAWN_CLASS`
+        :raises pexpect.TIMEOUT: a condition did not hold in time
+        :return: time in seconds it took for the terminal to be ready,
+                 also stored in `term_ready_time`
         """
         self.stop_term()
 
-        term_cmd = self.make_command(self.TERM_TARGETS)
-        self.term = self.TERM_SPAWN_CLASS(
-            term_cmd[0], args=term_cmd[1:], env=self.env, **spawnkwargs
-        )
+        start = time.monotonic()
+        self._spawn_term(**spawnkwargs)
 
-        # on many platforms, the termprog needs a short while to be ready
-        time.sleep(self.TERM_STARTED_DELAY)
+        if ready_pattern is None and ready_prompt is None and ready_tty is None:
+            # on many platforms, the termprog needs a short while to be ready
+            time.sleep(self.TERM_STARTED_DELAY)
+        else:
+            if ready_timeout is None:
+                ready_timeout = self.TERM_READY_TIMEOUT
+            deadline = start + ready_timeout
+            if ready_tty is not None:
+                self._wait_term_tty(ready_tty, deadline)
+            if ready_pattern is not None:
+                self.term.expect(ready_pattern, timeout=self._remaining(deadline))
+            if ready_prompt is not None:
+                self._wait_term_prompt(ready_prompt, deadline)
+
+        return self._term_ready(start)
+
+    def _spawn_term(self, **spawnkwargs):
+        """Spawn the terminal process in `term`, see `TERM_MODE`."""
+        if self.TERM_MODE == "serial":
+            self.term = self.TERM_FD_SPAWN_CLASS(self._open_port(), **spawnkwargs)
+        else:
+            if self.TERM_MODE == "direct":
+                term_cmd = self.term_command()
+                spawnkwargs.setdefault("cwd", self.application_directory)
+            else:
+                term_cmd = self.make_command(self.TERM_TARGETS)
+            self.term = self.TERM_SPAWN_CLASS(
+                term_cmd[0], args=term_cmd[1:], env=materialize(self.env), **spawnkwargs
+            )
+        self.term.stats = self.stats
+
+    def term_command(self):
+        """Terminal program command, as run by `make term`.
+
+        It is the value of the `TERM_COMMAND_VARS` make variables, cached as
+        described in `make_vars`.
+
+        :raises ValueError: no terminal program is defined
+        :return: command as a list of arguments
+        """
+        values = self.make_vars(self.TERM_COMMAND_VARS)
+        command = shlex.split(" ".join(values[n] for n in self.TERM_COMMAND_VARS))
+        if not command:
+            raise ValueError("No terminal program in {}".format(self.TERM_COMMAND_VARS))
+        return command
+
+    def _open_port(self):
+        """Open `PORT` as a raw serial port at `BAUD` and return its fd."""
+        fd = os.open(self.env["PORT"], os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        try:
+            setraw(fd)
+            baud = getattr(
+                termios, "B{}".format(self.env.get("BAUD", self.DEFAULT_BAUD))
+            )
+            attrs = termios.tcgetattr(fd)
+            attrs[4] = attrs[5] = baud  # ispeed, ospeed
+            termios.tcsetattr(fd, termios.TCSANOW, attrs)
+            os.set_blocking(fd, True)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _term_ready(self, start):
+        """Terminal is ready, `start` being when it was spawned."""
+        self.term_ready_time = time.monotonic() - start
+        self.logger.debug("Terminal ready after %.3fs", self.term_ready_time)
+        if self.stats is not None:
+            self.stats.record("start_term", self.term_ready_time)
+        return self.term_ready_time
+
+    @staticmethod
+    def _remaining(deadline):
+        """Time left until `deadline`, never negative."""
+        return max(deadline - time.monotonic(), 0)
+
+    def _wait_term_prompt(self, prompt, deadline):
+        """Probe the terminal with newlines until `prompt` is answered."""
+        import pexpect  # pylint:disable=import-outside-toplevel
+
+        while True:
+            self.term.sendline("")
+            timeout = min(self.TERM_READY_PROBE_INTERVAL, self._remaining(deadline))
+            try:
+                self.term.expect_exact(prompt, timeout=timeout)
+                return
+            except pexpect.TIMEOUT:
+                if self._remaining(deadline) <= 0:
+                    raise
+
+    def _wait_term_tty(self, tty, deadline):
+        """Wait until `tty` is opened by the terminal process tree."""
+        import pexpect  # pylint:disable=import-outside-toplevel
+
+        tty = self._ready_tty_path(tty)
+        while True:
+            if tty in self._term_open_paths():
+                return
+            if self._remaining(deadline) <= 0:
+                raise pexpect.TIMEOUT(tty)
+            time.sleep(self.TERM_READY_POLL_INTERVAL)
+
+    def _ready_tty_path(self, tty):
+        """Resolve `ready_tty` parameter to a path."""
+        if tty is True:
+            tty = self.env["PORT"]
+        return os.path.realpath(tty)
+
+    def _term_open_paths(self):
+        """Paths opened by the terminal process and its children.
+
+        Character devices are not listed by `psutil.Process.open_files` so
+        file descriptors are resolved through `/proc`.
+        """
+        import psutil  # pylint:disable=import-outside-toplevel
+
+        if self._term_pid() is None:
+            return self._term_fd_paths()
+        paths = set()
+        try:
+            term = psutil.Process(self._term_pid())
+            procs = [term] + term.children(recursive=True)
+        except psutil.Error:
+            return paths
+        for proc in procs:
+            fd_dir = "/proc/{}/fd".format(proc.pid)
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    paths.add(os.readlink(os.path.join(fd_dir, fd)))
+                except OSError:
+                    pass
+        return paths
+
+    def _term_fd_paths(self):
+        """Path opened by an in-process terminal."""
+        try:
+            return {os.readlink("/proc/self/fd/{}".format(self.term.child_fd))}
+        except (AttributeError, OSError):
+            return set()
 
     def _term_pid(self):
         """Terminal pid or None."""
@@ -180,9 +471,16 @@ class RIOTCtrl:
 
         Handles possible exceptions.
         """
+        import pexpect  # pylint:disable=import-outside-toplevel
+
         if self._term_pid() is None:
+            if self.term is not None:
+                # In-process terminal, e.g. a serial port, only close it
+                self.term.close()
+                self.term = None
             return
 
+        start = time.monotonic()
         try:
             # Native will spawn more than one process, so send the signals
             # to the process group instead of the process.
@@ -200,20 +498,132 @@ class RIOTCtrl:
             self.logger.critical("Could not close make term")
         finally:
             self.term = None
+            if self.stats is not None:
+                self.stats.record("stop_term", time.monotonic() - start)
 
-    def make_run(self, targets, *runargs, **runkwargs):
+    def make_run(self, targets, *runargs, env_overrides=None, **runkwargs):
         """Call make `targets` for current RIOTctrl context.
 
-        It is using `subprocess.run` internally.
+        It is using `subprocess.run` internally. Runs of only build targets
+        (`BUILD_TARGETS`) go through `build_scheduler` if set, other runs,
+        e.g. evaluating make variables or resetting, do not take job slots.
 
         :param targets: make targets
         :param *runargs: args passed to subprocess.run
+        :param env_overrides: dict of environment variables overriding `env`
+                              for this call only
         :param *runkwargs: kwargs passed to subprocess.run
         :return: subprocess.CompletedProcess object
         """
         command = self.make_command(targets)
-        # pylint:disable=subprocess-run-check
-        return subprocess.run(command, env=self.env, *runargs, **runkwargs)
+        env = materialize(self.env, env_overrides)
+        with timed(self.stats, "make_run"):
+            if self._scheduled(targets):
+                return self.build_scheduler.run(command, *runargs, env=env, **runkwargs)
+            # pylint:disable=subprocess-run-check
+            return subprocess.run(command, env=env, *runargs, **runkwargs)
+
+    def _scheduled(self, targets):
+        """Run of `targets` goes through `build_scheduler`."""
+        if self.build_scheduler is None or not targets:
+            return False
+        return set(targets) <= set(self.BUILD_TARGETS)
+
+    def make_var(self, name):
+        """Value of make variable `name` for current RIOTctrl context.
+
+        See `make_vars`.
+
+        :param name: make variable name
+        :return: value of the variable as a string
+        """
+        return self.make_vars([name])[name]
+
+    def make_vars(self, names):
+        """Values of make variables for current RIOTctrl context.
+
+        All variables not already cached are evaluated in a single make call.
+        Values are cached per application directory, environment and
+        `MAKE_ARGS`, until one of the makefiles read by make is modified or
+        `invalidate_make_vars` is called.
+
+        :param names: iterable of make variable names
+        :raises subprocess.CalledProcessError: make failed
+        :return: dict mapping each variable name to its value
+        """
+        names = list(names)
+        key = self._make_vars_key()
+        with _MAKE_VARS_CACHE_LOCK:
+            cached = _MAKE_VARS_CACHE.get(key)
+        if cached is not None and not self._makefiles_modified(cached["makefiles"]):
+            missing = [name for name in names if name not in cached["vars"]]
+        else:
+            cached = {"vars": {}, "makefiles": {}}
+            missing = names
+        if missing:
+            values, makefiles = self._eval_make_vars(missing)
+            cached = {
+                "vars": dict(cached["vars"], **values),
+                "makefiles": makefiles,
+            }
+            with _MAKE_VARS_CACHE_LOCK:
+                _MAKE_VARS_CACHE[key] = cached
+        return {name: cached["vars"][name] for name in names}
+
+    def invalidate_make_vars(self):
+        """Forget make variables cached for current RIOTctrl context."""
+        with _MAKE_VARS_CACHE_LOCK:
+            _MAKE_VARS_CACHE.pop(self._make_vars_key(), None)
+
+    def _make_vars_key(self):
+        env_hash = fingerprint(self.env)
+        return (self.application_directory, env_hash, tuple(self.MAKE_ARGS))
+
+    @staticmethod
+    def _makefiles_modified(makefiles):
+        for path, mtime in makefiles.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _eval_make_vars(self, names):
+        """Evaluate make variables `names` with a single make call.
+
+        A rule printing the variables and the read makefiles is given with
+        `--eval` so it works with any application Makefile.
+
+        :return: tuple of a dict of variable values and a dict mapping each
+                 makefile path to its modification time
+        """
+        prefix = "riotctrl-var:"
+        rule = "{target}: ; @:$(foreach v,{names},$(info {prefix}$(v)=$($(v))))"
+        rule = rule.format(
+            target=self.MAKE_VARS_TARGET, names=" ".join(names), prefix=prefix
+        )
+        rule += "$(info {}MAKEFILE_LIST=$(MAKEFILE_LIST))".format(prefix)
+        res = self.make_run(
+            ["--eval=" + rule, self.MAKE_VARS_TARGET],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        values = {}
+        for line in res.stdout.splitlines():
+            if line.startswith(prefix):
+                name, _, value = line[len(prefix) :].partition("=")
+                values[name] = value
+        makefiles = {}
+        for path in values.pop("MAKEFILE_LIST", "").split():
+            path = os.path.join(self.application_directory, path)
+            try:
+                makefiles[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                makefiles[path] = None
+        return values, makefiles
 
     def make_command(self, targets):
         """Make command for current RIOTctrl context.
@@ -254,15 +664,21 @@ class RIOTCtrlBoardFactory(RIOTCtrlFactoryBase):
 
     :param board_cls: A dict that maps the `BOARD` environment variable to a
                       RIOTCtrl class.
+    :param build_cache: A riotctrl.build.BuildCache shared by all the created
+                        RIOTCtrl objects.
+    :param build_scheduler: A riotctrl.build.BuildScheduler shared by all the
+                            created RIOTCtrl objects.
     """
     DEFAULT_CLS = RIOTCtrl
     BOARD_CLS = {}
 
-    def __init__(self, board_cls=None):
+    def __init__(self, board_cls=None, build_cache=None, build_scheduler=None):
         self.board_cls = {}
         self.board_cls.update(self.BOARD_CLS)
         if board_cls is not None:
             self.board_cls.update(board_cls)
+        self.build_cache = build_cache
+        self.build_scheduler = build_scheduler
 
     def get_ctrl(self, application_directory=".", env=None):
         """
@@ -280,13 +696,15 @@ class RIOTCtrlBoardFactory(RIOTCtrlFactoryBase):
         in `env`, that value is used to look-up the RIOTCtrl class in the
         factory's `board_cls` for that specific `BOARD` value.
         """
-        the_env = {}
-        the_env.update(os.environ)
-        if env:
-            the_env.update(env)
-        if "BOARD" not in the_env or the_env["BOARD"] not in self.board_cls:
-            cls = self.DEFAULT_CLS
+        if env and "BOARD" in env:
+            board = env["BOARD"]
         else:
-            cls = self.board_cls[the_env["BOARD"]]
+            board = os.environ.get("BOARD")
+        cls = self.board_cls.get(board, self.DEFAULT_CLS)
         # cls does its own fetching of `os.environ` so only provide `env` here
-        return cls(application_directory=application_directory, env=env)
+        ctrl = cls(application_directory=application_directory, env=env)
+        if self.build_cache is not None:
+            ctrl.build_cache = self.build_cache
+        if self.build_scheduler is not None:
+            ctrl.build_scheduler = self.build_scheduler
+        return ctrl
@@ -0,0 +1,139 @@
+"""Environment handling for RIOTCtrl.
+
+Define a copy-on-write environment so many RIOTCtrl objects share a single
+copy of `os.environ`.
+"""
+
+import os
+import threading
+import collections.abc
+
+_BASE_LOCK = threading.Lock()
+_BASE = {"data": None, "environ": None}
+
+
+def base_environ():
+    """Snapshot of `os.environ`, shared until `os.environ` changes.
+
+    :return: read-only mapping, must not be modified
+    """
+    # `os.environ._data` is compared as it needs no decoding nor copy
+    data = getattr(os.environ, "_data", None)
+    with _BASE_LOCK:
+        if data is None or data != _BASE["data"]:
+            _BASE["data"] = dict(data) if data is not None else None
+            _BASE["environ"] = os.environ.copy()
+        return _BASE["environ"]
+
+
+class Env(collections.abc.MutableMapping):
+    """Environment layered over a shared base environment.
+
+    Reads fall through `overrides` to `base`, writes only go to `overrides`,
+    the base environment is never copied nor modified.
+
+    `materialize` gives the full environment as a dict for subprocesses. It is
+    built once and cached until the environment is modified. Use `overlay`
+    for per-call overrides.
+
+    :param overrides: dict of variables overriding the base environment
+    :param base: base environment (default: a shared `os.environ` snapshot)
+    """
+
+    def __init__(self, overrides=None, base=None):
+        self.base = base_environ() if base is None else base
+        self.overrides = dict(overrides or {})
+        self.removed = set()
+        self._materialized = None
+        self._fingerprint = None
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            return self.overrides[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self.overrides[key] = value
+        self.removed.discard(key)
+        self._invalidate()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overrides.pop(key, None)
+        if key in self.base:
+            self.removed.add(key)
+        self._invalidate()
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.overrides and key not in self.removed:
+                yield key
+        yield from self.overrides
+
+    def __len__(self):
+        return len(self.materialize())
+
+    def __repr__(self):
+        return "Env({!r})".format(self.overrides)
+
+    def _invalidate(self):
+        self._materialized = None
+        self._fingerprint = None
+
+    def copy(self):
+        """Copy sharing the same base environment."""
+        env = Env(self.overrides, base=self.base)
+        env.removed = set(self.removed)
+        return env
+
+    def materialize(self):
+        """Full environment.
+
+        :return: dict, cached until the environment is modified. It must not
+                 be modified.
+        """
+        if self._materialized is None:
+            env = dict(self.base)
+            for key in self.removed:
+                env.pop(key, None)
+            env.update(self.overrides)
+            self._materialized = env
+        return self._materialized
+
+    def overlay(self, overrides=None):
+        """Full environment with per-call `overrides`.
+
+        :param overrides: dict of variables overriding this environment
+        :return: dict, the cached `materialize` one without `overrides`
+        """
+        if not overrides:
+            return self.materialize()
+        env = dict(self.materialize())
+        env.update(overrides)
+        return env
+
+    def fingerprint(self):
+        """Hash of the full environment, cached until it is modified."""
+        if self._fingerprint is None:
+            self._fingerprint = hash(frozenset(self.materialize().items()))
+        return self._fingerprint
+
+
+def materialize(env, overrides=None):
+    """Full environment of `env`, an `Env` or a dict, with `overrides`."""
+    if isinstance(env, Env):
+        return env.overlay(overrides)
+    if overrides:
+        env = dict(env)
+        env.update(overrides)
+    return env
+
+
+def fingerprint(env):
+    """Hash of `env`, an `Env` or a dict."""
+    if isinstance(env, Env):
+        return env.fingerprint()
+    return hash(frozenset(env.items()))
@@ -0,0 +1,128 @@
+"""pexpect helpers for TermSpawn.
+
+Define classes replacing pexpect internals to make `expect` faster and
+bounded.
+"""
+
+import re
+import functools
+
+import pexpect.expect
+
+
+@functools.lru_cache(maxsize=1024)
+def _literal_width(pattern):
+    """Width of a compiled `pattern` matching only a literal, None otherwise."""
+    if pattern.flags & re.VERBOSE or re.escape(pattern.pattern) != pattern.pattern:
+        return None
+    return len(pattern.pattern)
+
+
+class PatternIndexSearcher(pexpect.expect.searcher_re):
+    """pexpect regular expressions searcher that does not rescan old data.
+
+    pexpect searches the whole buffer with every pattern each time new data
+    is read. During an `expect` call, a literal pattern can only match in the
+    last `len(literal) - 1` characters of the previous buffer or in the new
+    data, so only that part is searched for literal patterns. Other patterns
+    are searched as by pexpect.
+
+    A searcher is used for a single `expect` call: its first search covers
+    the whole buffer, as data put in the spawn's `buffer` is not counted as
+    new data by pexpect.
+
+    The returned index and match are the same as with pexpect: the earliest
+    match in the buffer, the first pattern on ties.
+    """
+
+    def __init__(self, patterns):
+        super().__init__(patterns)
+        self.start = self.match = self.end = None
+        self._widths = [_literal_width(s) for _, s in self._searches]
+        self._searched = False
+
+    def search(self, buffer, freshlen, searchwindowsize=None):
+        if searchwindowsize is None:
+            searchstart = 0
+        else:
+            searchstart = max(0, len(buffer) - searchwindowsize)
+        oldlen = len(buffer) - freshlen if self._searched else 0
+        self._searched = True
+        first_match = None
+        best_index = -1
+        for (index, s), width in zip(self._searches, self._widths):
+            start = searchstart
+            if width is not None:
+                start = max(start, oldlen - width + 1)
+            match = s.search(buffer, start)
+            if match is None:
+                continue
+            if first_match is None or match.start() < first_match.start():
+                first_match = match
+                best_index = index
+        if first_match is None:
+            return best_index
+        self.start = first_match.start()
+        self.match = first_match
+        self.end = first_match.end()
+        return best_index
+
+
+class RingBuffer:
+    """Bounded replacement for pexpect `StringIO`/`BytesIO` buffers.
+
+    Only the last `size` characters (or bytes) written are kept. Older data
+    is given to the `spill` callable, if set, and dropped. Memory and the cost
+    of copying the buffer for each search are bounded by `size`.
+
+    Only the file methods used by pexpect are implemented, writes always
+    append.
+
+    :param size: number of characters, or bytes, to keep
+    :param binary: store bytes in a bytearray instead of a string
+    """
+
+    def __init__(self, size, binary=False):
+        self.size = size
+        self.binary = binary
+        self.spill = None
+        self._data = bytearray() if binary else ""
+        self._pos = 0
+
+    def write(self, data):
+        """Append `data`, dropping what no longer fits in `size`."""
+        self._data += data
+        overflow = len(self._data) - self.size
+        if overflow > 0:
+            if self.spill is not None:
+                self.spill(self._value(0, overflow))
+            if self.binary:
+                del self._data[:overflow]
+            else:
+                self._data = self._data[overflow:]
+        self._pos = len(self._data)
+        return len(data)
+
+    def tell(self):
+        """Current position."""
+        return self._pos
+
+    def seek(self, pos):
+        """Move current position to `pos`."""
+        self._pos = pos
+        return pos
+
+    def read(self):
+        """Read from current position up to the end."""
+        data = self._value(self._pos, len(self._data))
+        self._pos = len(self._data)
+        return data
+
+    def getvalue(self):
+        """Kept data."""
+        return self._value(0, len(self._data))
+
+    def _value(self, start, end):
+        if self.binary:
+            return bytes(memoryview(self._data)[start:end])
+        return self._data[start:end]
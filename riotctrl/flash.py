@@ -0,0 +1,152 @@
+"""Flash helpers for RIOTCtrl.
+
+Define classes to remember what was flashed on nodes.
+"""
+
+import os
+import json
+import fcntl
+import hashlib
+import logging
+import threading
+import contextlib
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "riotctrl", "flashed.json"
+)
+
+
+class FlashRecord:
+    """Persistent record of the firmware flashed on each node.
+
+    Nodes are identified by their `BOARD` and the first set variable of
+    `NODE_ID_ENV_KEYS`, nodes without one are not recorded. The firmware is
+    identified by the hash of the `FLASHFILE` make variable file.
+
+    Set as `flash_record` of a RIOTCtrl, `RIOTCtrl.flash` skips flashing when
+    the built firmware is already on the node.
+
+    The record is a JSON file shared by processes.
+
+    :param path: path of the record file
+                 (default: `RIOTCTRL_FLASH_RECORD` environment variable or
+                 ``~/.cache/riotctrl/flashed.json``)
+    """
+
+    NODE_ID_ENV_KEYS = ("DEBUG_ADAPTER_ID", "SERIAL")
+    HASH_CHUNK_SIZE = 1 << 16
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.environ.get("RIOTCTRL_FLASH_RECORD") or DEFAULT_PATH
+        self.path = path
+
+        self.skipped = 0
+        self.flashed = 0
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def node_key(self, ctrl):
+        """Record key of the node of `ctrl`.
+
+        :return: key as a string, None if the node cannot be identified
+        """
+        for name in self.NODE_ID_ENV_KEYS:
+            node_id = ctrl.env.get(name)
+            if node_id:
+                return "{}:{}".format(ctrl.env.get("BOARD"), node_id)
+        return None
+
+    def image_hash(self, ctrl):
+        """Hash of the firmware of `ctrl`, must be built.
+
+        :return: hex digest, None if there is no `FLASHFILE`
+        """
+        flashfile = ctrl.make_var("FLASHFILE")
+        if not flashfile:
+            return None
+        digest = hashlib.sha256()
+        try:
+            with open(
+                os.path.join(ctrl.application_directory, flashfile), "rb"
+            ) as image:
+                for chunk in iter(lambda: image.read(self.HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def check(self, ctrl, digest):
+        """Whether firmware `digest` is recorded as flashed on `ctrl` node.
+
+        Counted as `skipped` if it is.
+        """
+        key = self.node_key(ctrl)
+        if key is None or digest is None:
+            return False
+        with self._locked():
+            flashed = self._read().get(key) == digest
+        if flashed:
+            with self._lock:
+                self.skipped += 1
+            self.logger.info("%s already flashed on %s", digest, key)
+        return flashed
+
+    def record(self, ctrl, digest):
+        """Record firmware `digest` as flashed on `ctrl` node."""
+        key = self.node_key(ctrl)
+        with self._lock:
+            self.flashed += 1
+        if key is None or digest is None:
+            return
+        with self._locked():
+            record = self._read()
+            record[key] = digest
+            self._write(record)
+
+    def invalidate(self, ctrl=None):
+        """Forget flashed firmwares.
+
+        :param ctrl: only forget the firmware of this RIOTCtrl node,
+                     all nodes if None
+        """
+        with self._locked():
+            record = self._read()
+            if ctrl is None:
+                record.clear()
+            else:
+                record.pop(self.node_key(ctrl), None)
+            self._write(record)
+
+    def stats(self):
+        """Flash statistics.
+
+        :return: dict with the number of `skipped` and `flashed` firmwares
+        """
+        with self._lock:
+            return {"skipped": self.skipped, "flashed": self.flashed}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Lock the record file between processes."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".lock", "w", encoding="utf-8") as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as record:
+                return json.load(record)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, record):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as tmpfile:
+            json.dump(record, tmpfile, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -0,0 +1,173 @@
+"""RIOTCtrl groups.
+
+Define classes to run actions on many RIOTCtrl at once.
+"""
+
+import os
+import time
+import logging
+import threading
+import subprocess
+import collections
+import concurrent.futures
+
+
+class NodeResult(
+    collections.namedtuple("NodeResult", ["ctrl", "result", "duration", "exception"])
+):
+    """Result of an action on one node of a RIOTCtrlGroup.
+
+    :param ctrl: the RIOTCtrl the action was run on
+    :param result: return value of the action (e.g. a
+                   subprocess.CompletedProcess), None if it raised
+    :param duration: time in seconds the action took
+    :param exception: exception raised by the action or None
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """The action did not raise and did not return a failing returncode."""
+        if self.exception is not None:
+            return False
+        return getattr(self.result, "returncode", 0) == 0
+
+
+class RIOTCtrlGroup:
+    """Group of RIOTCtrl to run actions on all of them concurrently.
+
+    A failing node never stops the actions on the other nodes.
+
+    :param ctrls: iterable of RIOTCtrl objects.
+    :param max_workers: maximum number of concurrent actions
+                        (default: one per ctrl).
+    :param limit_key: callable returning for a ctrl the resource it shares
+                      with other ctrls, e.g. the programmer or USB hub it is
+                      connected to. `None` means no shared resource.
+    :param limits: dict mapping a `limit_key` value to the maximum number of
+                   concurrent actions on that resource. Missing values use
+                   `DEFAULT_LIMIT`.
+    """
+
+    DEFAULT_LIMIT = 1
+    LOG_SUFFIX = ".log"
+
+    def __init__(self, ctrls, max_workers=None, limit_key=None, limits=None):
+        self.ctrls = list(ctrls)
+        self.max_workers = max_workers or max(len(self.ctrls), 1)
+        self.limit_key = limit_key
+        self.limits = dict(limits or {})
+
+        self._semaphores = {}
+        self._semaphores_lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self.ctrls)
+
+    def __iter__(self):
+        return iter(self.ctrls)
+
+    @staticmethod
+    def node_name(index, ctrl):
+        """Name of a node, used for its log file.
+
+        :param index: index of the ctrl in the group
+        :param ctrl: RIOTCtrl object
+        """
+        return "{}-{}".format(index, ctrl.env.get("BOARD", "node"))
+
+    def _semaphore(self, ctrl):
+        """Semaphore of the resource shared by `ctrl` or None."""
+        if self.limit_key is None:
+            return None
+        key = self.limit_key(ctrl)
+        if key is None:
+            return None
+        with self._semaphores_lock:
+            if key not in self._semaphores:
+                limit = self.limits.get(key, self.DEFAULT_LIMIT)
+                self._semaphores[key] = threading.BoundedSemaphore(limit)
+            return self._semaphores[key]
+
+    def _run_one(self, index, ctrl, func):
+        semaphore = self._semaphore(ctrl)
+        if semaphore is not None:
+            semaphore.acquire()
+        start = time.monotonic()
+        try:
+            result = func(index, ctrl)
+        except Exception as exc:  # pylint:disable=broad-except
+            self.logger.error(
+                "%s failed: %r", self.node_name(index, ctrl), exc, exc_info=True
+            )
+            return NodeResult(ctrl, None, time.monotonic() - start, exc)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        return NodeResult(ctrl, result, time.monotonic() - start, None)
+
+    def run(self, func):
+        """Run `func(index, ctrl)` concurrently for all ctrls of the group.
+
+        :param func: callable taking the index of the ctrl in the group and
+                     the ctrl.
+        :return: list of NodeResult, in the order of the group's ctrls
+        """
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            futures = [
+                executor.submit(self._run_one, index, ctrl, func)
+                for index, ctrl in enumerate(self.ctrls)
+            ]
+            return [future.result() for future in futures]
+
+    def flash(self, *runargs, log_dir=None, **runkwargs):
+        """Flash all ctrls of the group concurrently.
+
+        :param log_dir: directory where each node's make output is written
+                        to `<node_name><LOG_SUFFIX>`. If None output is
+                        discarded as in RIOTCtrl.flash.
+        :param *runargs: args passed to RIOTCtrl.flash
+        :param *runkwargs: kwargs passed to RIOTCtrl.flash
+        :return: list of NodeResult with subprocess.CompletedProcess results,
+                 in the order of the group's ctrls
+        """
+
+        def _flash(index, ctrl):
+            if log_dir is None:
+                return ctrl.flash(*runargs, **runkwargs)
+            log_name = self.node_name(index, ctrl) + self.LOG_SUFFIX
+            with open(os.path.join(log_dir, log_name), "wb") as logfile:
+                return ctrl.flash(
+                    *runargs, stdout=logfile, stderr=subprocess.STDOUT, **runkwargs
+                )
+
+        start = time.monotonic()
+        results = self.run(_flash)
+        self.logger.info(
+            "Flashed %d/%d nodes in %.3fs",
+            sum(res.ok for res in results),
+            len(results),
+            time.monotonic() - start,
+        )
+        return results
+
+
+def flash_many(ctrls, max_workers=None, limit_key=None, limits=None, **flashkwargs):
+    """Flash many RIOTCtrl concurrently.
+
+    Shortcut for ``RIOTCtrlGroup(ctrls, ...).flash(**flashkwargs)``.
+
+    :param ctrls: iterable of RIOTCtrl objects.
+    :param max_workers: see RIOTCtrlGroup
+    :param limit_key: see RIOTCtrlGroup
+    :param limits: see RIOTCtrlGroup
+    :param **flashkwargs: kwargs passed to RIOTCtrlGroup.flash
+    :return: list of NodeResult, in the order of `ctrls`
+    """
+    group = RIOTCtrlGroup(
+        ctrls, max_workers=max_workers, limit_key=limit_key, limits=limits
+    )
+    return group.flash(**flashkwargs)
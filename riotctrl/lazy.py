@@ -0,0 +1,80 @@
+"""Lazy imports.
+
+Define class attributes importing heavy or optional modules on first use, to
+keep short-lived tools importing riotctrl fast.
+"""
+
+import importlib
+import importlib.util
+
+
+class LazyAttribute:
+    """Class attribute evaluating to `name` of `module`, imported on first
+    access.
+
+    Subclasses override it with a plain value.
+
+    :param module: absolute module name
+    :param name: name of the attribute in `module`
+    """
+
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        return getattr(importlib.import_module(self.module), self.name)
+
+
+class LazyModule:
+    """Class attribute evaluating to a module, imported on first access, or
+    None if it is not installed.
+
+    :param name: absolute module name
+    """
+
+    _MISSING = object()
+
+    def __init__(self, name):
+        self.name = name
+        self._module = None
+
+    @property
+    def installed(self):
+        """The module can be found, without importing it."""
+        if self._module is None:
+            return importlib.util.find_spec(self.name) is not None
+        return self._module is not self._MISSING
+
+    def load(self):
+        """Import the module.
+
+        :return: the module, or None if it is not installed
+        """
+        if self._module is None:
+            try:
+                self._module = importlib.import_module(self.name)
+            except ImportError:
+                self._module = self._MISSING
+        if self._module is self._MISSING:
+            return None
+        return self._module
+
+    def __get__(self, obj, owner=None):
+        return self.load()
+
+
+def is_set(cls, name):
+    """Attribute `name` of `cls` is not None, without importing it if it is
+    a LazyModule.
+
+    :param cls: class
+    :param name: attribute name
+    """
+    for klass in cls.__mro__:
+        value = vars(klass).get(name)
+        if isinstance(value, LazyModule):
+            return value.installed
+        if name in vars(klass):
+            break
+    return getattr(cls, name) is not None
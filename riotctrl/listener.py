@@ -0,0 +1,217 @@
+"""Terminal output listeners.
+
+Define a background reader demultiplexing the output of a terminal: lines
+matching registered patterns are routed to callbacks or queues, the rest of
+the output is left to `expect` and shell commands.
+"""
+
+import re
+import time
+import logging
+import threading
+import collections
+from queue import Queue
+
+import pexpect
+
+
+class Event(collections.namedtuple("Event", ["line", "match", "time"])):
+    """Output line matching a listened pattern.
+
+    :param line: the line, with its line ending
+    :param match: match object of the pattern in the line
+    :param time: `time.monotonic()` when the line was received
+    """
+
+    __slots__ = ()
+
+
+class Subscription:
+    """Pattern listened by a TermListener.
+
+    :param pattern: regular expression searched in each output line, bytes
+                    for terminals without encoding
+    :param callback: callable called with each Event, from the reader thread
+    :param queue: queue.Queue receiving each Event. A new one is created if
+                  neither `callback` nor `queue` is given.
+    :param consume: remove matching lines from the output read by `expect`
+    """
+
+    def __init__(self, pattern, callback=None, queue=None, consume=True):
+        if callback is None and queue is None:
+            queue = Queue()
+        self.pattern = re.compile(pattern)
+        self.callback = callback
+        self.queue = queue
+        self.consume = consume
+
+    def __repr__(self):
+        return "Subscription({!r})".format(self.pattern.pattern)
+
+    def deliver(self, event):
+        """Give `event` to the callback and queue."""
+        if self.callback is not None:
+            self.callback(event)
+        if self.queue is not None:
+            self.queue.put(event)
+
+
+class TermListener:  # pylint:disable=too-many-instance-attributes
+    """Background reader demultiplexing the output of a terminal.
+
+    A thread reads the terminal output with `read` and splits it in lines.
+    Lines matching a subscription pattern are delivered as Event to the
+    subscription, the others are kept to be returned by `TermListener.read`,
+    which replaces the terminal `read_nonblocking`.
+
+    An incomplete line is held up to `PARTIAL_LINE_TIMEOUT` for its end, e.g.
+    an event being printed, then passed on as is, e.g. a shell prompt.
+
+    :param read: `read_nonblocking(size, timeout)` like function reading the
+                 terminal
+    :param empty: empty output, "" or b"" for terminals without encoding
+    """
+
+    READ_SIZE = 4096
+    PARTIAL_LINE_TIMEOUT = 0.02
+    # Maximum delay to notice `stop`
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, read, empty=""):
+        self._read = read
+        self._empty = empty
+        self._newline = "\n" if isinstance(empty, str) else b"\n"
+
+        self.subscriptions = []
+        self.events = 0
+
+        self._output = collections.deque()
+        self._eof = None
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.logger = logging.getLogger(__name__)
+
+    def start(self):
+        """Start the reader thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="riotctrl-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the reader thread.
+
+        :return: output read but not returned by `read` yet
+        """
+        self._stopping.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._cond:
+            output = self._empty.join(self._output)
+            self._output.clear()
+        return output
+
+    def subscribe(self, pattern, callback=None, queue=None, consume=True):
+        """Listen to lines matching `pattern`, see Subscription.
+
+        :return: the Subscription
+        """
+        subscription = Subscription(pattern, callback, queue, consume)
+        with self._cond:
+            self.subscriptions = self.subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop listening to `subscription`."""
+        with self._cond:
+            self.subscriptions = [
+                sub for sub in self.subscriptions if sub is not subscription
+            ]
+
+    def read(self, size, timeout=None):
+        """Read up to `size` of the output not matching any subscription.
+
+        :param timeout: maximum time to wait for output, forever if None
+        :raises pexpect.TIMEOUT: no output in time
+        :raises pexpect.EOF: the terminal reached end of file
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._output or self._eof is not None, timeout
+            ):
+                raise pexpect.TIMEOUT("Timeout exceeded.")
+            if not self._output:
+                raise pexpect.EOF(str(self._eof))
+            data = self._output.popleft()
+            if len(data) > size:
+                self._output.appendleft(data[size:])
+                data = data[:size]
+            return data
+
+    def _pass(self, data):
+        with self._cond:
+            self._output.append(data)
+            self._cond.notify_all()
+
+    def _dispatch(self, line, now):
+        """Deliver `line` to matching subscriptions.
+
+        :return: True if the line is consumed
+        """
+        consumed = False
+        for sub in self.subscriptions:
+            match = sub.pattern.search(line)
+            if match is None:
+                continue
+            self.events += 1
+            consumed = consumed or sub.consume
+            try:
+                sub.deliver(Event(line, match, now))
+            except Exception:  # pylint:disable=broad-except
+                self.logger.exception("%r failed to handle %r", sub, line)
+        return consumed
+
+    def _feed(self, data):
+        """Dispatch the complete lines of `data`.
+
+        :return: the incomplete last line
+        """
+        end = data.rfind(self._newline) + 1
+        if not end:
+            return data
+        now = time.monotonic()
+        passed = [
+            line + self._newline
+            for line in data[: end - 1].split(self._newline)
+            if not self._dispatch(line + self._newline, now)
+        ]
+        if passed:
+            self._pass(self._empty.join(passed))
+        return data[end:]
+
+    def _run(self):
+        partial = self._empty
+        while not self._stopping.is_set():
+            timeout = self.PARTIAL_LINE_TIMEOUT if partial else self.POLL_INTERVAL
+            try:
+                data = self._read(self.READ_SIZE, timeout)
+            except pexpect.TIMEOUT:
+                if partial:
+                    self._pass(partial)
+                    partial = self._empty
+                continue
+            except (pexpect.EOF, OSError, ValueError) as exc:
+                if partial:
+                    self._pass(partial)
+                with self._cond:
+                    self._eof = exc
+                    self._cond.notify_all()
+                return
+            partial = self._feed(partial + data)
+            if len(partial) >= self.READ_SIZE:
+                self._pass(partial)
+                partial = self._empty
+        if partial:
+            self._pass(partial)
@@ -0,0 +1,257 @@
+"""Pool of RIOTCtrl objects.
+
+Define a factory reusing RIOTCtrl objects, with their open terminal and
+cached state, between users.
+"""
+
+import os
+import time
+import logging
+import threading
+import contextlib
+import collections
+
+from riotctrl.ctrl import RIOTCtrlBoardFactory
+
+
+class RIOTCtrlPool(RIOTCtrlBoardFactory):  # pylint:disable=too-many-instance-attributes
+    """Factory leasing RIOTCtrl objects from a pool.
+
+    RIOTCtrl objects are shared between `get_ctrl` calls with the same
+    `BOARD`, `application_directory` and `env`, once released with `release`.
+    Use `lease` to release it when leaving a context.
+
+    A released RIOTCtrl is kept as is, e.g. its terminal stays open. Before
+    being leased again, a terminal that exited is stopped and `health_check`,
+    if given, must return True. Otherwise the RIOTCtrl is closed and another
+    one is created.
+
+    :param board_cls: see RIOTCtrlBoardFactory
+    :param build_cache: see RIOTCtrlBoardFactory
+    :param max_size: maximum number of RIOTCtrl objects, leased or not. When
+                     reached, the least recently released one is closed.
+                     Unbounded if None.
+    :param health_check: callable taking a RIOTCtrl and returning False if it
+                         must not be leased again
+    :param build_scheduler: see RIOTCtrlBoardFactory
+    """
+
+    def __init__(
+        self,
+        board_cls=None,
+        build_cache=None,
+        max_size=None,
+        health_check=None,
+        build_scheduler=None,
+    ):  # pylint:disable=too-many-arguments
+        super().__init__(
+            board_cls=board_cls,
+            build_cache=build_cache,
+            build_scheduler=build_scheduler,
+        )
+        self.max_size = max_size
+        self.health_check = health_check
+
+        # key -> released ctrls, ordered by release time
+        self._idle = collections.OrderedDict()
+        self._keys = {}
+        # ids of leased ctrls, not released yet
+        self._leased = set()
+        self._size = 0
+        self._cond = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def key(application_directory=".", env=None):
+        """Pool key of RIOTCtrl objects created with these parameters.
+
+        :return: hashable (BOARD, application directory, env) tuple
+        """
+        env = env or {}
+        board = env.get("BOARD", os.environ.get("BOARD"))
+        return (
+            board,
+            os.path.abspath(application_directory),
+            frozenset(env.items()),
+        )
+
+    def get_ctrl(self, application_directory=".", env=None, timeout=None):
+        # pylint:disable=arguments-differ
+        """Lease a RIOTCtrl object, created if none is available.
+
+        Must be given back with `release`.
+
+        :param application_directory: see RIOTCtrlBoardFactory.get_ctrl
+        :param env: see RIOTCtrlBoardFactory.get_ctrl
+        :param timeout: maximum time to wait when the pool is full and all its
+                        RIOTCtrl objects are leased, wait forever if None
+        :raises TimeoutError: no RIOTCtrl could be leased in time
+        """
+        key = self.key(application_directory, env)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                ctrl, evicted = self._acquire(key, deadline)
+            if ctrl is None:
+                break
+            if self._healthy(ctrl):
+                with self._cond:
+                    self.hits += 1
+                return ctrl
+            self._discard(ctrl)
+
+        try:
+            if evicted is not None:
+                self._close(evicted)
+            ctrl = super().get_ctrl(application_directory, env)
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._keys[id(ctrl)] = key
+            self._leased.add(id(ctrl))
+        return ctrl
+
+    def release(self, ctrl):
+        """Give a leased RIOTCtrl object back to the pool.
+
+        :param ctrl: RIOTCtrl object returned by `get_ctrl`
+        :raises ValueError: ctrl is not leased, e.g. already released
+        """
+        with self._cond:
+            if id(ctrl) not in self._leased:
+                raise ValueError("RIOTCtrl is not leased from this pool")
+            self._leased.remove(id(ctrl))
+            key = self._keys[id(ctrl)]
+            self._idle.setdefault(key, []).append(ctrl)
+            self._idle.move_to_end(key)
+            self._cond.notify()
+
+    @contextlib.contextmanager
+    def lease(self, application_directory=".", env=None, timeout=None):
+        """Context manager leasing a RIOTCtrl object, see `get_ctrl`."""
+        ctrl = self.get_ctrl(application_directory, env, timeout=timeout)
+        try:
+            yield ctrl
+        finally:
+            self.release(ctrl)
+
+    def close(self):
+        """Close all the released RIOTCtrl objects."""
+        with self._cond:
+            ctrls = [ctrl for ctrls in self._idle.values() for ctrl in ctrls]
+            self._idle.clear()
+            for ctrl in ctrls:
+                del self._keys[id(ctrl)]
+            self._size -= len(ctrls)
+            self._cond.notify_all()
+        for ctrl in ctrls:
+            self._close(ctrl)
+
+    def stats(self):
+        """Pool statistics.
+
+        :return: dict with the number of `hits`, `misses` and `evictions`,
+                 the `size` of the pool and the number of `idle` objects
+        """
+        with self._cond:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": self._size,
+                "idle": sum(len(ctrls) for ctrls in self._idle.values()),
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _pop_idle(self, key):
+        """Lease the last released ctrl of `key`, with `_cond` held."""
+        ctrls = self._idle.get(key)
+        if not ctrls:
+            return None
+        ctrl = ctrls.pop()
+        if not ctrls:
+            del self._idle[key]
+        self._leased.add(id(ctrl))
+        return ctrl
+
+    def _acquire(self, key, deadline):
+        """Idle ctrl of `key`, or room for a new ctrl, with `_cond` held.
+
+        When the pool is full, the least recently released ctrl is evicted
+        to make room, its slot is taken over for the new ctrl.
+
+        :param deadline: `time.monotonic()` deadline to wait for room, wait
+                         forever if None
+        :raises TimeoutError: no room in time
+        :return: (ctrl, evicted) tuple, ctrl being None if room was made for
+                 a new ctrl, evicted the ctrl to close or None
+        """
+        while True:
+            ctrl = self._pop_idle(key)
+            if ctrl is not None:
+                return ctrl, None
+            if self.max_size is None or self._size < self.max_size:
+                self._size += 1
+                self.misses += 1
+                return None, None
+            if self._idle:
+                evicted_key, ctrls = next(iter(self._idle.items()))
+                evicted = ctrls.pop(0)
+                if not ctrls:
+                    del self._idle[evicted_key]
+                del self._keys[id(evicted)]
+                self.evictions += 1
+                self.misses += 1
+                self.logger.debug("Evicting %s", evicted_key)
+                return None, evicted
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not self._cond.wait(
+                remaining
+            ):
+                raise TimeoutError("No RIOTCtrl released in time")
+
+    def _healthy(self, ctrl):
+        """Check a released ctrl before leasing it again.
+
+        A failing `health_check` makes the ctrl unhealthy.
+        """
+        try:
+            if ctrl.term is not None and not ctrl.term.isalive():
+                self.logger.debug("Terminal of leased ctrl exited")
+                ctrl.stop_term()
+            if self.health_check is not None and not self.health_check(ctrl):
+                self.logger.debug("Leased ctrl failed health check")
+                return False
+        except Exception:  # pylint:disable=broad-except
+            self.logger.exception("Health check of leased ctrl failed")
+            return False
+        return True
+
+    def _discard(self, ctrl):
+        """Close an unhealthy ctrl and free its slot."""
+        try:
+            self._close(ctrl)
+        finally:
+            with self._cond:
+                del self._keys[id(ctrl)]
+                self._leased.discard(id(ctrl))
+                self._size -= 1
+                self._cond.notify()
+
+    @staticmethod
+    def _close(ctrl):
+        ctrl.disable_term_session()
+        ctrl.stop_term()
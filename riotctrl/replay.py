@@ -0,0 +1,318 @@
+"""Terminal transcripts record and replay.
+
+Define classes to record what is sent to and received from a RIOTCtrl
+terminal, and to replay it without any board nor terminal program.
+
+Record by passing a `TranscriptWriter` as `transcript` to
+`RIOTCtrl.start_term`, replay with a `ReplayRIOTCtrl`.
+"""
+
+import json
+import time
+import threading
+import subprocess
+import collections
+
+import pexpect
+import pexpect.spawnbase
+
+from riotctrl.ctrl import RIOTCtrl
+from riotctrl.term import TermSpawnMixin
+from riotctrl.stats import timed
+
+TRANSCRIPT_VERSION = 1
+SEND = "send"
+RECV = "recv"
+
+
+class ReplayError(AssertionError):
+    """Data sent to a ReplaySpawn differs from the transcript."""
+
+
+class TranscriptEntry(
+    collections.namedtuple("TranscriptEntry", ["time", "direction", "data"])
+):
+    """Data sent to or received from a terminal.
+
+    :param time: time in seconds since the start of the recording
+    :param direction: `SEND` or `RECV`
+    :param data: the data, bytes for terminals without encoding
+    """
+
+    __slots__ = ()
+
+
+def _dump_data(data):
+    """JSON serializable `data`, bytes are stored as latin-1 strings."""
+    return data.decode("latin-1") if isinstance(data, bytes) else data
+
+
+class TranscriptWriter:
+    """Record a terminal session as a transcript file.
+
+    The file is made of JSON lines: a header with the `version` and the
+    terminal `encoding`, then one ``{"t": <time>, "send"|"recv": <data>}``
+    object per entry. Entries are written as they happen.
+
+    :param file: path or text file object of the transcript
+    :param encoding: encoding of the terminal, None for terminals without
+                     encoding
+    """
+
+    def __init__(self, file, encoding="utf-8"):
+        if isinstance(file, str):
+            # closed by `close`
+            # pylint:disable-next=consider-using-with
+            file = open(file, "w", encoding="utf-8")
+            self._owned = True
+        else:
+            self._owned = False
+        self.file = file
+        self.encoding = encoding
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._write({"version": TRANSCRIPT_VERSION, "encoding": encoding})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, obj):
+        self.file.write(json.dumps(obj) + "\n")
+        self.file.flush()
+
+    def record(self, direction, data):
+        """Record `data` sent or received, see TranscriptEntry."""
+        with self._lock:
+            self._write(
+                {
+                    "t": round(time.monotonic() - self._start, 6),
+                    direction: _dump_data(data),
+                }
+            )
+
+    def sent(self, data):
+        """Record `data` sent to the terminal."""
+        self.record(SEND, data)
+
+    def received(self, data):
+        """Record `data` received from the terminal."""
+        self.record(RECV, data)
+
+    def close(self):
+        """Close the transcript file, if opened from a path."""
+        if self._owned:
+            self.file.close()
+
+
+class Transcript:
+    """Recorded terminal session.
+
+    :param entries: list of TranscriptEntry
+    :param encoding: encoding of the terminal, None for terminals without
+                     encoding
+    """
+
+    def __init__(self, entries, encoding="utf-8"):
+        self.entries = list(entries)
+        self.encoding = encoding
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, file):
+        """Load a transcript written by TranscriptWriter.
+
+        :param file: path or text file object of the transcript
+        """
+        if isinstance(file, str):
+            with open(file, encoding="utf-8") as transcript:
+                return cls.load(transcript)
+        header = json.loads(file.readline())
+        if header.get("version") != TRANSCRIPT_VERSION:
+            raise ValueError("Unsupported transcript version {}".format(header))
+        encoding = header.get("encoding")
+        entries = []
+        for line in file:
+            obj = json.loads(line)
+            direction = SEND if SEND in obj else RECV
+            data = obj[direction]
+            if encoding is None:
+                data = data.encode("latin-1")
+            entries.append(TranscriptEntry(obj["t"], direction, data))
+        return cls(entries, encoding)
+
+
+class _ReplaySpawnBase(pexpect.spawnbase.SpawnBase):
+    """pexpect spawn serving the received data of a Transcript."""
+
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(
+        self, transcript, speed=None, strict=True, timeout=10, **kwargs
+    ):  # pylint:disable=too-many-arguments
+        kwargs.setdefault("encoding", transcript.encoding)
+        super().__init__(timeout=timeout, **kwargs)
+        self.replayed = transcript
+        self.speed = speed
+        self.strict = strict
+        self.closed = False
+        self.echo = False
+        self.delaybeforesend = None
+        self.delayafterread = None
+
+        self._recv = [0, 0]  # index, offset of the next data to receive
+        self._send = [0, 0]  # index, offset of the next data to be sent
+        # transcript time and local time of the last replayed entry
+        self._ref = (0.0, time.monotonic())
+
+    def _entry(self, cursor, direction):
+        """Next entry of `direction` from `cursor`, skipping the others."""
+        entries = self.replayed.entries
+        while cursor[0] < len(entries) and entries[cursor[0]].direction != direction:
+            cursor[0] += 1
+            cursor[1] = 0
+        if cursor[0] < len(entries):
+            return entries[cursor[0]]
+        return None
+
+    def _replayed(self, entry):
+        if entry.time >= self._ref[0]:
+            self._ref = (entry.time, time.monotonic())
+
+    def _blocked(self):
+        """The next received data waits for data to be sent first."""
+        self._entry(self._send, SEND)
+        return self.strict and self._send[0] < self._recv[0]
+
+    def read_nonblocking(self, size=1, timeout=-1):
+        """Next received data of the transcript, waiting for it according to
+        `speed`."""
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if timeout == -1:
+            timeout = self.timeout
+        entry = self._entry(self._recv, RECV)
+        if entry is None:
+            self.flag_eof = True
+            raise pexpect.EOF("End of transcript")
+        if self._blocked():
+            # Recorded output after data not sent yet, nothing else comes
+            raise pexpect.TIMEOUT("Waiting for data to be sent")
+        if self.speed:
+            wait = self._ref[1] + (entry.time - self._ref[0]) / self.speed
+            wait -= time.monotonic()
+            if timeout is not None and wait > timeout:
+                time.sleep(timeout)
+                raise pexpect.TIMEOUT("Timeout exceeded.")
+            time.sleep(max(wait, 0))
+        offset = self._recv[1]
+        data = entry.data[offset : offset + size]
+        self._recv[1] += len(data)
+        if self._recv[1] >= len(entry.data):
+            self._recv = [self._recv[0] + 1, 0]
+            self._replayed(entry)
+        self._log(data, "read")
+        return data
+
+    def send(self, s):
+        """Check `s` against the data sent in the transcript.
+
+        :raises ReplayError: `s` differs from the transcript, if `strict`
+        """
+        s = self._coerce_send_string(s)
+        self._log(s, "send")
+        if not self.strict:
+            return len(s)
+        pending = s
+        while pending:
+            entry = self._entry(self._send, SEND)
+            if entry is None:
+                expected = self.string_type()
+            else:
+                expected = entry.data[self._send[1] :]
+            size = min(len(pending), len(expected))
+            if not size or pending[:size] != expected[:size]:
+                raise ReplayError(
+                    "Sent {!r}, transcript expects {!r}".format(pending, expected)
+                )
+            pending = pending[size:]
+            self._send[1] += size
+            if self._send[1] >= len(entry.data):
+                self._send = [self._send[0] + 1, 0]
+                self._replayed(entry)
+        return len(s)
+
+    def sendline(self, s=""):
+        """Send `s` followed by `linesep`."""
+        s = self._coerce_send_string(s)
+        return self.send(s + self.linesep)
+
+    def isalive(self):
+        """The transcript has more data to receive."""
+        return not self.closed and self._entry(list(self._recv), RECV) is not None
+
+    def close(self, force=True):  # pylint:disable=unused-argument
+        """Stop replaying."""
+        self.closed = True
+
+
+class ReplaySpawn(TermSpawnMixin, _ReplaySpawnBase):
+    """`TermSpawn` replaying a Transcript instead of running a command.
+
+    Received data is served in the order of the transcript. With `strict`,
+    data sent must match the transcript and the data received after it is
+    only served once it was sent, otherwise sent data is ignored.
+
+    Waiting for recorded output that only comes after data not sent yet
+    times out immediately.
+
+    :param transcript: Transcript to replay
+    :param speed: time compression of the recorded delays between entries,
+                  e.g. 10 replays 10 times faster. No delays if None.
+    :param strict: check sent data against the transcript
+    """
+
+
+class ReplayRIOTCtrl(RIOTCtrl):
+    """RIOTCtrl replaying a recorded terminal session, without any board.
+
+    Each started terminal replays `transcript` from its start. `make_run`
+    does not run make but succeeds, so flashing and resetting are no-ops.
+
+    :param transcript: Transcript or path of a transcript file, shared by
+                       all terminals
+    :param application_directory: see RIOTCtrl
+    :param env: see RIOTCtrl
+    :param speed: see ReplaySpawn
+    :param strict: see ReplaySpawn
+    """
+
+    TERM_SPAWN_CLASS = ReplaySpawn
+    TERM_STARTED_DELAY = 0
+
+    def __init__(
+        self, transcript, application_directory=".", env=None, speed=None, strict=True
+    ):  # pylint:disable=too-many-arguments
+        super().__init__(application_directory, env)
+        if not isinstance(transcript, Transcript):
+            transcript = Transcript.load(transcript)
+        self.transcript = transcript
+        self.speed = speed
+        self.strict = strict
+
+    def _spawn_term(self, **spawnkwargs):
+        self.term = self.TERM_SPAWN_CLASS(
+            self.transcript, speed=self.speed, strict=self.strict, **spawnkwargs
+        )
+        self.term.stats = self.stats
+
+    def make_run(self, targets, *runargs, env_overrides=None, **runkwargs):
+        # pylint:disable=unused-argument
+        """Successful `make` `targets` without running it."""
+        command = self.make_command(targets)
+        with timed(self.stats, "make_run"):
+            return subprocess.CompletedProcess(command, 0, b"", b"")
@@ -0,0 +1,103 @@
+"""Reset strategies for RIOTCtrl.
+
+A reset strategy is a callable taking the RIOTCtrl object to reset. Set it as
+`reset_strategy` of a RIOTCtrl to replace `make reset`.
+"""
+
+import os
+import signal
+import logging
+import subprocess
+
+from riotctrl.env import materialize
+
+# Boards where the firmware is a process of the terminal
+NATIVE_BOARDS = ("native", "native32", "native64")
+
+
+def make_reset(ctrl):
+    """Reset by running `ctrl.RESET_TARGETS` with make."""
+    # Make reset yields error on some boards even if successful
+    # Ignore printed errors and returncode
+    ctrl.make_run(
+        ctrl.RESET_TARGETS, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def native_reset(ctrl, signum=signal.SIGUSR1):
+    """Reset native by sending `signum` to the firmware process.
+
+    The firmware is the process of the terminal process tree running the
+    `FLASHFILE` make variable, evaluated once through make (see
+    `RIOTCtrl.make_vars`). Falls back to `make_reset` when the terminal is not
+    running or the firmware is not found.
+
+    :param ctrl: a RIOTCtrl object
+    :param signum: signal to send (default: SIGUSR1)
+    """
+    import psutil  # pylint:disable=import-outside-toplevel
+
+    procs = _firmware_processes(ctrl)
+    if not procs:
+        logging.getLogger(__name__).debug("Firmware not found, using make reset")
+        make_reset(ctrl)
+        return
+    for proc in procs:
+        try:
+            proc.send_signal(signum)
+        except psutil.NoSuchProcess:
+            pass
+
+
+def _firmware_processes(ctrl):
+    """Processes of the terminal process tree running `FLASHFILE`."""
+    import psutil  # pylint:disable=import-outside-toplevel
+
+    pid = getattr(ctrl.term, "pid", None)
+    if pid is None:
+        return []
+    flashfile = ctrl.make_var("FLASHFILE")
+    if not flashfile:
+        return []
+    flashfile = os.path.realpath(os.path.join(ctrl.application_directory, flashfile))
+    try:
+        term = psutil.Process(pid)
+        procs = [term] + term.children(recursive=True)
+    except psutil.Error:
+        return []
+    firmwares = []
+    for proc in procs:
+        try:
+            cwd = proc.cwd()
+            args = proc.cmdline()
+        except psutil.Error:
+            continue
+        # run directly or through an interpreter
+        if any(os.path.realpath(os.path.join(cwd, arg)) == flashfile for arg in args):
+            firmwares.append(proc)
+    return firmwares
+
+
+class CommandReset:
+    """Reset by running a command, e.g. toggling a reset GPIO.
+
+    The command is run with the RIOTCtrl environment from its application
+    directory.
+
+    :param args: command arguments, passed to subprocess.run
+    :param check: raise an exception if the command fails
+    """
+
+    def __init__(self, args, check=True):
+        self.args = args
+        self.check = check
+
+    def __call__(self, ctrl):
+        subprocess.run(
+            self.args,
+            env=materialize(ctrl.env),
+            cwd=ctrl.application_directory,
+            check=self.check,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
@@ -0,0 +1,327 @@
+"""Fleet scheduling.
+
+Define classes to run test jobs on a fleet of RIOTCtrl nodes of mixed board
+types.
+"""
+
+import time
+import threading
+import collections
+import concurrent.futures
+
+from riotctrl.group import RIOTCtrlGroup
+
+
+class Job(collections.namedtuple("Job", ["name", "board", "test"])):
+    """Test job.
+
+    :param name: name of the job
+    :param board: `BOARD` the job must run on
+    :param test: callable taking the RIOTCtrl to test, with its terminal
+                 started if `FleetScheduler.term` is True. Its return value is
+                 the job result.
+    """
+
+    __slots__ = ()
+
+
+class JobResult(
+    collections.namedtuple(
+        "JobResult", ["job", "node", "result", "exception", "attempts", "duration"]
+    )
+):
+    """Result of a job.
+
+    :param job: the Job
+    :param node: name of the node of the last attempt, None if never run
+    :param result: return value of the job `test`, None if it failed
+    :param exception: exception of the last attempt or None
+    :param attempts: number of attempts
+    :param duration: time in seconds taken by the last attempt
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """The job succeeded."""
+        return self.exception is None
+
+
+class NodeError(RuntimeError):
+    """A node could not be flashed or its terminal started."""
+
+
+class NoNodeError(RuntimeError):
+    """No working node of the job board type."""
+
+
+class FleetReport(
+    collections.namedtuple(
+        "FleetReport", ["results", "makespan", "busy", "quarantined"]
+    )
+):
+    """Report of a FleetScheduler run.
+
+    :param results: list of JobResult, in the order of the jobs
+    :param makespan: time in seconds from the start to the end of all jobs
+    :param busy: dict mapping node names to the time in seconds they spent
+                 running jobs
+    :param quarantined: list of quarantined node names
+    """
+
+    __slots__ = ()
+
+    @property
+    def utilization(self):
+        """Dict mapping node names to their busy ratio over the makespan."""
+        if not self.makespan:
+            return {node: 0.0 for node in self.busy}
+        return {node: busy / self.makespan for node, busy in self.busy.items()}
+
+    def as_dict(self):
+        """Export the report without the job results values."""
+        return {
+            "makespan": self.makespan,
+            "utilization": self.utilization,
+            "quarantined": list(self.quarantined),
+            "jobs": [
+                {
+                    "name": res.job.name,
+                    "board": res.job.board,
+                    "node": res.node,
+                    "ok": res.ok,
+                    "attempts": res.attempts,
+                    "duration": res.duration,
+                    "exception": None if res.ok else repr(res.exception),
+                }
+                for res in self.results
+            ],
+        }
+
+
+class FleetScheduler(RIOTCtrlGroup):
+    """Run jobs on the fleet nodes of their board type.
+
+    Each node runs the jobs queued for its `BOARD`, one at a time and
+    concurrently with the other nodes: it flashes the application, starts
+    the terminal and runs the job `test`.
+
+    A failed job is retried up to `retries` times, on another node when
+    possible. A node failing to flash or start its terminal (NodeError)
+    for `quarantine_after` jobs in a row is quarantined and gets no more
+    jobs. Jobs left without any node of their board type fail with
+    NoNodeError.
+
+    Flashing is limited per shared resource as in RIOTCtrlGroup.
+
+    :param ctrls: iterable of RIOTCtrl objects, the fleet nodes
+    :param retries: number of times a failed job is retried
+    :param quarantine_after: number of consecutive failures quarantining a
+                             node, never quarantined if None
+    :param flash: flash the application before each job
+    :param term: run each job with the terminal started
+    :param reset: reset the node after starting the terminal
+    :param startkwargs: kwargs passed to RIOTCtrl.start_term
+    :param limit_key: see RIOTCtrlGroup
+    :param limits: see RIOTCtrlGroup
+    """
+
+    # pylint:disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        ctrls,
+        retries=1,
+        quarantine_after=2,
+        flash=True,
+        term=True,
+        reset=True,
+        startkwargs=None,
+        limit_key=None,
+        limits=None,
+    ):  # pylint:disable=too-many-arguments
+        super().__init__(ctrls, limit_key=limit_key, limits=limits)
+        self.retries = retries
+        self.quarantine_after = quarantine_after
+        self.flash_phase = flash
+        self.term_phase = term
+        self.reset = reset
+        self.startkwargs = dict(startkwargs or {})
+
+        self._cond = None
+        self._queues = {}
+        self._running = collections.Counter()
+        self._active = {}
+        self._results = {}
+
+    @classmethod
+    def from_factory(cls, factory, envs, application_directory=".", **kwargs):
+        """Create the fleet nodes with a RIOTCtrl factory.
+
+        :param factory: a RIOTCtrlFactoryBase, e.g. a RIOTCtrlBoardFactory
+        :param envs: iterable of `env` of each node, with its `BOARD`
+        :param application_directory: application of all the nodes
+        :param **kwargs: kwargs passed to FleetScheduler
+        """
+        ctrls = [factory.get_ctrl(application_directory, env) for env in envs]
+        return cls(ctrls, **kwargs)
+
+    def schedule(self, jobs):
+        """Run `jobs` on the fleet.
+
+        :param jobs: iterable of Job
+        :return: FleetReport
+        """
+        jobs = list(jobs)
+        self._cond = threading.Condition()
+        self._queues = collections.defaultdict(collections.deque)
+        self._running = collections.Counter()
+        self._results = {}
+        self._active = collections.defaultdict(set)
+        for index, ctrl in enumerate(self.ctrls):
+            self._active[ctrl.board()].add(index)
+        for job_id, job in enumerate(jobs):
+            if self._active.get(job.board):
+                self._queues[job.board].append((job_id, job, 0, frozenset()))
+            else:
+                exc = NoNodeError("No node for {}".format(job.board))
+                self._results[job_id] = JobResult(job, None, None, exc, 0, 0.0)
+
+        start = time.monotonic()
+        # Not through `run`: the resource limits only apply to `_flash`
+        with concurrent.futures.ThreadPoolExecutor(max(len(self.ctrls), 1)) as executor:
+            futures = [
+                executor.submit(self._node_worker, index, ctrl)
+                for index, ctrl in enumerate(self.ctrls)
+            ]
+            busy = [future.result() for future in futures]
+        makespan = time.monotonic() - start
+
+        names = [self.node_name(index, ctrl) for index, ctrl in enumerate(self.ctrls)]
+        report = FleetReport(
+            results=[self._results[job_id] for job_id in range(len(jobs))],
+            makespan=makespan,
+            busy=dict(zip(names, busy)),
+            quarantined=[
+                name
+                for index, name in enumerate(names)
+                if index not in self._active[self.ctrls[index].board()]
+            ],
+        )
+        self.logger.info(
+            "Ran %d/%d jobs successfully in %.3fs",
+            sum(res.ok for res in report.results),
+            len(report.results),
+            makespan,
+        )
+        return report
+
+    def _node_worker(self, index, ctrl):
+        """Run the jobs of `ctrl` board until none is left.
+
+        :return: time spent running jobs
+        """
+        board = ctrl.board()
+        busy = 0.0
+        failures = 0
+        while True:
+            with self._cond:
+                item = self._next_job(board, index)
+                while item is None and (self._queues[board] or self._running[board]):
+                    self._cond.wait()
+                    item = self._next_job(board, index)
+                if item is None:
+                    return busy
+                self._running[board] += 1
+            job_id, job, attempts, failed_on = item
+            res = self._attempt(index, ctrl, job, attempts + 1)
+            busy += res.duration
+
+            with self._cond:
+                self._running[board] -= 1
+                failures = failures + 1 if isinstance(res.exception, NodeError) else 0
+                if not res.ok and attempts < self.retries:
+                    self._queues[board].append(
+                        (job_id, job, attempts + 1, failed_on | {index})
+                    )
+                else:
+                    self._results[job_id] = res
+                if (
+                    self.quarantine_after is not None
+                    and failures >= self.quarantine_after
+                ):
+                    self._quarantine(board, index, ctrl)
+                    return busy
+                self._cond.notify_all()
+
+    def _attempt(self, index, ctrl, job, attempts):
+        """Run `job` on node `index`.
+
+        :return: JobResult
+        """
+        name = self.node_name(index, ctrl)
+        start = time.monotonic()
+        try:
+            result = self._run_job(ctrl, job)
+        except Exception as exc:  # pylint:disable=broad-except
+            self.logger.warning("%s failed on %s: %r", job.name, name, exc)
+            return JobResult(job, name, None, exc, attempts, time.monotonic() - start)
+        return JobResult(job, name, result, None, attempts, time.monotonic() - start)
+
+    def _next_job(self, board, index):
+        """Next job of `board` for node `index`, with `_cond` held.
+
+        Retried jobs go to nodes they did not fail on, unless they failed on
+        all the working nodes.
+        """
+        queue = self._queues[board]
+        for item in queue:
+            _, _, _, failed_on = item
+            if index not in failed_on or self._active[board] <= failed_on:
+                queue.remove(item)
+                return item
+        return None
+
+    def _quarantine(self, board, index, ctrl):
+        """Stop giving jobs to node `index`, with `_cond` held."""
+        self.logger.error("Quarantining %s", self.node_name(index, ctrl))
+        self._active[board].discard(index)
+        if not self._active[board]:
+            for job_id, job, attempts, _ in self._queues[board]:
+                exc = NoNodeError("All {} nodes quarantined".format(board))
+                self._results[job_id] = JobResult(job, None, None, exc, attempts, 0.0)
+            self._queues[board].clear()
+        self._cond.notify_all()
+
+    def _run_job(self, ctrl, job):
+        """Flash, start the terminal and test."""
+        try:
+            if self.flash_phase:
+                self._flash(ctrl)
+            if self.term_phase:
+                ctrl.start_term(**self.startkwargs)
+                if self.reset:
+                    ctrl.reset()
+        except Exception as exc:
+            ctrl.stop_term()
+            raise NodeError("{}: {!r}".format(job.name, exc)) from exc
+        try:
+            return job.test(ctrl)
+        finally:
+            if self.term_phase:
+                ctrl.stop_term()
+
+    def _flash(self, ctrl):
+        semaphore = self._semaphore(ctrl)
+        if semaphore is not None:
+            semaphore.acquire()
+        try:
+            res = ctrl.flash()
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+        if res.returncode:
+            raise RuntimeError(
+                "Flashing failed with returncode {}".format(res.returncode)
+            )
@@ -0,0 +1,106 @@
+"""Terminal sessions for RIOTCtrl.
+
+Define classes to keep a RIOTCtrl terminal open across many interactions.
+"""
+
+import logging
+import threading
+import contextlib
+
+
+class TermSession:  # pylint:disable=too-many-instance-attributes
+    """Keep the terminal of a RIOTCtrl open between interactions.
+
+    The terminal is started on first use and kept open. It is stopped when
+    unused for `idle_timeout` seconds, or on `close`, and started again on the
+    next use. The node is only reset when a terminal is started with
+    `reset=True` or when calling `reset`.
+
+    Once set as `term_session` of a RIOTCtrl (see
+    `RIOTCtrl.enable_term_session`), `ShellInteraction.check_term` decorated
+    methods use the session terminal instead of starting and stopping one.
+
+    :param ctrl: a RIOTCtrl object
+    :param idle_timeout: seconds without use before the terminal is stopped,
+                         never stopped if None
+    :param reset: reset the node after starting the terminal
+    :param **startkwargs: kwargs passed to ctrl.start_term
+    """
+
+    def __init__(self, ctrl, idle_timeout=None, reset=False, **startkwargs):
+        self.ctrl = ctrl
+        self.idle_timeout = idle_timeout
+        self.reset_on_start = reset
+        self.startkwargs = startkwargs
+
+        self.starts = 0
+        self.uses = 0
+        self._users = 0
+        self._timer = None
+        self._lock = threading.RLock()
+
+        self.logger = logging.getLogger(__name__)
+
+    def acquire(self):
+        """Start the terminal if needed and mark it as in use.
+
+        :return: the terminal
+        """
+        with self._lock:
+            self._cancel_timer()
+            if self.ctrl.term is None:
+                self.ctrl.start_term(**self.startkwargs)
+                self.starts += 1
+                if self.reset_on_start:
+                    self.ctrl.reset()
+            self._users += 1
+            self.uses += 1
+            return self.ctrl.term
+
+    def release(self):
+        """Mark the terminal as no longer in use by the caller."""
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self.idle_timeout is not None:
+                self._timer = threading.Timer(self.idle_timeout, self._idle)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @contextlib.contextmanager
+    def use(self):
+        """Context manager using the session terminal."""
+        term = self.acquire()
+        try:
+            yield term
+        finally:
+            self.release()
+
+    def reset(self):
+        """Reset the node, keeping the terminal open."""
+        with self._lock:
+            self.ctrl.reset()
+
+    def close(self):
+        """Stop the terminal."""
+        with self._lock:
+            self._cancel_timer()
+            self.ctrl.stop_term()
+
+    def _idle(self):
+        with self._lock:
+            # ignore timers cancelled while waiting for the lock
+            if self._timer is threading.current_thread():
+                self._timer = None
+                self.logger.debug("Stopping idle terminal")
+                self.ctrl.stop_term()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
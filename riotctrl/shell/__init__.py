@@ -5,9 +5,7 @@ Defines classes to abstract interactions with RIOT shell commands
 """
 
 import abc
-
-import pexpect
-import pexpect.replwrap
+import collections
 
 
 # pylint: disable=R0903
@@ -32,6 +30,12 @@ class ShellInteraction:
     """
 
     PROMPT_TIMEOUT = 0.5
+    # Maximum number of pipelined commands waiting for their prompt
+    PIPELINE_WINDOW = 8
+    # Maximum number of bytes of pipelined commands not yet answered, default
+    # RIOT stdio UART receive buffer size (STDIO_UART_RX_BUFSIZE)
+    PIPELINE_BUFSIZE = 64
+    STREAM_CHUNK_SIZE = 4096
 
     def __init__(self, riotctrl, prompt="> "):
         self.riotctrl = riotctrl
@@ -44,6 +48,10 @@ class ShellInteraction:
             self.stop_term()
 
     def _start_replwrap(self):
+        # pylint:disable=import-outside-toplevel
+        import pexpect
+        import pexpect.replwrap
+
         if self.replwrap is None or self.replwrap.child != self.riotctrl.term:
             # flush pexpect up to 10000 characters (arbitrarily chosen value)
             # to start with an empty buffer. This fixes an issue where the
@@ -81,9 +89,16 @@ class ShellInteraction:
     def check_term(func, reset=True, **startkwargs):
         """
         Decorator to ensure the terminal is running and stopped
+
+        With a `term_session` enabled on the RIOTCtrl object, the session
+        terminal is used and kept open instead.
         """
 
         def wrapper(self, *args, **kwargs):
+            session = getattr(self.riotctrl, "term_session", None)
+            if session is not None:
+                with session.use():
+                    return func(self, *args, **kwargs)
             if self.riotctrl.term is None:
                 with self.riotctrl.run_term(reset, **startkwargs):
                     return func(self, *args, **kwargs)
@@ -101,3 +116,86 @@ class ShellInteraction:
         """
         self._start_replwrap()
         return self.replwrap.run_command(cmd, timeout=timeout, async_=async_)
+
+    def cmd_stream(self, cmd, timeout=-1):
+        """
+        Sends a command and yields its output in chunks as they arrive
+
+        The output ends with the next prompt, which is not yielded.
+
+        :param  cmd: A shell command as string.
+        :param  timeout: timeout to wait for each chunk
+                         (-1 uses the term's timeout)
+
+        :return: Generator of output chunks as strings
+        """
+        self._start_replwrap()
+        term = self.riotctrl.term
+        if timeout == -1:
+            timeout = term.timeout
+        term.sendline(cmd)
+        pending = term.buffer
+        term.buffer = ""
+        # keep enough characters to find a prompt split between two chunks
+        keep = len(self.prompt) - 1
+        while True:
+            idx = pending.find(self.prompt)
+            if idx >= 0:
+                if idx:
+                    yield pending[:idx]
+                term.buffer = pending[idx + len(self.prompt) :]
+                return
+            if len(pending) > keep:
+                yield pending[: len(pending) - keep]
+                pending = pending[len(pending) - keep :]
+            pending += term.read_nonblocking(self.STREAM_CHUNK_SIZE, timeout)
+
+    def cmds(self, cmds, timeout=-1, window=None, bufsize=None):
+        """
+        Sends commands pipelined via the ShellInteraction's `riotctrl`
+
+        Commands are sent ahead without waiting for the previous command's
+        prompt, as long as at most `window` commands and `bufsize` bytes are
+        not yet answered by a prompt. At least one command is always sent.
+        The output is split back per command on prompt boundaries.
+
+        :param  cmds: A list of single line shell commands as strings.
+        :param  timeout: timeout for each prompt (-1 uses the term's timeout)
+        :param  window: maximum number of commands in flight
+                        (default: PIPELINE_WINDOW)
+        :param  bufsize: maximum number of bytes in flight, should fit the
+                         firmware's input buffer (default: PIPELINE_BUFSIZE)
+
+        :return: List of the outputs of each command as strings
+        """
+        self._start_replwrap()
+        term = self.riotctrl.term
+        window = window or self.PIPELINE_WINDOW
+        bufsize = bufsize or self.PIPELINE_BUFSIZE
+        cmds = list(cmds)
+        # sizes in bytes of the commands waiting for their prompt
+        inflight = collections.deque()
+        outputs = []
+        sent = 0
+        # pexpect sleeps `delaybeforesend` before each send, this would
+        # serialize the commands again
+        delaybeforesend = term.delaybeforesend
+        term.delaybeforesend = None
+        try:
+            while len(outputs) < len(cmds):
+                batch = []
+                while sent < len(cmds) and len(inflight) < window:
+                    size = len(cmds[sent].encode()) + len(term.linesep)
+                    if inflight and sum(inflight) + size > bufsize:
+                        break
+                    batch.append(cmds[sent] + term.linesep)
+                    inflight.append(size)
+                    sent += 1
+                if batch:
+                    term.send("".join(batch))
+                term.expect_exact(self.prompt, timeout=timeout)
+                outputs.append(term.before)
+                inflight.popleft()
+        finally:
+            term.delaybeforesend = delaybeforesend
+        return outputs
@@ -0,0 +1,88 @@
+"""
+Asyncio shell interaction extension for riotctrl
+
+Defines classes to abstract interactions with RIOT shell commands from an
+asyncio event loop. Use together with `riotctrl.aio.AsyncRIOTCtrl`.
+"""
+
+import re
+import asyncio
+
+import pexpect
+import pexpect.replwrap
+
+from . import ShellInteraction
+
+
+class AsyncShellInteraction(ShellInteraction):
+    """
+    Base class for asynchronous shell interactions
+
+    Coroutine methods are prefixed with ``a`` (``acmd``, ``astart_term``).
+
+    :param riotctrl: a riotctrl.aio.AsyncRIOTCtrl object
+    :param prompt: the prompt of the shell (default: '> ')
+    """
+
+    async def _astart_replwrap(self):
+        if self.replwrap is None or self.replwrap.child != self.riotctrl.term:
+            term = self.riotctrl.term
+            # flush pexpect buffer, see `ShellInteraction._start_replwrap`
+            await term.expect(
+                [r"[\s\S]+", pexpect.TIMEOUT], timeout=self.PROMPT_TIMEOUT, async_=True
+            )
+            # enforce prompt to be shown by sending newline
+            term.sendline("")
+            # wait for the prompt without consuming it (lookahead match) so
+            # REPLWrapper finds it without blocking on initialization
+            await term.expect("(?={})".format(re.escape(self.prompt)), async_=True)
+            self.replwrap = pexpect.replwrap.REPLWrapper(
+                term,
+                orig_prompt=self.prompt,
+                prompt_change=None,
+            )
+
+    async def astart_term(self):
+        """
+        Starts the terminal of the AsyncRIOTCtrl object
+        """
+        self.term_was_started = True
+        await self.riotctrl.astart_term()
+
+    @staticmethod
+    def acheck_term(func, reset=True, **startkwargs):
+        """
+        Decorator to ensure the terminal is running and stopped for coroutine
+        methods
+
+        With a `term_session` enabled on the RIOTCtrl object, the session
+        terminal is used and kept open instead, see `check_term`. It is
+        started in the event loop's default executor.
+        """
+
+        async def wrapper(self, *args, **kwargs):
+            session = getattr(self.riotctrl, "term_session", None)
+            if session is not None:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, session.acquire)
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    session.release()
+            if self.riotctrl.term is None:
+                async with self.riotctrl.arun_term(reset, **startkwargs):
+                    return await func(self, *args, **kwargs)
+            return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    async def acmd(self, cmd, timeout=-1):
+        """
+        Sends a command via the AsyncShellInteraction's `riotctrl`
+
+        :param  cmd: A shell command as string.
+
+        :return: Output of the command as a string
+        """
+        await self._astart_replwrap()
+        return await self.replwrap.run_command(cmd, timeout=timeout, async_=True)
@@ -0,0 +1,279 @@
+"""
+CBOR parser for riotctrl shell interactions
+
+Compact alternative to JSON for large outputs, e.g. telemetry dumps, either
+as raw CBOR or framed in base64 or hex text lines.
+"""
+
+import base64
+import logging
+
+from riotctrl.lazy import LazyModule
+
+from . import ShellInteractionParser
+
+# Size of the argument following the initial byte, by additional information
+_CBOR_ARGUMENT_SIZES = {24: 1, 25: 2, 26: 4, 27: 8}
+_CBOR_BREAK = 0xFF
+
+
+def _cbor_header(data, offset):
+    """
+    Major type, additional information, argument and end of the header of
+    the CBOR data item at `offset`
+
+    :return: None if the header is incomplete
+    :raises ValueError: invalid header
+    """
+    initial = data[offset]
+    major, info = initial >> 5, initial & 0x1F
+    if info < 24:
+        return major, info, info, offset + 1
+    if info in _CBOR_ARGUMENT_SIZES:
+        end = offset + 1 + _CBOR_ARGUMENT_SIZES[info]
+        if end > len(data):
+            return None
+        return major, info, int.from_bytes(data[offset + 1 : end], "big"), end
+    if info == 31 and major in (2, 3, 4, 5, 7):
+        # indefinite length item or break
+        return major, info, None, offset + 1
+    raise ValueError("Invalid CBOR initial byte 0x{:02x}".format(initial))
+
+
+class CBORStreamDecoder:
+    """Decodes a stream of bytes into complete top-level CBOR items
+
+    Item boundaries are found by scanning the item headers as the bytes
+    arrive, each complete item is then decoded once.
+
+    Raw CBOR has no framing: the stream must only be made of CBOR items, any
+    other output, e.g. a log message, is either decoded as CBOR too or
+    invalid. Use framed CBOR to mix CBOR with other output, see
+    Base64CBORShellInteractionParser.
+
+    :param cbor_module: module providing ``loads``, e.g. cbor2
+    :param decoder_kwargs: kwargs passed to ``loads``
+    """
+
+    def __init__(self, cbor_module, **decoder_kwargs):
+        self.cbor_module = cbor_module
+        self.decoder_kwargs = decoder_kwargs
+        self._data = bytearray()
+        self._offset = 0  # scanned bytes of the current item
+        self._pending = []  # items left in the open containers, None if indefinite
+        self._complete = False
+
+    def feed(self, data):
+        """
+        Feed the next bytes of the stream
+
+        :param data (bytes): next part of the stream
+        :return: iterator of the CBOR items completed by `data`
+        :raises ValueError: the stream is not valid CBOR, when iterating
+        """
+        self._data += data
+        return self._items()
+
+    def _items(self):
+        while self._scan():
+            item = bytes(self._data[: self._offset])
+            del self._data[: self._offset]
+            self._offset = 0
+            self._complete = False
+            yield self.cbor_module.loads(item, **self.decoder_kwargs)
+
+    def _item_done(self):
+        """Count the item ending at `_offset` in its container
+
+        :return: True if the top-level item is complete
+        """
+        while self._pending:
+            if self._pending[-1] is None:
+                # indefinite length container, ends with a break
+                return False
+            self._pending[-1] -= 1
+            if self._pending[-1]:
+                return False
+            self._pending.pop()
+        return True
+
+    def _scan(self):
+        """Scan the current item
+
+        :return: True if the current item is complete in `_data`
+        """
+        while not self._complete and self._offset < len(self._data):
+            header = _cbor_header(self._data, self._offset)
+            if header is None:
+                return False
+            major, info, argument, self._offset = header
+            if major == 7 and info == 31:
+                if not self._pending or self._pending[-1] is not None:
+                    raise ValueError("Unexpected CBOR break")
+                self._pending.pop()
+                self._complete = self._item_done()
+            elif info == 31:
+                self._pending.append(None)
+            elif major in (2, 3):
+                # byte or text string, possibly not received yet
+                self._offset += argument
+                self._complete = self._item_done()
+            elif major in (4, 5) and argument:
+                # array or map of `argument` items or pairs
+                self._pending.append(argument * (major - 3))
+            elif major == 6:
+                # tag, followed by the tagged item
+                self._pending.append(1)
+            else:
+                self._complete = self._item_done()
+        return self._complete and self._offset <= len(self._data)
+
+
+class CBORShellInteractionParser(ShellInteractionParser):
+    """Allows for parsing result of a ShellInteraction as raw CBOR using
+    cbor2_. RIOTCtrl can be installed with ``cbor`` support using
+    ``riotctrl[cbor]``.
+
+    Raw CBOR output is binary: the terminal must be started without encoding
+    (``encoding=None``) or with the ``latin-1`` encoding, see `FRAME_ENCODING`.
+    The output must only be made of CBOR items, see `CBORStreamDecoder`.
+
+    .. _cbor2: https://github.com/agronholm/cbor2
+    """
+
+    cbor_module = LazyModule("cbor2")
+    # Encoding of outputs given as strings
+    FRAME_ENCODING = "latin-1"
+
+    def __init__(self, *args, **kwargs):
+        self.logger = logging.getLogger(type(self).__name__)
+        self._decoder_kwargs = {}
+        if self.cbor_module is None:
+            self.logger.warning(
+                "%s initialized without cbor2 installed\n"
+                "Please install with riotctrl[cbor]",
+                type(self).__name__,
+            )
+        super().__init__(*args, **kwargs)
+
+    def set_decoder_args(self, **kwargs):
+        """Set keyword arguments for the ``CBORDecoder`` of the CBOR module
+
+        E.g.
+
+        ::
+            parser.set_decoder_args(tag_hook=my_tag_hook)
+        """
+        self._decoder_kwargs = kwargs
+
+    def decode_output(self, cmd_output):
+        """
+        CBOR bytes of cmd_output
+
+        :param cmd_output (str or bytes): Output of ShellInteraction::cmd()
+        """
+        if isinstance(cmd_output, str):
+            return cmd_output.encode(self.FRAME_ENCODING)
+        return cmd_output
+
+    def parse(self, cmd_output):
+        """
+        Parse cmd_output as one CBOR item using cbor2_
+
+        .. _cbor2: https://github.com/agronholm/cbor2
+
+        :param cmd_output (str or bytes): Output of ShellInteraction::cmd().
+                                          Must be a valid CBOR item
+        """
+        return self.cbor_module.loads(
+            self.decode_output(cmd_output), **self._decoder_kwargs
+        )
+
+    def _stream_bytes(self, chunks):
+        """CBOR bytes of output chunks"""
+        for chunk in chunks:
+            yield self.decode_output(chunk)
+
+    def parse_stream(self, chunks):
+        """
+        Parse CBOR items from a stream of output chunks as they arrive
+
+        Yields each complete top-level CBOR item, see `CBORStreamDecoder`.
+
+        :param chunks: iterable of output chunks, e.g.
+                       ShellInteraction::cmd_stream()
+        """
+        decoder = CBORStreamDecoder(self.cbor_module, **self._decoder_kwargs)
+        for data in self._stream_bytes(chunks):
+            if data:
+                yield from decoder.feed(data)
+
+
+class Base64CBORShellInteractionParser(CBORShellInteractionParser):
+    """Allows for parsing result of a ShellInteraction as CBOR framed in
+    base64 text lines
+
+    The concatenated content of the lines is the CBOR stream, an item can
+    span many lines. When streaming, lines that are not valid frames, e.g.
+    the echoed command or log messages, are skipped. A line only made of
+    frame characters, e.g. a single word, is taken as a frame.
+    """
+
+    @staticmethod
+    def decode_frame(frame):
+        """
+        Bytes of a text frame
+
+        :param frame (str): frame without whitespace
+        :raises ValueError: frame is not valid
+        """
+        return base64.b64decode(frame, validate=True)
+
+    def decode_output(self, cmd_output):
+        """
+        CBOR bytes of all the frames of cmd_output
+
+        :param cmd_output (str or bytes): Output of ShellInteraction::cmd()
+        """
+        if isinstance(cmd_output, bytes):
+            cmd_output = cmd_output.decode(self.FRAME_ENCODING)
+        return self.decode_frame("".join(cmd_output.split()))
+
+    def _stream_bytes(self, chunks):
+        """CBOR bytes of the complete frame lines of each output chunk"""
+        line = ""
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode(self.FRAME_ENCODING)
+            lines = (line + chunk).split("\n")
+            line = lines.pop()
+            yield self._decode_lines(lines)
+        yield self._decode_lines([line])
+
+    def _decode_lines(self, lines):
+        frames = []
+        for line in lines:
+            frame = line.strip()
+            if not frame:
+                continue
+            try:
+                frames.append(self.decode_frame(frame))
+            except ValueError:
+                self.logger.debug("Skipping non-frame output %r", line)
+        return b"".join(frames)
+
+
+class HexCBORShellInteractionParser(Base64CBORShellInteractionParser):
+    """Allows for parsing result of a ShellInteraction as CBOR framed in
+    hexadecimal text lines, see Base64CBORShellInteractionParser
+    """
+
+    @staticmethod
+    def decode_frame(frame):
+        """
+        Bytes of a text frame
+
+        :param frame (str): frame without whitespace
+        :raises ValueError: frame is not valid
+        """
+        return bytes.fromhex(frame)
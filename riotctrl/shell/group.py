@@ -0,0 +1,163 @@
+"""
+Shell interaction group extension for riotctrl
+
+Defines classes to send the same shell command to many nodes at once
+"""
+
+import time
+import logging
+import threading
+import collections.abc
+import concurrent.futures
+
+from riotctrl.group import RIOTCtrlGroup
+
+from . import ShellInteraction
+
+
+class ShellResult(
+    collections.namedtuple("ShellResult", ["output", "result", "duration", "exception"])
+):
+    """Result of a command on one node of a ShellInteractionGroup.
+
+    :param output: output of the command, None if it failed
+    :param result: output parsed with the group parser, the output itself
+                   without parser. None if it failed.
+    :param duration: time in seconds the command took
+    :param exception: exception raised by the command or the parser, or None
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """The command and its parsing succeeded."""
+        return self.exception is None
+
+
+class ShellInteractionGroup:
+    """Group of ShellInteraction to send commands to all of them concurrently.
+
+    Commands are run on all nodes at once, the latency of `cmd` is the one of
+    the slowest node. A failing node, e.g. on timeout, never stops the command
+    on the other nodes. The terminals of the nodes must be started, e.g. with
+    RIOTCtrl.start_term or a `term_session`.
+
+    :param shells: dict mapping node names to ShellInteraction objects, or
+                   iterable of ShellInteraction objects named as in
+                   RIOTCtrlGroup.node_name
+    :param parser: ShellInteractionParser parsing the output of each node
+    :param timeout: timeout of commands on each node, either a number or a
+                    dict mapping node names to timeouts. -1 uses the term's
+                    timeout.
+    :param max_workers: maximum number of concurrent commands
+                        (default: one per node)
+    """
+
+    def __init__(self, shells, parser=None, timeout=-1, max_workers=None):
+        if not isinstance(shells, collections.abc.Mapping):
+            shells = collections.OrderedDict(
+                (RIOTCtrlGroup.node_name(index, shell.riotctrl), shell)
+                for index, shell in enumerate(shells)
+            )
+        self.shells = collections.OrderedDict(shells)
+        self.parser = parser
+        self.timeout = timeout
+        self.max_workers = max_workers or max(len(self.shells), 1)
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_ctrls(cls, ctrls, shell_cls=ShellInteraction, prompt="> ", **kwargs):
+        """Create the group from RIOTCtrl objects.
+
+        :param ctrls: iterable of RIOTCtrl objects
+        :param shell_cls: ShellInteraction class to wrap each RIOTCtrl with
+        :param prompt: the prompt of the shells
+        :param **kwargs: kwargs passed to ShellInteractionGroup
+        """
+        return cls([shell_cls(ctrl, prompt=prompt) for ctrl in ctrls], **kwargs)
+
+    def __len__(self):
+        return len(self.shells)
+
+    def __iter__(self):
+        return iter(self.shells)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker threads, started again by the next command."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def node_timeout(self, name, timeout=None):
+        """Timeout of commands on node `name`.
+
+        :param timeout: number or dict as the group `timeout`, the group
+                        `timeout` if None
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, collections.abc.Mapping):
+            return timeout.get(name, -1)
+        return timeout
+
+    def _cmd_one(self, shell, cmd, timeout, parser):
+        start = time.monotonic()
+        output = None
+        try:
+            output = shell.cmd(cmd, timeout=timeout)
+            result = output if parser is None else parser.parse(output)
+        except Exception as exc:  # pylint:disable=broad-except
+            return ShellResult(output, None, time.monotonic() - start, exc)
+        return ShellResult(output, result, time.monotonic() - start, None)
+
+    def cmd(self, cmd, timeout=None, parser=None):
+        """Send `cmd` to all nodes of the group concurrently.
+
+        :param cmd: A shell command as string.
+        :param timeout: overrides the group `timeout`
+        :param parser: overrides the group `parser`
+        :return: dict mapping node names to ShellResult, in the order of the
+                 group's nodes
+        """
+        if parser is None:
+            parser = self.parser
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+            executor = self._executor
+        start = time.monotonic()
+        futures = collections.OrderedDict(
+            (
+                name,
+                executor.submit(
+                    self._cmd_one, shell, cmd, self.node_timeout(name, timeout), parser
+                ),
+            )
+            for name, shell in self.shells.items()
+        )
+        results = collections.OrderedDict(
+            (name, future.result()) for name, future in futures.items()
+        )
+        for name, res in results.items():
+            if not res.ok:
+                self.logger.warning("%r failed on %s: %r", cmd, name, res.exception)
+        self.logger.info(
+            "Ran %r on %d/%d nodes in %.3fs",
+            cmd,
+            sum(res.ok for res in results.values()),
+            len(results),
+            time.monotonic() - start,
+        )
+        return results
@@ -2,22 +2,166 @@
 JSON parser for riotctrl shell interactions
 """
 
+import re
 import json
 import logging
+import threading
+import collections
 
-try:
-    import rapidjson
-except ImportError:
-    rapidjson = None
+from riotctrl.lazy import LazyModule, is_set
 
 from . import ShellInteractionParser
 
+_JSON_START = re.compile(r"[\[{]")
+_JSON_STRUCTURE = re.compile(r'["\[\]{},]')
+_JSON_STRING = re.compile(r'["\\]')
+_JSON_TRAILING_COMMA = re.compile(r'("(?:[^"\\]|\\.)*")|,(\s*[\]}])')
+
+
+def strip_trailing_commas(text):
+    """
+    Remove the trailing commas of the arrays and objects of a JSON text
+
+    :param text (str): JSON text
+    """
+    return _JSON_TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), text)
+
+
+def _reject_constant(name):
+    raise ValueError("{} is not allowed".format(name))
+
+
+# pylint: disable=too-few-public-methods
+class JSONStreamSplitter:
+    """Splits a stream of text into complete top-level JSON texts
+
+    Each top-level JSON object is one text. Top-level JSON arrays are split
+    into their elements so they can be used before the array is complete.
+    Text outside of top-level objects and arrays, e.g. log noise or prompts,
+    is skipped. Newline-delimited JSON is handled the same way.
+
+    The returned texts are not validated, see
+    `JSONShellInteractionParser.parse_stream`.
+    """
+
+    def __init__(self):
+        self._value = []
+        self._depth = 0
+        self._split = False
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """
+        Feed the next chunk of the stream
+
+        :param chunk (str): next part of the stream
+        :return: list of the JSON texts completed by `chunk`
+        """
+        texts = []
+        pos = 0
+        while pos < len(chunk):
+            if self._escape:
+                self._value.append(chunk[pos])
+                self._escape = False
+                pos += 1
+            elif self._in_string:
+                pos = self._feed_string(chunk, pos)
+            elif self._depth == 0:
+                match = _JSON_START.search(chunk, pos)
+                if match is None:
+                    break
+                self._depth = 1
+                self._split = match.group() == "["
+                self._value = [] if self._split else ["{"]
+                pos = match.end()
+            else:
+                pos = self._feed_structure(chunk, pos, texts)
+        return texts
+
+    def _feed_string(self, chunk, pos):
+        match = _JSON_STRING.search(chunk, pos)
+        if match is None:
+            self._value.append(chunk[pos:])
+            return len(chunk)
+        self._value.append(chunk[pos : match.end()])
+        if match.group() == "\\":
+            self._escape = True
+        else:
+            self._in_string = False
+        return match.end()
+
+    def _feed_structure(self, chunk, pos, texts):
+        match = _JSON_STRUCTURE.search(chunk, pos)
+        if match is None:
+            self._value.append(chunk[pos:])
+            return len(chunk)
+        char = match.group()
+        if self._split and self._depth == 1 and char in ",]":
+            # element of a top-level array
+            self._value.append(chunk[pos : match.start()])
+            self._flush(texts)
+            if char == "]":
+                self._depth = 0
+            return match.end()
+        self._value.append(chunk[pos : match.end()])
+        if char == '"':
+            self._in_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+            if self._depth == 0:
+                self._flush(texts)
+        return match.end()
+
+    def _flush(self, texts):
+        text = "".join(self._value).strip()
+        self._value = []
+        if text:
+            texts.append(text)
+
 
 # pylint: disable=too-few-public-methods
 class JSONShellInteractionParser(ShellInteractionParser):
-    """Allows for parsing result strings of a ShellInteraction as JSON"""
+    """Allows for parsing result strings of a ShellInteraction as JSON
+
+    Options are handled the same way whatever the JSON module of the class.
+
+    :param trailing_commas: accept trailing commas in arrays and objects
+    :param allow_nan: accept ``NaN``, ``Infinity`` and ``-Infinity``
+    :param cache_size: number of results kept for identical outputs, e.g.
+                       static outputs polled in a loop. No cache if 0. Cached
+                       results are shared and must not be modified.
+    """
+
+    # pylint:disable=too-many-instance-attributes
 
     json_module = json
+    # Name of `json_module` and of the riotctrl extra installing it
+    JSON_MODULE_NAME = "json"
+    # `json_module` parses trailing commas without `strip_trailing_commas`
+    NATIVE_TRAILING_COMMAS = False
+    # `json_module` can reject NaN and Infinity
+    REJECTS_NAN = True
+
+    def __init__(self, trailing_commas=False, allow_nan=True, cache_size=0):
+        self.logger = logging.getLogger(type(self).__name__)
+        if self.json_module is None:
+            self.logger.warning(
+                "%s initialized without %s installed\n"
+                "Please install with riotctrl[%s]",
+                type(self).__name__,
+                self.JSON_MODULE_NAME,
+                self.JSON_MODULE_NAME,
+            )
+        self.trailing_commas = trailing_commas
+        self.allow_nan = allow_nan
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def parse(self, cmd_output):
         """
@@ -26,7 +170,64 @@ class JSONShellInteractionParser(ShellInteractionParser):
         :param cmd_output (str): Output of ShellInteraction::cmd(). Must be
                                  valid JSON
         """
-        return self.json_module.loads(cmd_output)
+        if not self.cache_size:
+            return self.loads(cmd_output)
+        with self._cache_lock:
+            if cmd_output in self._cache:
+                self._cache.move_to_end(cmd_output)
+                self.hits += 1
+                return self._cache[cmd_output]
+        result = self.loads(cmd_output)
+        with self._cache_lock:
+            self.misses += 1
+            self._cache[cmd_output] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def loads(self, text):
+        """
+        Parse `text` with `json_module` according to the options, uncached
+
+        :param text (str): JSON text
+        """
+        if self.trailing_commas and not self.NATIVE_TRAILING_COMMAS:
+            text = strip_trailing_commas(text)
+        return self._loads(text)
+
+    def _loads(self, text):
+        if self.allow_nan:
+            return self.json_module.loads(text)
+        return self.json_module.loads(text, parse_constant=_reject_constant)
+
+    def stats(self):
+        """Cache statistics.
+
+        :return: dict with the number of cache `hits` and `misses` and the
+                 `size` of the cache
+        """
+        with self._cache_lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    def parse_stream(self, chunks):
+        """
+        Parse JSON values from a stream of output chunks as they arrive
+
+        Yields each complete top-level JSON object and each element of
+        top-level JSON arrays, see `JSONStreamSplitter`. Text that is not
+        valid JSON is skipped.
+
+        :param chunks: iterable of strings, e.g. ShellInteraction::cmd_stream()
+        """
+        splitter = JSONStreamSplitter()
+        for chunk in chunks:
+            for text in splitter.feed(chunk):
+                try:
+                    yield self.parse(text)
+                except ValueError:
+                    logging.getLogger(type(self).__name__).debug(
+                        "Skipping non-JSON output %r", text
+                    )
 
 
 class RapidJSONShellInteractionParser(JSONShellInteractionParser):
@@ -37,18 +238,13 @@ class RapidJSONShellInteractionParser(JSONShellInteractionParser):
     .. _rapidjson: https://rapidjson.org/
     """
 
-    json_module = rapidjson
+    json_module = LazyModule("rapidjson")
+    JSON_MODULE_NAME = "rapidjson"
+    NATIVE_TRAILING_COMMAS = True
 
     def __init__(self, *args, **kwargs):
-        self.logger = logging.getLogger(type(self).__name__)
         self._parser_args = {}
         self._parser_kwargs = {}
-        if self.json_module is None:
-            self.logger.warning(
-                "%s initialized without rapidjson installed\n"
-                "Please install with riotctrl[rapidjson]",
-                type(self).__name__,
-            )
         super().__init__(*args, **kwargs)
 
     def set_parser_args(self, *args, **kwargs):
@@ -62,14 +258,113 @@ class RapidJSONShellInteractionParser(JSONShellInteractionParser):
         self._parser_args = args
         self._parser_kwargs = kwargs
 
-    def parse(self, cmd_output):
-        """Parse cmd_output as JSON using rapidjson_
+    def _loads(self, text):
+        """Parse text as JSON using rapidjson_
 
         .. _rapidjson: https://rapidjson.org/
-
-        :param cmd_output (str): Output of ShellInteraction::cmd(). Must be
-                                 valid JSON
         """
-        return self.json_module.loads(
-            cmd_output, *self._parser_args, **self._parser_kwargs
-        )
+        kwargs = {}
+        if self.trailing_commas:
+            kwargs["parse_mode"] = self.json_module.PM_TRAILING_COMMAS
+        if not self.allow_nan:
+            kwargs["allow_nan"] = False
+        kwargs.update(self._parser_kwargs)
+        return self.json_module.loads(text, *self._parser_args, **kwargs)
+
+
+class ORJSONShellInteractionParser(JSONShellInteractionParser):
+    """Allows for parsing result strings of a ShellInteraction as JSON using
+    orjson_. RIOTCtrl can be installed with ``orjson`` support using
+    ``riotctrl[orjson]``.
+
+    .. _orjson: https://github.com/ijl/orjson
+    """
+
+    json_module = LazyModule("orjson")
+    JSON_MODULE_NAME = "orjson"
+
+    def _loads(self, text):
+        try:
+            # C extension members are unknown to pylint
+            return self.json_module.loads(text)  # pylint:disable=no-member
+        except ValueError:
+            if not self.allow_nan:
+                raise
+            # orjson never parses NaN and Infinity
+            return json.loads(text)
+
+
+class UJSONShellInteractionParser(JSONShellInteractionParser):
+    """Allows for parsing result strings of a ShellInteraction as JSON using
+    ujson_. RIOTCtrl can be installed with ``ujson`` support using
+    ``riotctrl[ujson]``.
+
+    ujson_ always accepts ``NaN`` and ``Infinity``, `allow_nan` must be True.
+
+    .. _ujson: https://github.com/ultrajson/ultrajson
+    """
+
+    json_module = LazyModule("ujson")
+    JSON_MODULE_NAME = "ujson"
+    REJECTS_NAN = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.allow_nan:
+            raise ValueError("{} always allows NaN".format(type(self).__name__))
+
+    def _loads(self, text):
+        return self.json_module.loads(text)
+
+
+# Fastest first
+PARSER_CLASSES = (
+    ORJSONShellInteractionParser,
+    UJSONShellInteractionParser,
+    RapidJSONShellInteractionParser,
+    JSONShellInteractionParser,
+)
+
+
+def fastest_parser_class(trailing_commas=False, allow_nan=True):
+    """
+    Fastest JSON parser class with its JSON module installed supporting the
+    options, see `PARSER_CLASSES`
+
+    Parsers parsing trailing commas natively are preferred when
+    `trailing_commas` is set.
+
+    :param trailing_commas: see JSONShellInteractionParser
+    :param allow_nan: see JSONShellInteractionParser
+    """
+    classes = [
+        cls
+        for cls in PARSER_CLASSES
+        if is_set(cls, "json_module") and (allow_nan or cls.REJECTS_NAN)
+    ]
+    if trailing_commas:
+        classes.sort(key=lambda cls: not cls.NATIVE_TRAILING_COMMAS)
+    return classes[0]
+
+
+# Selected on import for the default options, JSON modules are only imported
+# on first use
+FASTEST_PARSER_CLASS = fastest_parser_class()
+
+
+def get_parser(trailing_commas=False, allow_nan=True, cache_size=0):
+    """
+    Fastest available JSON parser, see `fastest_parser_class`
+
+    :param trailing_commas: see JSONShellInteractionParser
+    :param allow_nan: see JSONShellInteractionParser
+    :param cache_size: see JSONShellInteractionParser
+    :return: JSONShellInteractionParser object
+    """
+    if not trailing_commas and allow_nan:
+        parser_cls = FASTEST_PARSER_CLASS
+    else:
+        parser_cls = fastest_parser_class(trailing_commas, allow_nan)
+    return parser_cls(
+        trailing_commas=trailing_commas, allow_nan=allow_nan, cache_size=cache_size
+    )
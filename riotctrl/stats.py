@@ -0,0 +1,125 @@
+"""Statistics for RIOTCtrl.
+
+Define classes to record how long RIOTCtrl and TermSpawn operations take
+and how much data they exchange.
+"""
+
+import time
+import threading
+import contextlib
+
+
+class Stats:
+    """Latency histograms and counters.
+
+    :param labels: dict identifying what is measured, e.g. the `BOARD`
+    :param sinks: list of callables, called as ``sink(labels, name, value)``
+                  for each recorded latency or counter increment.
+    """
+
+    # Upper bounds of the latency histogram buckets in seconds
+    BUCKETS = (0.001, 0.01, 0.1, 1, 10, 60)
+
+    def __init__(self, labels=None, sinks=None):
+        self.labels = dict(labels or {})
+        self.sinks = list(sinks or [])
+        self._latencies = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration):
+        """Record a latency.
+
+        :param name: name of the measured operation
+        :param duration: duration of the operation in seconds
+        """
+        with self._lock:
+            latency = self._latencies.get(name)
+            if latency is None:
+                latency = {
+                    "count": 0,
+                    "total": 0.0,
+                    "min": duration,
+                    "max": duration,
+                    "buckets": [0] * (len(self.BUCKETS) + 1),
+                }
+                self._latencies[name] = latency
+            latency["count"] += 1
+            latency["total"] += duration
+            latency["min"] = min(latency["min"], duration)
+            latency["max"] = max(latency["max"], duration)
+            for i, bound in enumerate(self.BUCKETS):
+                if duration <= bound:
+                    latency["buckets"][i] += 1
+                    break
+            else:
+                latency["buckets"][-1] += 1
+        for sink in self.sinks:
+            sink(self.labels, name, duration)
+
+    def count(self, name, value=1):
+        """Increment a counter.
+
+        :param name: name of the counter, e.g. `bytes_in`
+        :param value: increment
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        for sink in self.sinks:
+            sink(self.labels, name, value)
+
+    @contextlib.contextmanager
+    def timed(self, name):
+        """Context manager recording the latency of its block as `name`.
+
+        Exceptions raised in the block are also counted as `<name>_errors`.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.count(name + "_errors")
+            raise
+        finally:
+            self.record(name, time.monotonic() - start)
+
+    def as_dict(self):
+        """Export statistics.
+
+        :return: dict with `labels`, `counters` and `latencies`. Each latency
+                 has its `count`, `total`, `min`, `max` and `mean` in seconds
+                 and its histogram `buckets`, mapping upper bounds to counts.
+        """
+        with self._lock:
+            latencies = {}
+            for name, latency in self._latencies.items():
+                bounds = [str(bound) for bound in self.BUCKETS] + ["inf"]
+                latencies[name] = {
+                    "count": latency["count"],
+                    "total": latency["total"],
+                    "min": latency["min"],
+                    "max": latency["max"],
+                    "mean": latency["total"] / latency["count"],
+                    "buckets": dict(zip(bounds, latency["buckets"])),
+                }
+            return {
+                "labels": dict(self.labels),
+                "counters": dict(self._counters),
+                "latencies": latencies,
+            }
+
+    def reset(self):
+        """Forget all recorded statistics."""
+        with self._lock:
+            self._latencies.clear()
+            self._counters.clear()
+
+
+@contextlib.contextmanager
+def timed(stats, name):
+    """`Stats.timed` that does nothing when `stats` is None."""
+    if stats is None:
+        yield
+    else:
+        with stats.timed(name):
+            yield
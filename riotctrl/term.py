@@ -0,0 +1,298 @@
+"""RIOTctrl terminals.
+
+Define the pexpect spawn classes used by `RIOTCtrl` for its terminal. Kept
+out of riotctrl.ctrl so that pexpect is only imported with a terminal.
+"""
+
+import threading
+import functools
+import collections
+
+import pexpect
+import pexpect.expect
+import pexpect.fdpexpect
+
+from riotctrl.expect import PatternIndexSearcher, RingBuffer
+from riotctrl.listener import TermListener
+from riotctrl.stats import timed
+
+
+class TermSpawnMixin:  # pylint:disable=too-many-instance-attributes
+    """Behaviour shared by `TermSpawn` and `TermFdSpawn`.
+
+    * tweak exception:
+      * replace the value with the called pattern
+      * remove exception context from inside pexpect implementation
+    * optional statistics in `stats` (a riotctrl.stats.Stats):
+      * latency of `expect`, `expect_exact` and `sendline`
+      * `bytes_in` and `reads` of blocking reads, `bytes_out`
+    * faster `expect`:
+      * compiled pattern lists are kept in a LRU cache shared by all
+        instances, of size `PATTERN_CACHE_SIZE`
+      * searching with `PatternIndexSearcher`
+    * optional bounded output capture for long runs, with `ring_size`:
+      * unmatched output is kept in `RingBuffer` objects of `ring_size`
+      * older output is written to `spill_file`, if given, and dropped
+      * `drain` writes out the unmatched output and frees it
+    * output listeners, with `listen`:
+      * a `TermListener` thread routes output lines matching listened
+        patterns to callbacks or queues
+      * `expect` only sees the other lines
+    * optional recording of the session, with `transcript`:
+      * data sent and received is given to `transcript`, e.g. a
+        `riotctrl.replay.TranscriptWriter`
+    """
+
+    PATTERN_CACHE_SIZE = 256
+    _pattern_cache = collections.OrderedDict()
+    _pattern_cache_lock = threading.Lock()
+
+    def __init__(
+        self, *args, ring_size=None, spill_file=None, transcript=None, **kwargs
+    ):
+        self.stats = None  # type: riotctrl.stats.Stats
+        self.transcript = transcript
+        self.spill_file = spill_file
+        self.spilled = 0
+        self.listener = None  # type: riotctrl.listener.TermListener
+        super().__init__(*args, **kwargs)
+        if ring_size is not None:
+            self.buffer_type = functools.partial(
+                RingBuffer, ring_size, binary=self.encoding is None
+            )
+            self._buffer = self.buffer_type()
+            self._before = self.buffer_type()
+
+    @property
+    def _before(self):
+        return self._before_buffer
+
+    @_before.setter
+    def _before(self, value):
+        # `_buffer` holds a copy of the `_before` tail, only spill `_before`
+        if isinstance(value, RingBuffer):
+            value.spill = self._spill
+        self._before_buffer = value
+
+    def _spill(self, data):
+        self.spilled += len(data)
+        if self.spill_file is not None:
+            self.spill_file.write(data)
+
+    def drain(self, file=None):
+        """Free the output received but not matched yet.
+
+        Output already available on the terminal is read first.
+
+        :param file: file to write the output to (default: `spill_file`)
+        :return: the drained output
+        """
+        try:
+            while True:
+                self._before.write(self.read_nonblocking(self.maxread, timeout=0))
+        except (pexpect.TIMEOUT, pexpect.EOF):
+            pass
+        data = self._before.getvalue()
+        self._before = self.buffer_type()
+        self._buffer = self.buffer_type()
+        if file is None:
+            file = self.spill_file
+        if file is not None:
+            file.write(data)
+        return data
+
+    def expect(self, pattern, *args, **kwargs):
+        """`pexpect.spawn.expect` with exceptions tweak and statistics."""
+        if kwargs.get("async_"):
+            return self._async_expect(super().expect, pattern, *args, **kwargs)
+        try:
+            with timed(self.stats, "expect"):
+                return super().expect(pattern, *args, **kwargs)
+        except (pexpect.TIMEOUT, pexpect.EOF) as exc:
+            raise self._pexpect_exception(exc, pattern)
+
+    def expect_exact(self, pattern, *args, **kwargs):
+        """`pexpect.spawn.expect_exact` with exceptions tweak and statistics."""
+        if kwargs.get("async_"):
+            return self._async_expect(super().expect_exact, pattern, *args, **kwargs)
+        try:
+            with timed(self.stats, "expect_exact"):
+                return super().expect_exact(pattern, *args, **kwargs)
+        except (pexpect.TIMEOUT, pexpect.EOF) as exc:
+            raise self._pexpect_exception(exc, pattern)
+
+    async def _async_expect(self, expect, pattern, *args, **kwargs):
+        """Await `expect` coroutine with the same exceptions tweak."""
+        try:
+            with timed(self.stats, expect.__name__):
+                return await expect(pattern, *args, **kwargs)
+        except (pexpect.TIMEOUT, pexpect.EOF) as exc:
+            raise self._pexpect_exception(exc, pattern)
+
+    def compile_pattern_list(self, patterns):
+        """`pexpect.spawn.compile_pattern_list` with LRU cache."""
+        try:
+            key = (
+                tuple(patterns) if isinstance(patterns, list) else (patterns,),
+                self.ignorecase,
+                self.encoding is None,
+            )
+            hash(key)
+        except TypeError:
+            return super().compile_pattern_list(patterns)
+        cache = self._pattern_cache
+        with self._pattern_cache_lock:
+            compiled = cache.get(key)
+            if compiled is not None:
+                cache.move_to_end(key)
+                return list(compiled)
+        compiled = super().compile_pattern_list(patterns)
+        with self._pattern_cache_lock:
+            cache[key] = compiled
+            while len(cache) > self.PATTERN_CACHE_SIZE:
+                cache.popitem(last=False)
+        return list(compiled)
+
+    def expect_list(
+        self, pattern_list, timeout=-1, searchwindowsize=-1, async_=False, **kw
+    ):  # pylint:disable=too-many-arguments
+        """`pexpect.spawn.expect_list` using `PatternIndexSearcher`."""
+        if timeout == -1:
+            timeout = self.timeout
+        if "async" in kw:
+            async_ = kw.pop("async")
+        if kw:
+            raise TypeError("Unknown keyword arguments: {}".format(kw))
+
+        searcher = PatternIndexSearcher(pattern_list)
+        exp = pexpect.expect.Expecter(self, searcher, searchwindowsize)
+        if async_:
+            # pylint:disable=import-outside-toplevel
+            from pexpect._async import expect_async
+
+            return expect_async(exp, timeout)
+        return exp.expect_loop(timeout)
+
+    def listen(self, pattern, callback=None, queue=None, consume=True):
+        """Route output lines matching `pattern` to `callback` or `queue`.
+
+        Starts the `listener` thread on first use, see
+        `riotctrl.listener.Subscription` for the arguments. Asynchronous
+        `expect` is not supported while listening.
+
+        :return: riotctrl.listener.Subscription, events are in its `queue`
+        """
+        if self.listener is None:
+            self.listener = TermListener(self._read_raw, self.string_type())
+            self.listener.start()
+        return self.listener.subscribe(pattern, callback, queue, consume)
+
+    def unlisten(self, subscription):
+        """Stop routing the lines of `subscription` returned by `listen`."""
+        self.listener.unsubscribe(subscription)
+
+    def stop_listener(self):
+        """Stop the `listener` thread, its pending output goes to `buffer`."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            self.buffer = self.buffer + listener.stop()
+
+    def close(self, *args, **kwargs):
+        """Stop the `listener` and close."""
+        self.stop_listener()
+        return super().close(*args, **kwargs)
+
+    def read_nonblocking(self, size=1, timeout=-1):
+        """`pexpect.spawn.read_nonblocking` from the `listener` if any."""
+        if self.listener is None:
+            return self._read_raw(size, timeout)
+        if timeout == -1:
+            timeout = self.timeout
+        return self.listener.read(size, timeout)
+
+    def _read_raw(self, size=1, timeout=-1):
+        """`pexpect.spawn.read_nonblocking` with statistics."""
+        data = super().read_nonblocking(size, timeout)
+        if self.transcript is not None:
+            self.transcript.received(data)
+        if self.stats is not None:
+            raw = data
+            if not isinstance(raw, bytes):
+                raw = raw.encode(self.encoding, self.codec_errors)
+            self.stats.count("reads")
+            self.stats.count("bytes_in", len(raw))
+        return data
+
+    def send(self, s):
+        """`pexpect.spawn.send` with statistics."""
+        written = super().send(s)
+        if self.transcript is not None:
+            self.transcript.sent(s)
+        if self.stats is not None:
+            self.stats.count("bytes_out", written)
+        return written
+
+    def sendline(self, s=""):
+        """`pexpect.spawn.sendline` with statistics."""
+        with timed(self.stats, "sendline"):
+            return super().sendline(s)
+
+    @staticmethod
+    def _pexpect_exception(exc, pattern):
+        """Tweak pexpect exception.
+
+        * Put the calling 'pattern' as value
+        * Remove exception context
+        """
+        exc.pexpect_value = exc.value
+        exc.value = pattern
+
+        # Remove exception context
+        exc.__cause__ = None
+        exc.__traceback__ = None
+        return exc
+
+
+class TermSpawn(TermSpawnMixin, pexpect.spawn):
+    """Subclass to adapt the behaviour to our need.
+
+    * change default `__init__` values
+      * disable local 'echo' to not match send messages
+      * 'utf-8/replace' by default
+      * default timeout
+    * see `TermSpawnMixin` for the other changes
+    """
+
+    def __init__(
+        self,
+        command,
+        timeout=10,
+        echo=False,
+        encoding="utf-8",
+        codec_errors="replace",
+        **kwargs
+    ):  # pylint:disable=too-many-arguments
+        super().__init__(
+            command,
+            timeout=timeout,
+            echo=echo,
+            encoding=encoding,
+            codec_errors=codec_errors,
+            **kwargs
+        )
+
+
+class TermFdSpawn(TermSpawnMixin, pexpect.fdpexpect.fdspawn):
+    """`TermSpawn` reading and writing an already opened file descriptor.
+
+    Used to access a serial port without any terminal program.
+
+    :param fd: file descriptor, closed by `close`
+    """
+
+    def __init__(
+        self, fd, timeout=10, encoding="utf-8", codec_errors="replace", **kwargs
+    ):  # pylint:disable=too-many-arguments
+        super().__init__(
+            fd, timeout=timeout, encoding=encoding, codec_errors=codec_errors, **kwargs
+        )
@@ -0,0 +1,82 @@
+"""riotctrl.aio test module."""
+
+import os
+import sys
+import asyncio
+import tempfile
+
+import pytest
+import pexpect
+
+import riotctrl.aio
+import riotctrl.build
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+# asyncio.run
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason="requires Python >= 3.7"
+)
+
+
+def test_amake_run():
+    """Test running make from the event loop."""
+    ctrl = riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    ctrl.build_cache = riotctrl.build.BuildCache()
+
+    async def _run():
+        res = await ctrl.amake_run(
+            ["non-existing-target"], stdout=asyncio.subprocess.PIPE
+        )
+        assert res.returncode != 0
+        res = await ctrl.aflash()
+        assert res.returncode == 0
+        assert res.args[-1] == ctrl.FLASH_ONLY_TARGETS[-1]
+
+    asyncio.run(_run())
+    assert ctrl.build_cache.stats()["misses"] == 1
+
+
+def test_aflash_build_scheduler():
+    """Test only the build part of aflash goes through the build scheduler."""
+    ctrl = riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    ctrl.build_scheduler = riotctrl.build.BuildScheduler(jobs=1, jobserver=False)
+    res = asyncio.run(ctrl.aflash())
+    assert res.returncode == 0
+    assert res.args[-1] == ctrl.FLASH_ONLY_TARGETS[-1]
+    assert ctrl.build_scheduler.stats()["runs"] == 1
+
+
+def test_arun_term_many():
+    """Test driving the terminals of many ctrls from one event loop."""
+
+    async def _echo(index, ctrl):
+        async with ctrl.arun_term(
+            ready_pattern="This example will echo", logfile=sys.stdout
+        ) as child:
+            # reset starts the firmware a second time
+            await child.expect_exact("This example will echo", async_=True)
+            for i in range(4):
+                child.sendline("Hello {} {}".format(index, i))
+                await child.expect(r"Hello (\d+) (\d+)", timeout=1, async_=True)
+                assert child.match.group(1) == str(index)
+                assert child.match.group(2) == str(i)
+            with pytest.raises(pexpect.TIMEOUT) as exc_info:
+                await child.expect_exact("UPPERCASE", timeout=0.1, async_=True)
+            assert exc_info.value.value == "UPPERCASE"
+        assert ctrl.term is None
+
+    async def _run():
+        await asyncio.gather(*(_echo(i, ctrl) for i, ctrl in enumerate(ctrls)))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ctrls = []
+        for i in range(3):
+            env = {
+                "BOARD": "board",
+                "APPLICATION": "./echo.py",
+                "PIDFILE": os.path.join(tmpdir, "pid{}".format(i)),
+            }
+            ctrls.append(riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, env))
+        asyncio.run(_run())
@@ -0,0 +1,293 @@
+"""riotctrl benchmarks.
+
+Run offline against the test applications with ``pytest -m benchmark``.
+Results are written as JSON to the file given by the
+``RIOTCTRL_BENCHMARK_OUTPUT`` environment variable
+(default: ``benchmark-results.json``) to compare versions.
+"""
+
+import os
+import re
+import base64
+import sys
+import json
+import time
+import platform
+import tempfile
+import subprocess
+import statistics
+
+import pexpect
+import pexpect.expect
+import pytest
+
+import riotctrl
+import riotctrl.ctrl
+import riotctrl.expect
+import riotctrl.shell
+import riotctrl.shell.cbor
+import riotctrl.shell.json
+import riotctrl.term
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+ROUNDS = int(os.environ.get("RIOTCTRL_BENCHMARK_ROUNDS") or 10)
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(name="results", scope="module")
+def fixture_results():
+    """Benchmark results, written as JSON once all benchmarks ran."""
+    results = {}
+    yield results
+    output = os.environ.get("RIOTCTRL_BENCHMARK_OUTPUT") or "benchmark-results.json"
+    with open(output, "w", encoding="utf-8") as outfile:
+        json.dump(
+            {
+                "riotctrl": riotctrl.__version__,
+                "python": platform.python_version(),
+                "pexpect": pexpect.__version__,
+                "rounds": ROUNDS,
+                "results": results,
+            },
+            outfile,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+@pytest.fixture(name="app_pidfile_env")
+def fixture_app_pidfile_env():
+    """Environment to use application pidfile"""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        yield {"PIDFILE": tmpfile.name}
+
+
+def measure(func, rounds=ROUNDS, number=1):
+    """Time `rounds` runs of `number` calls of `func`.
+
+    :return: dict of the min, median, mean and max time of one call in seconds
+    """
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "rounds": rounds,
+        "number": number,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "max": max(times),
+    }
+
+
+def test_start_stop_term(results, app_pidfile_env):
+    """Benchmark start_term and stop_term latency."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+
+    for mode in ("make", "direct"):
+        ctrl.TERM_MODE = mode
+        start_times = []
+        stop_times = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            ctrl.start_term(ready_pattern="This example will echo")
+            start_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            ctrl.stop_term()
+            stop_times.append(time.perf_counter() - start)
+        results["start_term[{}]".format(mode)] = {
+            "median": statistics.median(start_times),
+            "min": min(start_times),
+            "max": max(start_times),
+        }
+        results["stop_term[{}]".format(mode)] = {
+            "median": statistics.median(stop_times),
+            "min": min(stop_times),
+            "max": max(stop_times),
+        }
+
+
+def test_shell_cmd(results, app_pidfile_env):
+    """Benchmark ShellInteraction.cmd round-trip and throughput."""
+    env = {
+        "QUIET": "1",
+        "BOARD": "board",
+        "APPLICATION": './shell.py 0 --prompt="> "',
+    }
+    env.update(app_pidfile_env)
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    commands = ["foobar{}".format(i) for i in range(100)]
+
+    with ctrl.run_term(reset=False):
+        shell = riotctrl.shell.ShellInteraction(ctrl)
+        shell.cmd("warmup")
+        results["shell.cmd"] = measure(lambda: shell.cmd("foobar"), number=10)
+
+        start = time.perf_counter()
+        for command in commands:
+            shell.cmd(command)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        outputs = shell.cmds(commands)
+        pipelined = time.perf_counter() - start
+        assert [out.strip() for out in outputs] == commands
+
+    results["shell.cmd throughput"] = {"cmds/s": len(commands) / sequential}
+    results["shell.cmds throughput"] = {"cmds/s": len(commands) / pipelined}
+
+
+def test_expect_large_buffer(results):
+    """Benchmark searching patterns in a large buffer received in chunks."""
+    chunk = "x" * 1023 + "\n"
+    chunks = 512
+    patterns = [re.compile("> END", re.DOTALL), pexpect.TIMEOUT]
+
+    def search(searcher_cls):
+        searcher = searcher_cls(patterns)
+        buffer = ""
+        for _ in range(chunks):
+            buffer += chunk
+            assert searcher.search(buffer, len(chunk)) == -1
+        buffer += "> END"
+        assert searcher.search(buffer, len("> END")) == 0
+
+    results["expect large buffer[searcher_re]"] = measure(
+        lambda: search(pexpect.expect.searcher_re), rounds=3
+    )
+    results["expect large buffer[PatternIndexSearcher]"] = measure(
+        lambda: search(riotctrl.expect.PatternIndexSearcher), rounds=3
+    )
+
+    command = "{} -c \"import sys; sys.stdout.write('{}' * {} + '> END')\"".format(
+        sys.executable, "x" * 63 + "\\n", chunks * 16
+    )
+    for ring_size in (None, 4096):
+
+        def spawn_expect(ring_size=ring_size):
+            child = riotctrl.term.TermSpawn(command, ring_size=ring_size)
+            try:
+                child.expect_exact("> END")
+            finally:
+                child.close()
+
+        results["TermSpawn.expect_exact[ring_size={}]".format(ring_size)] = measure(
+            spawn_expect, rounds=3
+        )
+
+
+def _telemetry(entries=1000):
+    return [
+        {"id": i, "name": "node{}".format(i), "values": [i, 3.14, None, True]}
+        for i in range(entries)
+    ]
+
+
+def _frame(data, encode, width):
+    text = encode(data)
+    if isinstance(text, bytes):
+        text = text.decode()
+    return "".join(text[i : i + width] + "\r\n" for i in range(0, len(text), width))
+
+
+def _wire_output(parser_cls, data):
+    """Output of `data` as sent by the firmware for `parser_cls`."""
+    if issubclass(parser_cls, riotctrl.shell.json.JSONShellInteractionParser):
+        return json.dumps(data)
+    encoded = parser_cls.cbor_module.dumps(data)
+    if issubclass(parser_cls, riotctrl.shell.cbor.HexCBORShellInteractionParser):
+        return _frame(encoded, bytes.hex, 64)
+    if issubclass(parser_cls, riotctrl.shell.cbor.Base64CBORShellInteractionParser):
+        return _frame(encoded, base64.b64encode, 76)
+    return encoded.decode(parser_cls.FRAME_ENCODING)
+
+
+@pytest.mark.parametrize(
+    "parser_cls",
+    [
+        riotctrl.shell.json.JSONShellInteractionParser,
+        riotctrl.shell.json.RapidJSONShellInteractionParser,
+        riotctrl.shell.json.ORJSONShellInteractionParser,
+        riotctrl.shell.json.UJSONShellInteractionParser,
+        riotctrl.shell.cbor.CBORShellInteractionParser,
+        riotctrl.shell.cbor.Base64CBORShellInteractionParser,
+        riotctrl.shell.cbor.HexCBORShellInteractionParser,
+    ],
+)
+def test_parse(results, parser_cls):
+    """Benchmark bytes on the wire and parsing time per parser class."""
+    module = getattr(parser_cls, "json_module", None)
+    if module is None and getattr(parser_cls, "cbor_module", None) is None:
+        pytest.skip("{} module not installed".format(parser_cls.__name__))
+    parser = parser_cls()
+    data = _telemetry()
+    output = _wire_output(parser_cls, data)
+    assert parser.parse(output) == data
+
+    name = parser_cls.__name__
+    results["{} wire".format(name)] = {
+        "bytes": len(output.encode(getattr(parser, "FRAME_ENCODING", "utf-8")))
+    }
+    results["{}.parse".format(name)] = measure(lambda: parser.parse(output), number=10)
+    size = riotctrl.shell.ShellInteraction.STREAM_CHUNK_SIZE
+    stream = [output[i : i + size] for i in range(0, len(output), size)]
+    results["{}.parse_stream".format(name)] = measure(
+        lambda: list(parser.parse_stream(stream)), number=10
+    )
+
+
+def test_make(results):
+    """Benchmark make_command and make_run overhead."""
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    results["make_command"] = measure(lambda: ctrl.make_command(["flash"]), number=1000)
+    results["make_run"] = measure(
+        lambda: ctrl.make_run(["flash"], stdout=subprocess.DEVNULL)
+    )
+
+
+def _import_env():
+    """Environment importing this riotctrl in a new interpreter."""
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(riotctrl.__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    return env
+
+
+def _import_time(module):
+    """Cumulative `python -X importtime` time of `module` in seconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import {}".format(module)],
+        stderr=subprocess.PIPE,
+        env=_import_env(),
+        check=True,
+        universal_newlines=True,
+    )
+    # import time: self [us] | cumulative | imported package
+    for line in proc.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    raise ValueError("{} not imported".format(module))
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["riotctrl", "riotctrl.ctrl", "riotctrl.shell", "riotctrl.shell.json"],
+)
+def test_import(results, module):
+    """Benchmark `python -X importtime` of riotctrl modules."""
+    times = [_import_time(module) for _ in range(ROUNDS)]
+    results["import {}".format(module)] = {
+        "rounds": ROUNDS,
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+    }
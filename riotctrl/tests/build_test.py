@@ -0,0 +1,198 @@
+"""riotctrl.build test module."""
+
+import os
+import threading
+
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.build
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+def test_build_cache_flash(monkeypatch):
+    """Test that identical ctrls build once and only flash."""
+    targets = []
+    orig_make_run = riotctrl.ctrl.RIOTCtrl.make_run
+
+    def make_run_mock(self, _targets, *args, **kwargs):
+        """Records targets of RIOTCtrl's make_run method"""
+        targets.append((self.env["BOARD"], _targets))
+        return orig_make_run(self, _targets, *args, **kwargs)
+
+    monkeypatch.setattr(riotctrl.ctrl.RIOTCtrl, "make_run", make_run_mock)
+    build_cache = riotctrl.build.BuildCache()
+    factory = riotctrl.ctrl.RIOTCtrlBoardFactory(build_cache=build_cache)
+
+    ctrls = [
+        factory.get_ctrl(APPLICATIONS_DIR, env={"BOARD": "board", "PORT": str(i)})
+        for i in range(3)
+    ]
+    ctrls.append(factory.get_ctrl(APPLICATIONS_DIR, env={"BOARD": "other"}))
+    assert all(ctrl.build_cache is build_cache for ctrl in ctrls)
+
+    for ctrl in ctrls:
+        assert ctrl.flash().returncode == 0
+
+    assert targets == [
+        ("board", riotctrl.ctrl.RIOTCtrl.BUILD_TARGETS),
+        ("board", riotctrl.ctrl.RIOTCtrl.FLASH_ONLY_TARGETS),
+        ("board", riotctrl.ctrl.RIOTCtrl.FLASH_ONLY_TARGETS),
+        ("board", riotctrl.ctrl.RIOTCtrl.FLASH_ONLY_TARGETS),
+        ("other", riotctrl.ctrl.RIOTCtrl.BUILD_TARGETS),
+        ("other", riotctrl.ctrl.RIOTCtrl.FLASH_ONLY_TARGETS),
+    ]
+    stats = build_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["saved_time"] > 0
+
+    build_cache.invalidate(ctrls[0])
+    ctrls[0].flash()
+    assert targets[-2] == ("board", riotctrl.ctrl.RIOTCtrl.BUILD_TARGETS)
+    assert build_cache.stats()["misses"] == 3
+
+
+class FailingBuildCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl where building fails in make"""
+
+    BUILD_TARGETS = ("non-existing-build-target",)
+
+
+def test_build_cache_failing_build():
+    """Test that failing builds are returned and not cached."""
+    build_cache = riotctrl.build.BuildCache()
+    ctrl = FailingBuildCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    ctrl.build_cache = build_cache
+
+    assert ctrl.flash().returncode != 0
+    assert ctrl.flash().returncode != 0
+    assert build_cache.stats() == {"hits": 0, "misses": 2, "saved_time": 0.0}
+
+
+# Each job records the number of jobs running when it starts
+CONCURRENCY_MAKEFILE = """
+JOBS = a b c d
+all: $(JOBS)
+$(JOBS):
+\t@mkdir -p running && touch running/$@.$$$$ && \\
+\t\tls running | wc -l >> concurrency && \\
+\t\tsleep 0.2 && rm running/$@.$$$$
+"""
+
+
+class ParallelCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl with its own make jobs"""
+
+    MAKE_ARGS = ("-j8",)
+
+
+@pytest.fixture(name="concurrency_app")
+def fixture_concurrency_app(tmp_path):
+    """Application directory recording its make jobs concurrency"""
+    (tmp_path / "Makefile").write_text(CONCURRENCY_MAKEFILE)
+    return tmp_path
+
+
+def _concurrent_builds(app, build_scheduler, nodes=3):
+    """Build `app` for `nodes` RIOTCtrl at once
+
+    :return: maximum number of jobs run concurrently
+    """
+    factory = riotctrl.ctrl.RIOTCtrlBoardFactory(
+        board_cls={"board": ParallelCtrl}, build_scheduler=build_scheduler
+    )
+    ctrls = [
+        factory.get_ctrl(str(app), env={"BOARD": "board", "MAKEFLAGS": "-j16"})
+        for _ in range(nodes)
+    ]
+    assert all(ctrl.build_scheduler is build_scheduler for ctrl in ctrls)
+    results = []
+    threads = [
+        threading.Thread(target=lambda c=ctrl: results.append(c.make_run(["all"])))
+        for ctrl in ctrls
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [res.returncode for res in results] == [0] * nodes
+    counts = (app / "concurrency").read_text().split()
+    assert len(counts) == 4 * nodes
+    return max(int(count) for count in counts)
+
+
+def test_build_scheduler_jobserver(concurrency_app):
+    """Test concurrent make runs share the jobserver slots"""
+    with riotctrl.build.BuildScheduler(jobs=3) as build_scheduler:
+        assert 1 < _concurrent_builds(concurrency_app, build_scheduler) <= 3
+        stats = build_scheduler.stats()
+    assert stats["jobs"] == 3
+    assert stats["runs"] == 3
+    assert stats["wait_time"] >= 0
+
+
+def test_build_scheduler_semaphore(concurrency_app):
+    """Test concurrent make runs share the slots without jobserver"""
+    build_scheduler = riotctrl.build.BuildScheduler(
+        jobs=4, jobserver=False, make_jobs=2
+    )
+    assert 1 < _concurrent_builds(concurrency_app, build_scheduler) <= 4
+    assert build_scheduler.stats()["runs"] == 3
+    # a make run waited for slots
+    assert build_scheduler.stats()["wait_time"] > 0
+
+
+def test_strip_jobs_args():
+    """Test make jobs arguments are removed from commands"""
+    strip = riotctrl.build.strip_jobs_args
+    assert strip(["make", "-j", "4", "-C", "app", "all"]) == [
+        "make",
+        "-C",
+        "app",
+        "all",
+    ]
+    assert strip(["make", "-j8", "--jobs=2", "all"]) == ["make", "all"]
+    assert strip(["make", "--jobs", "all"]) == ["make", "all"]
+    assert strip(["make", "-j"]) == ["make"]
+
+
+def test_build_scheduler_make_flags():
+    """Test MAKEFLAGS of make runs"""
+    with riotctrl.build.BuildScheduler(jobs=2) as build_scheduler:
+        flags = build_scheduler.make_flags({"MAKEFLAGS": "-j16 -k"}).split()
+        assert flags[0] == "-j2"
+        assert flags[1].startswith("--jobserver-auth=")
+        assert flags[2:] == ["-k"]
+    build_scheduler = riotctrl.build.BuildScheduler(jobs=2, jobserver=False)
+    assert build_scheduler.make_flags({}) == ""
+
+
+def test_build_scheduler_only_builds():
+    """Test only builds take slots of the build scheduler"""
+    build_scheduler = riotctrl.build.BuildScheduler(jobs=1, jobserver=False)
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env={"BOARD": "board"})
+    ctrl.build_scheduler = build_scheduler
+
+    # make variables and reset do not wait for the only slot
+    tokens = build_scheduler._acquire()  # pylint:disable=protected-access
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(
+            (ctrl.make_var("BOARD"), ctrl.make_run(ctrl.RESET_TARGETS).returncode)
+        )
+    )
+    thread.start()
+    thread.join(timeout=10)
+    build_scheduler._release(tokens)  # pylint:disable=protected-access
+    assert not thread.is_alive()
+    assert results == [("board", 0)]
+    assert build_scheduler.stats()["runs"] == 0
+
+    # only the build part of flash goes through the scheduler
+    assert ctrl.flash().returncode == 0
+    assert build_scheduler.stats()["runs"] == 1
+    assert ctrl.make_run(ctrl.BUILD_TARGETS).returncode == 0
+    assert build_scheduler.stats()["runs"] == 2
@@ -1,13 +1,21 @@
 """riotctrl.ctrl test module."""
 
+import io
 import os
+import re
 import sys
+import time
+import subprocess
 import tempfile
 
 import pytest
 import pexpect
+import pexpect.expect
+import psutil
 
 import riotctrl.ctrl
+import riotctrl.term
+import riotctrl.expect
 
 CURDIR = os.path.dirname(__file__)
 APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
@@ -114,6 +122,70 @@ def test_running_echo_application(app_pidfile_env):
             assert i == num
 
 
+def test_start_term_ready_pattern(app_pidfile_env):
+    """Test that a ready pattern does not wait the fixed delay."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    ctrl.TERM_STARTED_DELAY = 5
+
+    with ctrl.run_term(
+        reset=False, ready_pattern="This example will echo", logfile=sys.stdout
+    ) as child:
+        assert ctrl.term_ready_time < ctrl.TERM_STARTED_DELAY
+        child.sendline("Hello Test")
+        child.expect_exact("Hello Test")
+
+
+def test_start_term_ready_prompt(app_pidfile_env):
+    """Test that a ready prompt is probed with a newline."""
+    env = {"QUIET": "1", "BOARD": "board", "APPLICATION": "./shell.py 1"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    ctrl.TERM_STARTED_DELAY = 5
+
+    try:
+        ready_time = ctrl.start_term(ready_prompt="> ", logfile=sys.stdout)
+        assert ready_time == ctrl.term_ready_time
+        assert ready_time < ctrl.TERM_STARTED_DELAY
+    finally:
+        ctrl.stop_term()
+
+
+def test_start_term_ready_tty(app_pidfile_env):
+    """Test waiting for a file to be opened by the terminal process tree."""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        env = {"BOARD": "board", "APPLICATION": "./open_file.py %s" % tmpfile.name}
+        env.update(app_pidfile_env)
+
+        ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+        ctrl.TERM_STARTED_DELAY = 5
+
+        with ctrl.run_term(reset=False, ready_tty=tmpfile.name, logfile=sys.stdout):
+            assert ctrl.term_ready_time < ctrl.TERM_STARTED_DELAY
+
+
+def test_start_term_ready_timeout(app_pidfile_env):
+    """Test that an unmet ready condition raises a timeout."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+
+    with pytest.raises(pexpect.TIMEOUT) as exc_info:
+        with ctrl.run_term(
+            reset=False,
+            ready_pattern="never printed",
+            ready_timeout=0.5,
+            logfile=sys.stdout,
+        ):
+            pass
+    assert exc_info.value.value == "never printed"
+    assert ctrl.term is None
+
+
 def test_running_term_with_reset(app_pidfile_env):
     """Test that ctrl resets on run_term."""
     env = {"BOARD": "board"}
@@ -307,3 +379,260 @@ def test_w_board_custom_board_cls():
     # pylint: disable=unidiomatic-typecheck
     # in this case we want to know the exact type
     assert type(ctrl) is CtrlMock2
+
+
+def test_make_vars(monkeypatch):
+    """Test evaluating and caching make variables."""
+    riotctrl.ctrl.clear_make_vars_cache()
+    calls = []
+    orig_make_run = riotctrl.ctrl.RIOTCtrl.make_run
+
+    def make_run_mock(self, *args, **kwargs):
+        """Counts calls of RIOTCtrl's make_run method"""
+        calls.append(args)
+        return orig_make_run(self, *args, **kwargs)
+
+    monkeypatch.setattr(riotctrl.ctrl.RIOTCtrl, "make_run", make_run_mock)
+    env = {"BOARD": "board", "APPLICATION": "./hello.py"}
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+
+    assert ctrl.make_vars(["APPLICATION", "CTRL_WRAPPER", "UNDEFINED_VAR"]) == {
+        "APPLICATION": "./hello.py",
+        "CTRL_WRAPPER": "./ctrl.py",
+        "UNDEFINED_VAR": "",
+    }
+    assert len(calls) == 1
+
+    # Cached, also for another ctrl of the same context
+    other = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    assert other.make_var("CTRL_WRAPPER") == "./ctrl.py"
+    assert len(calls) == 1
+
+    # Only missing variables are evaluated
+    assert ctrl.make_var("Q") == ""
+    assert len(calls) == 2
+    assert "APPLICATION" not in calls[-1][0][0]
+
+    # Different environment
+    other = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"APPLICATION": "./echo.py"})
+    assert other.make_var("APPLICATION") == "./echo.py"
+    assert len(calls) == 3
+
+    ctrl.invalidate_make_vars()
+    assert ctrl.make_var("APPLICATION") == "./hello.py"
+    assert len(calls) == 4
+
+
+def test_make_vars_makefile_modified():
+    """Test that make variables are evaluated again on makefile changes."""
+    riotctrl.ctrl.clear_make_vars_cache()
+    with tempfile.TemporaryDirectory() as application:
+        makefile = os.path.join(application, "Makefile")
+        with open(makefile, "w", encoding="utf-8") as mfile:
+            mfile.write("FOO = foo\n")
+        ctrl = riotctrl.ctrl.RIOTCtrl(application)
+        assert ctrl.make_var("FOO") == "foo"
+
+        with open(makefile, "w", encoding="utf-8") as mfile:
+            mfile.write("FOO = bar\n")
+        os.utime(makefile, ns=(0, 0))
+        assert ctrl.make_var("FOO") == "bar"
+
+        with open(makefile, "w", encoding="utf-8") as mfile:
+            mfile.write("$(error broken makefile)\n")
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            ctrl.make_var("FOO")
+        assert "broken makefile" in exc_info.value.stderr
+
+
+def test_stats(app_pidfile_env):
+    """Test recording statistics of a ctrl and its terminal."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    events = []
+    stats = ctrl.enable_stats(sinks=[lambda *event: events.append(event)])
+    assert ctrl.stats is stats
+
+    with ctrl.run_term(ready_pattern="This example will echo") as child:
+        assert child.stats is stats
+        child.sendline("Hello")
+        child.expect_exact("Hello")
+        with pytest.raises(pexpect.TIMEOUT):
+            child.expect("UPPERCASE", timeout=0.1)
+
+    res = stats.as_dict()
+    assert res["labels"]["board"] == "board"
+    latencies = res["latencies"]
+    assert latencies["start_term"]["count"] == 1
+    assert latencies["start_term"]["max"] == ctrl.term_ready_time
+    assert latencies["stop_term"]["count"] == 1
+    # reset
+    assert latencies["make_run"]["count"] == 1
+    # ready_pattern and test
+    assert latencies["expect"]["count"] == 2
+    assert latencies["expect_exact"]["count"] == 1
+    assert latencies["sendline"]["count"] == 1
+    assert sum(latencies["expect"]["buckets"].values()) == 2
+    assert res["counters"]["expect_errors"] == 1
+    assert res["counters"]["bytes_out"] == len("Hello\n")
+    assert res["counters"]["bytes_in"] >= len("Starting RIOT Ctrl\nHello\n")
+    assert ("board" in events[0][0].values()) and len(events) > 8
+
+    ctrl.disable_stats()
+    stats.reset()
+    ctrl.make_run(["all"])
+    assert not stats.as_dict()["latencies"]
+
+
+def test_pattern_index_searcher():
+    """Test that PatternIndexSearcher matches as pexpect's searcher."""
+    patterns = [
+        re.compile(pattern, re.DOTALL)
+        for pattern in ("World", r"Hello (\w+)", "lo Wo", "d\n>", "never")
+    ]
+    patterns.append(pexpect.TIMEOUT)
+    stream = "Starting\nHello Hello World\n> "
+    for size in range(1, len(stream) + 1):
+        for index_start in range(len(stream)):
+            expected = pexpect.expect.searcher_re(patterns)
+            searcher = riotctrl.expect.PatternIndexSearcher(patterns)
+            buffer = stream[:index_start]
+            res = searcher.search(buffer, len(buffer))
+            assert res == expected.search(buffer, len(buffer))
+            pos = index_start
+            while res == -1 and pos < len(stream):
+                fresh = stream[pos : pos + size]
+                buffer += fresh
+                pos += size
+                res = searcher.search(buffer, len(fresh))
+            # same result as searching the whole buffer at once
+            assert res == expected.search(buffer, len(buffer))
+            if res != -1:
+                assert searcher.match.span() == expected.match.span()
+
+
+def test_pattern_index_searcher_buffer():
+    """Test that data put in the term buffer is searched by expect."""
+    child = riotctrl.term.TermSpawn("cat")
+    try:
+        child.buffer = "hello world\n"
+        assert child.expect(["world", "never"], timeout=1) == 0
+        assert child.after == "world"
+        assert child.buffer == "\n"
+    finally:
+        child.close()
+
+
+def test_pattern_cache(app_pidfile_env):
+    """Test that compiled pattern lists are cached."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    with ctrl.run_term(reset=False, ready_pattern="Starting") as child:
+        compiled = child.compile_pattern_list(["Hello (\\d+)", pexpect.EOF])
+        assert child.compile_pattern_list(["Hello (\\d+)", pexpect.EOF]) == compiled
+        assert child.compile_pattern_list(["Hello (\\d+)", pexpect.EOF])[0] is (
+            compiled[0]
+        )
+        child.sendline("Hello 42")
+        assert child.expect(["Hello (\\d+)", pexpect.EOF]) == 0
+        assert child.match.group(1) == "42"
+
+        # pylint:disable=protected-access
+        cache = riotctrl.ctrl.TermSpawn._pattern_cache
+        for i in range(riotctrl.ctrl.TermSpawn.PATTERN_CACHE_SIZE + 1):
+            child.compile_pattern_list("pattern{}".format(i))
+        assert len(cache) == riotctrl.ctrl.TermSpawn.PATTERN_CACHE_SIZE
+        assert ("pattern0",) not in (key[0] for key in cache)
+
+
+def test_ring_buffer():
+    """Test RingBuffer keeps the last written data."""
+    spilled = []
+    ring = riotctrl.expect.RingBuffer(4, binary=True)
+    ring.spill = spilled.append
+    ring.write(b"abc")
+    ring.write(b"def")
+    assert ring.getvalue() == b"cdef"
+    assert ring.tell() == 4
+    ring.seek(2)
+    assert ring.read() == b"ef"
+    assert spilled == [b"ab"]
+
+
+def test_term_ring_buffer(app_pidfile_env):
+    """Test bounded terminal output capture."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    spill_file = io.StringIO()
+    with ctrl.run_term(
+        reset=False, ready_pattern="echo", ring_size=64, spill_file=spill_file
+    ) as child:
+        for i in range(50):
+            child.sendline("line {}".format(i))
+        child.expect_exact("line 49\r\n")
+        assert len(child.before) <= 64
+        assert child.spilled == len(spill_file.getvalue())
+        assert "\r\nline 0\r\nline 1\r\n" in spill_file.getvalue()
+
+        child.sendline("unmatched")
+        child.expect_exact("unmatched")
+        child.sendline("drained")
+        time.sleep(0.2)
+        assert child.drain() == "\r\ndrained\r\n"
+        assert spill_file.getvalue().endswith("\r\ndrained\r\n")
+        assert child.buffer == ""
+
+
+def test_term_mode_direct(app_pidfile_env):
+    """Test starting the terminal program without make."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    ctrl.TERM_MODE = "direct"
+    assert ctrl.term_command() == [
+        "sh",
+        "-c",
+        "echo $$ > {}; exec ./ctrl.py ./echo.py".format(env["PIDFILE"]),
+    ]
+
+    evaluated = []
+    eval_make_vars = ctrl._eval_make_vars  # pylint:disable=protected-access
+
+    def _eval_make_vars(names):
+        evaluated.append(names)
+        return eval_make_vars(names)
+
+    ctrl._eval_make_vars = _eval_make_vars  # pylint:disable=protected-access
+    for _ in range(2):
+        with ctrl.run_term(reset=False, ready_pattern="This example will echo"):
+            assert "make" not in " ".join(psutil.Process(ctrl.term.pid).cmdline())
+            ctrl.term.sendline("Hello")
+            ctrl.term.expect_exact("Hello")
+    # term command already cached
+    assert not evaluated
+
+
+def test_term_mode_serial():
+    """Test opening the serial port in-process."""
+    master, slave = os.openpty()
+    try:
+        env = {"BOARD": "board", "PORT": os.ttyname(slave)}
+        ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+        ctrl.TERM_MODE = "serial"
+        with ctrl.run_term(reset=False, ready_tty=True) as term:
+            assert isinstance(term, riotctrl.ctrl.TermFdSpawn)
+            os.write(master, b"Hello\n")
+            term.expect_exact("Hello")
+            term.sendline("World")
+            assert os.read(master, 64) == b"World\n"
+        assert ctrl.term is None
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -0,0 +1,60 @@
+"""riotctrl.env test module."""
+
+import os
+import subprocess
+
+import riotctrl.ctrl
+import riotctrl.env
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+def test_env_layers():
+    """Test overrides and removals over the base environment."""
+    env = riotctrl.env.Env({"BOARD": "board"}, base={"BOARD": "native", "A": "1"})
+    assert env["BOARD"] == "board"
+    assert env["A"] == "1"
+    assert dict(env) == {"BOARD": "board", "A": "1"}
+
+    materialized = env.materialize()
+    assert env.materialize() is materialized
+    fingerprint = env.fingerprint()
+
+    del env["A"]
+    assert "A" not in env
+    assert env.materialize() == {"BOARD": "board"}
+    assert env.fingerprint() != fingerprint
+    assert env.base == {"BOARD": "native", "A": "1"}
+
+    env["A"] = "2"
+    copy = env.copy()
+    copy["B"] = "3"
+    assert "B" not in env
+    assert copy.base is env.base
+    assert env.overlay({"C": "4"}) == {"BOARD": "board", "A": "2", "C": "4"}
+    assert env.overlay() is env.materialize()
+
+
+def test_env_base_shared(monkeypatch):
+    """Test the os.environ copy is shared until os.environ changes."""
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    other = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "other"})
+    assert ctrl.env.base is other.env.base
+
+    monkeypatch.setenv("RIOTCTRL_TEST_VARIABLE", "value")
+    changed = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    assert changed.env["RIOTCTRL_TEST_VARIABLE"] == "value"
+    assert "RIOTCTRL_TEST_VARIABLE" not in ctrl.env
+
+
+def test_make_run_env_overrides():
+    """Test per-call environment overrides."""
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    targets = ["--eval=print-board: ; @echo $(BOARD)", "print-board"]
+    res = ctrl.make_run(
+        targets, stdout=subprocess.PIPE, env_overrides={"BOARD": "other"}
+    )
+    assert res.stdout.strip() == b"other"
+    res = ctrl.make_run(targets, stdout=subprocess.PIPE)
+    assert res.stdout.strip() == b"board"
@@ -0,0 +1,73 @@
+"""riotctrl.flash test module."""
+
+import os
+import tempfile
+
+import riotctrl.ctrl
+import riotctrl.flash
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+class CountingFlashCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl counting flash make calls"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flashes = 0
+
+    def make_run(self, targets, *runargs, **runkwargs):
+        if targets == self.FLASH_ONLY_TARGETS:
+            self.flashes += 1
+        return super().make_run(targets, *runargs, **runkwargs)
+
+
+def test_flash_record():
+    """Test flashing is skipped when the firmware is already flashed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        image = os.path.join(tmpdir, "firmware.bin")
+        with open(image, "wb") as firmware:
+            firmware.write(b"firmware v1")
+        path = os.path.join(tmpdir, "record.json")
+        env = {"BOARD": "board", "FLASHFILE": image, "DEBUG_ADAPTER_ID": "1234"}
+
+        ctrl = CountingFlashCtrl(APPLICATIONS_DIR, env)
+        ctrl.flash_record = riotctrl.flash.FlashRecord(path)
+        assert ctrl.flash().returncode == 0
+        res = ctrl.flash()
+        assert res.returncode == 0
+        assert res.stdout is None
+        assert ctrl.flashes == 1
+        assert ctrl.flash(force=True).returncode == 0
+        assert ctrl.flashes == 2
+        assert ctrl.flash_record.stats() == {"skipped": 1, "flashed": 2}
+
+        # persistent
+        other = CountingFlashCtrl(APPLICATIONS_DIR, env)
+        other.flash_record = riotctrl.flash.FlashRecord(path)
+        other.flash()
+        assert other.flashes == 0
+
+        with open(image, "wb") as firmware:
+            firmware.write(b"firmware v2")
+        other.flash()
+        other.flash()
+        assert other.flashes == 1
+
+        other.flash_record.invalidate(other)
+        other.flash()
+        assert other.flashes == 2
+
+
+def test_flash_record_unknown_node():
+    """Test nodes without identifier are always flashed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = {"BOARD": "board", "FLASHFILE": "ctrl.py"}
+        ctrl = CountingFlashCtrl(APPLICATIONS_DIR, env)
+        ctrl.flash_record = riotctrl.flash.FlashRecord(
+            os.path.join(tmpdir, "record.json")
+        )
+        ctrl.flash()
+        ctrl.flash()
+        assert ctrl.flashes == 2
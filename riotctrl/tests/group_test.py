@@ -0,0 +1,80 @@
+"""riotctrl.group test module."""
+
+import os
+import time
+import tempfile
+import threading
+
+import riotctrl.ctrl
+import riotctrl.group
+from riotctrl.tests.utils import FailingFlashCtrl
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+class RaisingFlashCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl where flashing raises an exception"""
+
+    def flash(self, *runargs, **runkwargs):
+        raise RuntimeError("Programmer not found")
+
+
+def test_flash_many():
+    """Test flashing many ctrls with some failing nodes."""
+    ctrls = [
+        riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"}),
+        FailingFlashCtrl(APPLICATIONS_DIR, {"BOARD": "failing"}),
+        RaisingFlashCtrl(APPLICATIONS_DIR, {"BOARD": "raising"}),
+        riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board"}),
+    ]
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = riotctrl.group.flash_many(ctrls, log_dir=log_dir)
+
+        assert [res.ctrl for res in results] == ctrls
+        assert [res.ok for res in results] == [True, False, False, True]
+        assert results[0].result.returncode == 0
+        assert results[1].result.returncode != 0
+        assert results[1].exception is None
+        assert results[2].result is None
+        assert isinstance(results[2].exception, RuntimeError)
+        assert all(res.duration >= 0 for res in results)
+
+        assert sorted(os.listdir(log_dir)) == [
+            "0-board.log",
+            "1-failing.log",
+            "2-raising.log",
+            "3-board.log",
+        ]
+        with open(os.path.join(log_dir, "1-failing.log"), encoding="utf-8") as log:
+            assert "non-existing-flash-target" in log.read()
+
+
+def test_group_limit():
+    """Test the concurrency limit on a shared resource."""
+    ctrls = [
+        riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, {"BOARD": "board", "HUB": str(i % 2)})
+        for i in range(6)
+    ]
+    running = {"0": 0, "1": 0}
+    max_running = {"0": 0, "1": 0}
+    lock = threading.Lock()
+
+    def _action(index, ctrl):
+        hub = ctrl.env["HUB"]
+        with lock:
+            running[hub] += 1
+            max_running[hub] = max(max_running[hub], running[hub])
+        time.sleep(0.05)
+        with lock:
+            running[hub] -= 1
+        return index
+
+    group = riotctrl.group.RIOTCtrlGroup(
+        ctrls, limit_key=lambda ctrl: ctrl.env["HUB"], limits={"1": 2}
+    )
+    assert len(group) == len(ctrls)
+    results = group.run(_action)
+    assert [res.result for res in results] == list(range(6))
+    assert max_running["0"] == group.DEFAULT_LIMIT
+    assert max_running["1"] <= 2
@@ -0,0 +1,80 @@
+"""riotctrl.lazy test module"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.lazy
+import riotctrl.term
+
+
+class Holder:
+    """Class with lazy attributes"""
+
+    decoder = riotctrl.lazy.LazyAttribute("json.decoder", "JSONDecoder")
+    module = riotctrl.lazy.LazyModule("json")
+    missing = riotctrl.lazy.LazyModule("riotctrl_not_installed")
+    plain = None
+
+
+class SubHolder(Holder):
+    """Subclass overriding lazy attributes"""
+
+    module = None
+    plain = json
+
+
+def test_lazy_attributes():
+    """Test lazy attributes evaluate to their value"""
+    assert Holder.decoder is json.JSONDecoder
+    assert Holder().decoder is json.JSONDecoder
+    assert Holder.module is json
+    assert Holder.missing is None
+    assert SubHolder.module is None
+
+
+def test_is_set():
+    """Test lazy modules are checked without being imported"""
+    missing = Holder.__dict__["missing"]
+    assert not riotctrl.lazy.is_set(Holder, "missing")
+    assert missing.installed is False
+    assert riotctrl.lazy.is_set(Holder, "module")
+    assert not riotctrl.lazy.is_set(Holder, "plain")
+    assert not riotctrl.lazy.is_set(SubHolder, "module")
+    assert riotctrl.lazy.is_set(SubHolder, "plain")
+    # once imported, the result of the import is used
+    assert Holder.missing is None
+    assert missing.installed is False
+
+
+def test_term_classes_compatibility():
+    """Test terminal classes are still available from riotctrl.ctrl"""
+    assert riotctrl.ctrl.TermSpawn is riotctrl.term.TermSpawn
+    assert riotctrl.ctrl.TermFdSpawn is riotctrl.term.TermFdSpawn
+    assert riotctrl.ctrl.TermSpawnMixin is riotctrl.term.TermSpawnMixin
+    assert riotctrl.ctrl.RIOTCtrl.TERM_SPAWN_CLASS is riotctrl.term.TermSpawn
+    assert riotctrl.ctrl.RIOTCtrl.TERM_FD_SPAWN_CLASS is riotctrl.term.TermFdSpawn
+    with pytest.raises(AttributeError):
+        riotctrl.ctrl.NotAnAttribute  # pylint:disable=pointless-statement
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["riotctrl.ctrl", "riotctrl.shell", "riotctrl.shell.json", "riotctrl.shell.cbor"],
+)
+def test_lazy_imports(module):
+    """Test heavy and optional dependencies are not imported with riotctrl"""
+    heavy = ["pexpect", "psutil", "orjson", "rapidjson", "ujson", "cbor2"]
+    code = (
+        "import sys, json, {};"
+        "print(json.dumps([m for m in {!r} if m in sys.modules]))"
+    ).format(module, heavy)
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(riotctrl.__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    assert json.loads(output) == []
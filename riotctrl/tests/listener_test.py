@@ -0,0 +1,138 @@
+"""riotctrl.listener test module."""
+
+import os
+import sys
+import time
+import tempfile
+import collections
+
+import pexpect
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.listener
+import riotctrl.shell
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="app_pidfile_env")
+def fixture_app_pidfile_env():
+    """Environment to use application pidfile"""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        yield {"PIDFILE": tmpfile.name}
+
+
+def _reader(chunks):
+    """`read_nonblocking` like function returning `chunks`, then EOF."""
+    chunks = collections.deque(chunks)
+
+    def _read(size, timeout):  # pylint:disable=unused-argument
+        if not chunks:
+            raise pexpect.EOF("End Of File (EOF).")
+        chunk = chunks.popleft()
+        if chunk is None:
+            raise pexpect.TIMEOUT("Timeout exceeded.")
+        return chunk
+
+    return _read
+
+
+def _read_all(listener):
+    output = ""
+    while True:
+        try:
+            output += listener.read(3, timeout=1)
+        except pexpect.EOF:
+            return output
+
+
+def test_term_listener():
+    """Test that matching lines are routed and the rest is kept."""
+    listener = riotctrl.listener.TermListener(
+        _reader(["> EV", "ENT 1\r\nok\r\nEVE", None, "EVENT 2\r\n", "EVENT 3\r\n> "])
+    )
+    events = []
+    listener.subscribe(r"^EVENT (\d)", callback=events.append)
+    kept = listener.subscribe(r"^ok", consume=False)
+    listener.start()
+
+    # partial 'EVE' is passed on after a read timeout
+    assert _read_all(listener) == "> EVENT 1\r\nok\r\nEVE> "
+    assert [event.match.group(1) for event in events] == ["2", "3"]
+    assert kept.queue.get_nowait().line == "ok\r\n"
+    assert listener.events == 3
+    with pytest.raises(pexpect.EOF):
+        listener.read(1, timeout=0)
+    assert listener.stop() == ""
+
+
+def test_term_listener_failing_callback(caplog):
+    """Test that a failing callback does not stop the listener."""
+
+    def _fail(event):
+        raise RuntimeError(event.line)
+
+    listener = riotctrl.listener.TermListener(_reader([b"EVENT\n", b"EVENT\n"]), b"")
+    sub = listener.subscribe(b"EVENT", callback=_fail)
+    listener.unsubscribe(listener.subscribe(b"EV"))
+    assert listener.subscriptions == [sub]
+    listener.start()
+    with pytest.raises(pexpect.EOF):
+        listener.read(1, timeout=1)
+    assert listener.events == 2
+    assert "failed to handle" in caplog.text
+    listener.stop()
+
+
+def test_term_listen(app_pidfile_env):
+    """Test listening to events while expecting other output."""
+    env = {"BOARD": "board", "APPLICATION": "./echo.py"}
+    env.update(app_pidfile_env)
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    with ctrl.run_term(
+        reset=False, ready_pattern="This example will echo", logfile=sys.stdout
+    ) as child:
+        events = child.listen(r"^EVENT (\w+)")
+        child.sendline("EVENT link_up")
+        child.sendline("Hello")
+        child.expect_exact("Hello")
+        assert "EVENT" not in child.before
+        event = events.queue.get(timeout=1)
+        assert event.match.group(1) == "link_up"
+
+        child.unlisten(events)
+        child.sendline("EVENT crash")
+        child.expect(r"EVENT (\w+)")
+        assert child.match.group(1) == "crash"
+
+        child.listen("never")
+        child.sendline("pending output")
+        listener = child.listener
+        # let the listener read the output
+        time.sleep(0.2)
+        child.stop_listener()
+        assert child.listener is None
+        assert not listener._thread.is_alive()  # pylint:disable=protected-access
+        assert "pending output" in child.buffer
+        child.expect("output")
+    assert ctrl.term is None
+
+
+def test_shell_cmd_listen(app_pidfile_env):
+    """Test shell commands while listening to events."""
+    env = {
+        "QUIET": "1",
+        "BOARD": "board",
+        "APPLICATION": "./shell.py",
+    }
+    env.update(app_pidfile_env)
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+    with ctrl.run_term(reset=False, ready_pattern="> ") as child:
+        events = child.listen(r"^EVENT")
+        shell = riotctrl.shell.ShellInteraction(ctrl)
+        assert "foobar" in shell.cmd("foobar")
+        assert "EVENT" not in shell.cmd("EVENT 1")
+        assert events.queue.get(timeout=1).line.startswith("EVENT 1")
+        assert "snafoo" in shell.cmd("snafoo")
@@ -0,0 +1,148 @@
+"""riotctrl.pool test module."""
+
+import os
+import time
+import tempfile
+import threading
+
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.pool
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+def test_pool_lease():
+    """Test RIOTCtrl objects are reused per key."""
+    pool = riotctrl.pool.RIOTCtrlPool()
+    with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}) as ctrl:
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}) as other:
+            assert other is not ctrl
+    with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}) as again:
+        assert again in (ctrl, other)
+    with pool.lease(APPLICATIONS_DIR, {"BOARD": "other"}) as board_ctrl:
+        assert board_ctrl not in (ctrl, other)
+    assert pool.stats() == {
+        "hits": 1,
+        "misses": 3,
+        "evictions": 0,
+        "size": 3,
+        "idle": 3,
+    }
+
+
+def test_pool_release_twice():
+    """Test a RIOTCtrl can only be released while leased."""
+    pool = riotctrl.pool.RIOTCtrlPool()
+    ctrl = pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    pool.release(ctrl)
+    with pytest.raises(ValueError):
+        pool.release(ctrl)
+    again = pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    other = pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "board"})
+    assert again is ctrl
+    assert other is not ctrl
+    pool.release(again)
+    with pytest.raises(ValueError):
+        pool.release(riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR))
+    assert pool.stats()["size"] == 2
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_max_size():
+    """Test eviction and waiting when the pool is full."""
+    with riotctrl.pool.RIOTCtrlPool(max_size=1) as pool:
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}) as ctrl:
+            with pytest.raises(TimeoutError):
+                pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "other"}, timeout=0.1)
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "other"}) as other:
+            assert other is not ctrl
+        assert pool.stats()["evictions"] == 1
+        assert pool.stats()["size"] == 1
+    assert pool.stats()["size"] == 0
+
+
+def test_pool_health_check():
+    """Test unhealthy RIOTCtrl objects are replaced."""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        env = {"BOARD": "board", "APPLICATION": "./echo.py", "PIDFILE": tmpfile.name}
+        unhealthy = []
+        pool = riotctrl.pool.RIOTCtrlPool(
+            health_check=lambda ctrl: ctrl not in unhealthy
+        )
+        with pool:
+            with pool.lease(APPLICATIONS_DIR, env) as ctrl:
+                ctrl.start_term(ready_pattern="This example will echo")
+                term = ctrl.term
+            # terminal kept open
+            with pool.lease(APPLICATIONS_DIR, env) as again:
+                assert again is ctrl
+                assert again.term is term
+                term.terminate(force=True)
+            # exited terminal is stopped
+            with pool.lease(APPLICATIONS_DIR, env) as again:
+                assert again is ctrl
+                assert again.term is None
+            unhealthy.append(ctrl)
+            with pool.lease(APPLICATIONS_DIR, env) as new:
+                assert new is not ctrl
+            assert pool.stats()["size"] == 1
+
+
+def test_pool_wait_reuse():
+    """Test a waiting lease reuses the RIOTCtrl released for its key."""
+    with riotctrl.pool.RIOTCtrlPool(max_size=1) as pool:
+        ctrl = pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "board"})
+        leased = []
+        waiter = threading.Thread(
+            target=lambda: leased.append(
+                pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "board"}, timeout=5)
+            )
+        )
+        waiter.start()
+        time.sleep(0.1)
+        pool.release(ctrl)
+        waiter.join()
+        assert leased == [ctrl]
+        stats = pool.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 0)
+        pool.release(ctrl)
+
+
+def test_pool_wait_deadline():
+    """Test waiting for room is bounded by the timeout across wakeups."""
+    with riotctrl.pool.RIOTCtrlPool(max_size=1) as pool:
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}):
+            stop = threading.Event()
+
+            def _notify():
+                while not stop.wait(0.05):
+                    with pool._cond:  # pylint:disable=protected-access
+                        pool._cond.notify_all()  # pylint:disable=protected-access
+
+            notifier = threading.Thread(target=_notify)
+            notifier.start()
+            start = time.monotonic()
+            try:
+                with pytest.raises(TimeoutError):
+                    pool.get_ctrl(APPLICATIONS_DIR, {"BOARD": "other"}, timeout=0.3)
+            finally:
+                stop.set()
+                notifier.join()
+            assert time.monotonic() - start < 1
+
+
+def test_pool_health_check_error():
+    """Test a failing health check replaces the RIOTCtrl object."""
+
+    def _health_check(ctrl):
+        raise RuntimeError("Health check failed")
+
+    with riotctrl.pool.RIOTCtrlPool(max_size=1, health_check=_health_check) as pool:
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}) as ctrl:
+            pass
+        with pool.lease(APPLICATIONS_DIR, {"BOARD": "board"}, timeout=1) as new:
+            assert new is not ctrl
+        assert pool.stats()["size"] == 1
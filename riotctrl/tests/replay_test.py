@@ -0,0 +1,110 @@
+"""riotctrl.replay test module."""
+
+import io
+import os
+import time
+import tempfile
+
+import pexpect
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.replay
+import riotctrl.shell
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="shell_env")
+def fixture_shell_env():
+    """Environment to run the 'shell' application"""
+    with tempfile.NamedTemporaryFile() as pidfile:
+        # pipe > in command interferes with test so use QUIET
+        yield {
+            "QUIET": "1",
+            "BOARD": "board",
+            "APPLICATION": "./shell.py",
+            "PIDFILE": pidfile.name,
+        }
+
+
+def _shell_test(ctrl, **startkwargs):
+    with ctrl.run_term(reset=False, ready_pattern="> ", **startkwargs):
+        shell = riotctrl.shell.ShellInteraction(ctrl)
+        return [shell.cmd("foobar"), shell.cmd("snafoo")]
+
+
+def test_record_replay(shell_env):
+    """Test replaying a recorded shell session."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "transcript.jsonl")
+        ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, shell_env)
+        start = time.monotonic()
+        with riotctrl.replay.TranscriptWriter(path) as transcript:
+            recorded = _shell_test(ctrl, transcript=transcript)
+        duration = time.monotonic() - start
+        assert "foobar" in recorded[0]
+
+        ctrl = riotctrl.replay.ReplayRIOTCtrl(path, APPLICATIONS_DIR, shell_env)
+        for _ in range(2):
+            start = time.monotonic()
+            assert _shell_test(ctrl) == recorded
+            assert time.monotonic() - start < duration
+        assert ctrl.term is None
+        assert ctrl.flash().returncode == 0
+
+        # sending other commands fails
+        with ctrl.run_term(reset=False, ready_pattern="> "):
+            shell = riotctrl.shell.ShellInteraction(ctrl)
+            with pytest.raises(riotctrl.replay.ReplayError):
+                shell.cmd("other")
+
+
+def test_replay_spawn():
+    """Test ReplaySpawn send checks, time compression and end of file."""
+    transcript = riotctrl.replay.Transcript(
+        [
+            riotctrl.replay.TranscriptEntry(0.0, "recv", "Hello\n"),
+            riotctrl.replay.TranscriptEntry(0.1, "send", "ping\n"),
+            riotctrl.replay.TranscriptEntry(1.1, "recv", "pong\n"),
+        ]
+    )
+    child = riotctrl.replay.ReplaySpawn(transcript, speed=10)
+    child.expect_exact("Hello")
+    # 'pong' is only received after 'ping' is sent
+    with pytest.raises(pexpect.TIMEOUT):
+        child.expect_exact("pong", timeout=5)
+    with pytest.raises(riotctrl.replay.ReplayError):
+        child.send("pang")
+    child.send("pi")
+    child.sendline("ng")
+    start = time.monotonic()
+    child.expect_exact("pong")
+    assert 0.05 < time.monotonic() - start < 0.5
+    assert not child.isalive()
+    child.expect(pexpect.EOF)
+    child.close()
+
+    child = riotctrl.replay.ReplaySpawn(transcript, strict=False)
+    child.sendline("anything")
+    child.expect_exact("Hello\npong")
+
+
+def test_transcript_bytes():
+    """Test recording and loading a transcript of bytes."""
+    file = io.StringIO()
+    writer = riotctrl.replay.TranscriptWriter(file, encoding=None)
+    writer.received(b"\xff\x00data")
+    writer.sent(b"\x01")
+    writer.close()
+    file.seek(0)
+    transcript = riotctrl.replay.Transcript.load(file)
+    assert transcript.encoding is None
+    assert [(entry.direction, entry.data) for entry in transcript.entries] == [
+        ("recv", b"\xff\x00data"),
+        ("send", b"\x01"),
+    ]
+    child = riotctrl.replay.ReplaySpawn(transcript)
+    child.expect_exact(b"data")
+    assert child.before == b"\xff\x00"
@@ -0,0 +1,60 @@
+"""riotctrl.reset test module."""
+
+import os
+import tempfile
+
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.reset
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="app_env")
+def fixture_app_env():
+    """Environment running the echo application with a pidfile"""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        yield {"APPLICATION": "./echo.py", "PIDFILE": tmpfile.name}
+
+
+class NoMakeResetCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl failing on `make reset`"""
+
+    def make_run(self, targets, *runargs, **runkwargs):
+        assert targets != self.RESET_TARGETS
+        return super().make_run(targets, *runargs, **runkwargs)
+
+
+def _assert_reset(ctrl):
+    with ctrl.run_term(reset=False, ready_pattern="This example will echo") as child:
+        ctrl.reset()
+        child.expect_exact("Starting RIOT Ctrl")
+        child.sendline("Hello")
+        child.expect_exact("Hello")
+
+
+def test_native_reset(app_env):
+    """Test native boards are reset without make."""
+    app_env["BOARD"] = "native"
+    ctrl = NoMakeResetCtrl(APPLICATIONS_DIR, app_env)
+    _assert_reset(ctrl)
+
+
+def test_native_reset_fallback(app_env):
+    """Test falling back to make when the firmware is not found."""
+    app_env["BOARD"] = "native"
+    app_env["FLASHFILE"] = "not-running.elf"
+    ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, app_env)
+    _assert_reset(ctrl)
+
+
+def test_command_reset(app_env):
+    """Test user provided reset command."""
+    app_env["BOARD"] = "board"
+    ctrl = NoMakeResetCtrl(APPLICATIONS_DIR, app_env)
+    ctrl.reset_strategy = riotctrl.reset.CommandReset(
+        ["sh", "-c", 'kill -USR1 "$(cat "$PIDFILE")"']
+    )
+    _assert_reset(ctrl)
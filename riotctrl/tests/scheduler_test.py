@@ -0,0 +1,121 @@
+"""riotctrl.scheduler test module."""
+
+import os
+import time
+import tempfile
+import threading
+
+import pytest
+
+import riotctrl.ctrl
+import riotctrl.scheduler
+from riotctrl.tests.utils import FailingFlashCtrl
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="ctrls")
+def fixture_ctrls():
+    """Two 'board-a' nodes, one being broken, and one 'board-b' node"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ctrls = []
+        for index, (cls, board) in enumerate(
+            [
+                (FailingFlashCtrl, "board-a"),
+                (riotctrl.ctrl.RIOTCtrl, "board-a"),
+                (riotctrl.ctrl.RIOTCtrl, "board-b"),
+            ]
+        ):
+            env = {
+                "BOARD": board,
+                "APPLICATION": "./echo.py",
+                "PIDFILE": os.path.join(tmpdir, str(index)),
+            }
+            ctrls.append(cls(APPLICATIONS_DIR, env))
+        yield ctrls
+
+
+def _echo_test(ctrl):
+    ctrl.term.sendline("Hello")
+    ctrl.term.expect_exact("Hello")
+    return ctrl.board()
+
+
+def test_fleet_scheduler(ctrls):
+    """Test jobs run on their board type, with retries and quarantine."""
+    flaky_failed = threading.Event()
+
+    def _flaky_test(ctrl):
+        if not flaky_failed.is_set():
+            flaky_failed.set()
+            raise RuntimeError("flaky")
+        return _echo_test(ctrl)
+
+    jobs = [
+        riotctrl.scheduler.Job("a{}".format(i), "board-a", _echo_test) for i in range(4)
+    ]
+    jobs += [
+        riotctrl.scheduler.Job("b", "board-b", _flaky_test),
+        riotctrl.scheduler.Job("c", "board-c", _echo_test),
+    ]
+    scheduler = riotctrl.scheduler.FleetScheduler(
+        ctrls, retries=2, reset=False, startkwargs={"ready_pattern": "echo"}
+    )
+    report = scheduler.schedule(jobs)
+
+    assert [res.ok for res in report.results] == [True] * 5 + [False]
+    assert [res.result for res in report.results[:5]] == ["board-a"] * 4 + ["board-b"]
+    assert all(res.node == "1-board-a" for res in report.results[:4])
+    assert report.results[4].attempts == 2
+    assert isinstance(report.results[5].exception, riotctrl.scheduler.NoNodeError)
+    assert report.quarantined == ["0-board-a"]
+    assert report.makespan > 0
+    assert set(report.utilization) == {"0-board-a", "1-board-a", "2-board-b"}
+    assert all(0 <= util <= 1 for util in report.utilization.values())
+    assert report.as_dict()["jobs"][5]["ok"] is False
+
+
+class CountingFlashCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl recording the maximum number of concurrent flashes"""
+
+    flashing = 0
+    max_flashing = 0
+    lock = threading.Lock()
+
+    def flash(self, *runargs, **runkwargs):
+        cls = type(self)
+        with cls.lock:
+            cls.flashing += 1
+            cls.max_flashing = max(cls.max_flashing, cls.flashing)
+        try:
+            time.sleep(0.05)
+            return super().flash(*runargs, **runkwargs)
+        finally:
+            with cls.lock:
+                cls.flashing -= 1
+
+
+def test_fleet_scheduler_limits():
+    """Test resource limits only apply to flashing, not to running jobs."""
+    ctrls = [
+        CountingFlashCtrl(APPLICATIONS_DIR, {"BOARD": "board-a"}) for _ in range(2)
+    ]
+    # both nodes must run a job at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def _concurrent_test(ctrl):
+        barrier.wait()
+        return ctrl.board()
+
+    jobs = [
+        riotctrl.scheduler.Job("a{}".format(i), "board-a", _concurrent_test)
+        for i in range(4)
+    ]
+    scheduler = riotctrl.scheduler.FleetScheduler(
+        ctrls, retries=0, term=False, limit_key=lambda ctrl: "hub", limits={"hub": 1}
+    )
+    report = scheduler.schedule(jobs)
+
+    assert [res.ok for res in report.results] == [True] * 4
+    assert CountingFlashCtrl.max_flashing == 1
@@ -0,0 +1,63 @@
+"""riotctrl.session test module."""
+
+import os
+import time
+import tempfile
+
+import pytest
+
+import riotctrl.ctrl
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="ctrl")
+def fixture_ctrl():
+    """RIOTCtrl running the echo application"""
+    with tempfile.NamedTemporaryFile() as tmpfile:
+        env = {"BOARD": "board", "APPLICATION": "./echo.py", "PIDFILE": tmpfile.name}
+        yield riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+
+
+def test_term_session_idle_timeout(ctrl):
+    """Test the terminal is stopped when idle and started again on use."""
+    with ctrl.enable_term_session(idle_timeout=0.5, ready_pattern="echo") as session:
+        with session.use() as term:
+            term.sendline("Hello")
+            term.expect_exact("Hello")
+            # not stopped while in use
+            time.sleep(0.7)
+            assert ctrl.term is term
+        with session.use() as term2:
+            assert term2 is term
+        time.sleep(1)
+        assert ctrl.term is None
+
+        with session.use() as term:
+            term.sendline("Again")
+            term.expect_exact("Again")
+        assert session.starts == 2
+        assert session.uses == 3
+    assert ctrl.term is None
+
+
+def test_term_session_reset(ctrl):
+    """Test the node is only reset when asked."""
+    resets = []
+    ctrl.reset = lambda: resets.append(ctrl.term)
+
+    session = ctrl.enable_term_session(ready_pattern="echo")
+    with session.use():
+        pass
+    assert not resets
+    session.reset()
+    assert resets == [ctrl.term]
+    ctrl.disable_term_session()
+
+    session = ctrl.enable_term_session(reset=True, ready_pattern="echo")
+    with session.use():
+        with session.use():
+            pass
+    assert len(resets) == 2
+    ctrl.disable_term_session()
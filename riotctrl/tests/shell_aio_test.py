@@ -0,0 +1,87 @@
+"""riotctrl.shell.aio test module."""
+
+import os
+import sys
+import asyncio
+import tempfile
+
+import pytest
+
+import riotctrl.aio
+import riotctrl.shell.aio
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+# asyncio.run
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason="requires Python >= 3.7"
+)
+
+
+@pytest.fixture(name="shell_env")
+def fixture_shell_env():
+    """Environment to run the 'shell' application"""
+    with tempfile.NamedTemporaryFile() as pidfile:
+        # pipe > in command interferes with test so use QUIET
+        yield {"QUIET": "1", "BOARD": "board", "PIDFILE": pidfile.name}
+
+
+def test_async_shell_interaction_cmd(shell_env):
+    """Test basic functionalities with the 'shell' application."""
+    shell_env["APPLICATION"] = "./shell.py"
+    ctrl = riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, shell_env)
+    ctrl.TERM_STARTED_DELAY = 1
+
+    async def _run():
+        async with ctrl.arun_term(logfile=sys.stdout, reset=False):
+            shell = riotctrl.shell.aio.AsyncShellInteraction(ctrl)
+            res = await shell.acmd("foobar")
+            assert "foobar" in res
+            res = await shell.acmd("snafoo")
+            assert "snafoo" in res
+
+    asyncio.run(_run())
+
+
+class Snafoo(riotctrl.shell.aio.AsyncShellInteraction):
+    """Test inheritance class to test acheck_term decorator"""
+
+    @riotctrl.shell.aio.AsyncShellInteraction.acheck_term
+    async def snafoo(self):
+        """snafoo pseudo command"""
+        return await self.acmd("snafoo")
+
+
+def test_async_shell_interaction_check_term(shell_env):
+    """Tests the acheck_term decorator"""
+    shell_env["APPLICATION"] = "./shell.py 1"
+    ctrl = riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, shell_env)
+    ctrl.TERM_STARTED_DELAY = 1
+    shell = Snafoo(ctrl)
+    res = asyncio.run(shell.snafoo())
+    assert "snafoo" in res
+    assert ctrl.term is None
+
+
+def test_async_shell_interaction_term_session(shell_env):
+    """Tests the acheck_term decorator uses the terminal session"""
+    shell_env["APPLICATION"] = "./shell.py 1"
+    ctrl = riotctrl.aio.AsyncRIOTCtrl(APPLICATIONS_DIR, shell_env)
+    ctrl.TERM_STARTED_DELAY = 1
+    session = ctrl.enable_term_session()
+    shell = Snafoo(ctrl)
+
+    async def _run():
+        try:
+            assert "snafoo" in await shell.snafoo()
+            assert "snafoo" in await shell.snafoo()
+            assert ctrl.term is not None
+        finally:
+            # the terminal is watched from this event loop
+            session.close()
+
+    asyncio.run(_run())
+    assert session.starts == 1
+    assert session.uses == 2
+    assert ctrl.term is None
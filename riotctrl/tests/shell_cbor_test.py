@@ -0,0 +1,129 @@
+"""riotctrl.shell.cbor test module."""
+
+import time
+import base64
+import logging
+
+import pytest
+
+import riotctrl.shell.cbor
+
+VALUE = [{"test": [1234, {"obj": {"val": 3.14}}]}, b"\x00\xff", None]
+# cbor2.dumps(VALUE)
+ENCODED = (
+    b"\x83\xa1dtest\x82\x19\x04\xd2\xa1cobj\xa1cval\xfb@\t\x1e\xb8Q\xeb\x85\x1f"
+    b"B\x00\xff\xf6"
+)
+
+
+def test_cbor_shell_interaction_parser_wo_cbor(caplog, monkeypatch):
+    """Test CBORShellInteractionParser initialization without cbor2
+    installed"""
+    monkeypatch.setattr(
+        riotctrl.shell.cbor.CBORShellInteractionParser, "cbor_module", None
+    )
+    with caplog.at_level(logging.WARNING, logger="CBORShellInteractionParser"):
+        parser = riotctrl.shell.cbor.CBORShellInteractionParser()
+    assert "CBORShellInteractionParser initialized without cbor2 installed" in (
+        caplog.text
+    )
+    with pytest.raises(AttributeError):
+        parser.parse(ENCODED)
+
+
+@pytest.mark.cbor
+def test_cbor_shell_interaction_parser():
+    """Test parsing raw CBOR output."""
+    parser = riotctrl.shell.cbor.CBORShellInteractionParser()
+    assert parser.parse(ENCODED) == VALUE
+    assert parser.parse(ENCODED.decode("latin-1")) == VALUE
+
+    stream = ENCODED + ENCODED
+    chunks = [stream[i : i + 5] for i in range(0, len(stream), 5)]
+    assert list(parser.parse_stream(chunks)) == [VALUE, VALUE]
+
+
+@pytest.mark.cbor
+def test_cbor_shell_interaction_parser_noise():
+    """Test output around raw CBOR items is not skipped."""
+    parser = riotctrl.shell.cbor.CBORShellInteractionParser()
+    items = []
+    with pytest.raises(ValueError):
+        # newlines are valid CBOR integers, '>' is not valid CBOR
+        for item in parser.parse_stream([b"\n", ENCODED, b"\n> "]):
+            items.append(item)
+    assert items == [10, VALUE, 10]
+    with pytest.raises(ValueError):
+        list(parser.parse_stream([b"> ", ENCODED]))
+
+
+@pytest.mark.cbor
+def test_framed_cbor_shell_interaction_parser():
+    """Test parsing base64 and hex framed CBOR output."""
+    for parser_cls, encode in (
+        (riotctrl.shell.cbor.Base64CBORShellInteractionParser, base64.b64encode),
+        (riotctrl.shell.cbor.HexCBORShellInteractionParser, bytes.hex),
+    ):
+        parser = parser_cls()
+        text = encode(ENCODED)
+        if isinstance(text, bytes):
+            text = text.decode()
+        # item spanning many lines
+        lines = [text[i : i + 8] for i in range(0, len(text), 8)]
+        output = "\r\n".join(lines) + "\r\n"
+        assert parser.parse(output) == VALUE
+
+        stream = "cbor dump\r\n" + output + "> log message\r\n" + output + "> "
+        chunks = [stream[i : i + 7] for i in range(0, len(stream), 7)]
+        assert list(parser.parse_stream(chunks)) == [VALUE, VALUE]
+        # last frame without newline
+        assert list(parser.parse_stream([text])) == [VALUE]
+
+
+@pytest.mark.cbor
+def test_cbor_stream_decoder():
+    """Test decoding CBOR items split in many chunks."""
+    # pylint: disable=import-outside-toplevel,import-error
+    import cbor2
+
+    decoder = riotctrl.shell.cbor.CBORStreamDecoder(cbor2)
+    assert not list(decoder.feed(ENCODED[:10]))
+    assert list(decoder.feed(ENCODED[10:] + ENCODED[:1])) == [VALUE]
+    assert list(decoder.feed(ENCODED[1:])) == [VALUE]
+
+    # indefinite length items, tags and empty containers, byte by byte
+    values = [
+        cbor2.CBORTag(4242, [b"x" * 300, "y" * 70000]),
+        {"a": [], "b": {}, "c": [[1, 2], 3.5]},
+        -(2**40),
+        False,
+    ]
+    stream = b"".join(cbor2.dumps(value) for value in values)
+    stream += b"\x9f\x01\xbf\x61a\x7f\x61b\x61c\xff\xff\xff"
+    items = []
+    for i in range(len(stream)):
+        items.extend(decoder.feed(stream[i : i + 1]))
+    assert items == [cbor2.loads(cbor2.dumps(value)) for value in values] + [
+        [1, {"a": "bc"}]
+    ]
+
+    with pytest.raises(ValueError):
+        list(decoder.feed(b"\xff"))
+
+
+@pytest.mark.cbor
+def test_cbor_stream_decoder_large():
+    """Test decoding a large item in small chunks is linear."""
+    # pylint: disable=import-outside-toplevel,import-error
+    import cbor2
+
+    value = [{"seq": i, "data": "x" * 32} for i in range(10000)]
+    stream = cbor2.dumps(value)
+    assert len(stream) > 400000
+    decoder = riotctrl.shell.cbor.CBORStreamDecoder(cbor2)
+    start = time.monotonic()
+    items = []
+    for i in range(0, len(stream), 64):
+        items.extend(decoder.feed(stream[i : i + 64]))
+    assert items == [value]
+    assert time.monotonic() - start < 5
@@ -0,0 +1,81 @@
+"""riotctrl.shell.group test module."""
+
+import os
+import time
+import tempfile
+import contextlib
+
+import pytest
+from pexpect.exceptions import TIMEOUT
+
+import riotctrl.ctrl
+import riotctrl.shell
+import riotctrl.shell.group
+import riotctrl.shell.json
+
+CURDIR = os.path.dirname(__file__)
+APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
+
+
+@pytest.fixture(name="ctrls")
+def fixture_ctrls():
+    """RIOTCtrl objects running the 'shell' application"""
+    with contextlib.ExitStack() as stack:
+        ctrls = []
+        for _ in range(3):
+            pidfile = stack.enter_context(tempfile.NamedTemporaryFile())
+            env = {
+                "QUIET": "1",
+                "BOARD": "board",
+                "APPLICATION": "./shell.py",
+                "PIDFILE": pidfile.name,
+            }
+            ctrl = riotctrl.ctrl.RIOTCtrl(APPLICATIONS_DIR, env)
+            stack.enter_context(ctrl.run_term(reset=False, ready_pattern="> "))
+            ctrls.append(ctrl)
+        yield ctrls
+
+
+def test_shell_interaction_group_cmd(ctrls):
+    """Test sending a command to all nodes and parsing their output."""
+    with riotctrl.shell.group.ShellInteractionGroup.from_ctrls(ctrls) as group:
+        assert list(group) == ["0-board", "1-board", "2-board"]
+        start = time.monotonic()
+        results = group.cmd("foobar")
+        elapsed = time.monotonic() - start
+        assert list(results) == list(group)
+        assert all(res.ok for res in results.values())
+        assert all("foobar" in res.result for res in results.values())
+        # nodes run concurrently
+        assert elapsed < sum(res.duration for res in results.values())
+
+        parser = riotctrl.shell.json.JSONShellInteractionParser()
+        results = group.cmd('{"node": 1}', parser=parser)
+        assert [res.result for res in results.values()] == [{"node": 1}] * 3
+
+        # parsing failure is kept per node
+        results = group.cmd("not json", parser=parser)
+        assert not any(res.ok for res in results.values())
+        assert all("not json" in res.output for res in results.values())
+        assert all(isinstance(res.exception, ValueError) for res in results.values())
+
+
+def test_shell_interaction_group_partial_failure(ctrls):
+    """Test that a node timing out does not fail the others."""
+    shells = {
+        "good": riotctrl.shell.ShellInteraction(ctrls[0]),
+        "other": riotctrl.shell.ShellInteraction(ctrls[1]),
+        "wrong_prompt": riotctrl.shell.ShellInteraction(ctrls[2], prompt="$ "),
+    }
+    group = riotctrl.shell.group.ShellInteractionGroup(shells, timeout=1)
+    assert group.node_timeout("good") == 1
+    assert group.node_timeout("good", {"other": 2}) == -1
+    # waiting for the wrong prompt uses the term's timeout
+    ctrls[2].term.timeout = 1
+    with group:
+        results = group.cmd("foobar")
+    assert results["good"].ok
+    assert results["other"].ok
+    assert not results["wrong_prompt"].ok
+    assert isinstance(results["wrong_prompt"].exception, TIMEOUT)
+    assert results["wrong_prompt"].result is None
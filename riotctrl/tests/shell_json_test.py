@@ -1,5 +1,6 @@
 """riotctrl.shell.json test module"""
 
+import math
 import logging
 
 import pytest
@@ -62,3 +63,127 @@ def test_rapid_json_shell_interaction_parser_w_rapidjson(caplog):
     assert len(res[0]["test"][1]) == 1
     assert len(res[0]["test"][1]["obj"]) == 1
     assert res[0]["test"][1]["obj"]["val"] == 3.14
+
+
+def test_json_shell_interaction_parser_stream():
+    """Test JSON parsing of a stream with noise, in chunks of all sizes"""
+    parser = riotctrl.shell.json.JSONShellInteractionParser()
+    stream = (
+        "[INFO] booting\n"
+        '{"test": "}\\"[", "list": [1234, {"val": 3.14}]}\n'
+        "> "
+        '[1, {"obj": [2]}, "s,]", 3,\n'
+        "]\n"
+        '{"ndjson": 1}\n{"ndjson": 2}\n'
+        '{"incomplete":'
+    )
+    for size in range(1, len(stream) + 1):
+        chunks = [stream[i : i + size] for i in range(0, len(stream), size)]
+        assert list(parser.parse_stream(chunks)) == [
+            {"test": '}"[', "list": [1234, {"val": 3.14}]},
+            1,
+            {"obj": [2]},
+            "s,]",
+            3,
+            {"ndjson": 1},
+            {"ndjson": 2},
+        ]
+
+
+def test_json_stream_splitter():
+    """Test that array elements are available before the array ends"""
+    splitter = riotctrl.shell.json.JSONStreamSplitter()
+    assert splitter.feed('[{"a": 1}, {"b"') == ['{"a": 1}']
+    assert not splitter.feed(": 2}")
+    assert splitter.feed("]") == ['{"b": 2}']
+
+
+@pytest.mark.parametrize(
+    "parser_cls",
+    riotctrl.shell.json.PARSER_CLASSES,
+    ids=lambda cls: cls.JSON_MODULE_NAME,
+)
+def test_json_shell_interaction_parser_options(parser_cls):
+    """Test options are handled the same way by all JSON parsers"""
+    if parser_cls.json_module is None:
+        pytest.skip("{} not installed".format(parser_cls.JSON_MODULE_NAME))
+    text = '{"s": "a,]", "l": [1, {"v": NaN},],}'
+    with pytest.raises(ValueError):
+        parser_cls().parse(text)
+    res = parser_cls(trailing_commas=True).parse(text)
+    assert res["s"] == "a,]"
+    assert res["l"][0] == 1
+    assert math.isnan(res["l"][1]["v"])
+    assert parser_cls().parse("[Infinity, -Infinity]") == [math.inf, -math.inf]
+    if parser_cls.REJECTS_NAN:
+        parser = parser_cls(trailing_commas=True, allow_nan=False)
+        with pytest.raises(ValueError):
+            parser.parse(text)
+        assert parser.parse('{"l": [1,],}') == {"l": [1]}
+    else:
+        with pytest.raises(ValueError):
+            parser_cls(allow_nan=False)
+
+
+def test_strip_trailing_commas():
+    """Test trailing commas are removed outside of strings only"""
+    strip = riotctrl.shell.json.strip_trailing_commas
+    assert strip("[1, 2 ,\n]") == "[1, 2 \n]"
+    assert strip('{"a": [{},],}') == '{"a": [{}]}'
+    assert strip('["\\", ]", ",}",]') == '["\\", ]", ",}"]'
+
+
+def test_json_shell_interaction_parser_cache():
+    """Test the parse results cache of identical outputs"""
+    parser = riotctrl.shell.json.JSONShellInteractionParser(cache_size=2)
+    first = parser.parse('{"a": 1}')
+    assert first == {"a": 1}
+    assert parser.parse('{"a": 1}') is first
+    parser.parse('{"b": 2}')
+    parser.parse('{"a": 1}')
+    parser.parse('{"c": 3}')
+    assert parser.stats() == {"hits": 2, "misses": 3, "size": 2}
+    # least recently used evicted
+    assert parser.parse('{"a": 1}') is first
+    assert parser.parse('{"b": 2}') == {"b": 2}
+    assert parser.stats() == {"hits": 3, "misses": 4, "size": 2}
+    uncached = riotctrl.shell.json.JSONShellInteractionParser()
+    assert uncached.parse('{"a": 1}') is not uncached.parse('{"a": 1}')
+    assert uncached.stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_get_parser(monkeypatch):
+    """Test the fastest available parser is selected according to options"""
+    parser = riotctrl.shell.json.get_parser(cache_size=4)
+    assert isinstance(parser, riotctrl.shell.json.FASTEST_PARSER_CLASS)
+    assert parser.json_module is not None
+    assert parser.cache_size == 4
+    for parser_cls in riotctrl.shell.json.PARSER_CLASSES:
+        if parser_cls is not riotctrl.shell.json.JSONShellInteractionParser:
+            monkeypatch.setattr(parser_cls, "json_module", None)
+    parser = riotctrl.shell.json.get_parser(trailing_commas=True, allow_nan=False)
+    assert parser.__class__ is riotctrl.shell.json.JSONShellInteractionParser
+    assert parser.parse("[1,]") == [1]
+    with pytest.raises(ValueError):
+        parser.parse("NaN")
+
+
+def test_fastest_parser_class(monkeypatch):
+    """Test parser classes are preferred according to their capabilities"""
+    json_mod = riotctrl.shell.json
+    for parser_cls in json_mod.PARSER_CLASSES:
+        monkeypatch.setattr(parser_cls, "json_module", json_mod.json)
+    assert json_mod.fastest_parser_class() is json_mod.PARSER_CLASSES[0]
+    assert (
+        json_mod.fastest_parser_class(trailing_commas=True)
+        is json_mod.RapidJSONShellInteractionParser
+    )
+    assert (
+        json_mod.fastest_parser_class(allow_nan=False)
+        is json_mod.ORJSONShellInteractionParser
+    )
+    monkeypatch.setattr(json_mod.ORJSONShellInteractionParser, "json_module", None)
+    assert (
+        json_mod.fastest_parser_class(allow_nan=False)
+        is json_mod.RapidJSONShellInteractionParser
+    )
@@ -9,6 +9,7 @@ from pexpect.exceptions import TIMEOUT
 
 import riotctrl.ctrl
 import riotctrl.shell
+import riotctrl.shell.json
 
 CURDIR = os.path.dirname(__file__)
 APPLICATIONS_DIR = os.path.join(CURDIR, "utils", "application")
@@ -124,3 +125,58 @@ def test_shell_interaction_check_term_when_term_started(app_pidfile_env):
         assert "snafoo" in res
     finally:
         del shell
+
+
+def test_shell_interaction_check_term_session(app_pidfile_env):
+    """Tests the check_term decorator with a terminal session"""
+    ctrl = init_ctrl(app_pidfile_env)
+    session = ctrl.enable_term_session(ready_prompt="> ")
+    shell = Snafoo(ctrl)
+    try:
+        assert "snafoo" in shell.snafoo()
+        term = ctrl.term
+        assert "snafoo" in shell.snafoo()
+        assert ctrl.term is term
+        assert session.starts == 1
+        assert session.uses == 2
+    finally:
+        ctrl.disable_term_session()
+    assert ctrl.term is None
+
+
+def test_shell_interaction_cmds(app_pidfile_env):
+    """Test pipelined commands with the 'shell' application."""
+    ctrl = init_ctrl(app_pidfile_env)
+    with ctrl.run_term(logfile=sys.stdout, reset=False):
+        shell = riotctrl.shell.ShellInteraction(ctrl)
+        cmds = ["cmd{}".format(i) for i in range(20)]
+        res = shell.cmds(cmds)
+        assert len(res) == len(cmds)
+        for cmd, out in zip(cmds, res):
+            assert out.strip() == cmd
+        # window of one is the same as consecutive `cmd` calls
+        res = shell.cmds(["foobar", "snafoo"], window=1)
+        assert [out.strip() for out in res] == ["foobar", "snafoo"]
+        # commands larger than bufsize are still sent one at a time
+        res = shell.cmds(["foobar" * 4, "snafoo"], bufsize=8)
+        assert [out.strip() for out in res] == ["foobar" * 4, "snafoo"]
+        assert "foobar" in shell.cmd("foobar")
+
+
+def test_shell_interaction_cmd_stream(app_pidfile_env):
+    """Test streaming command output with the 'shell' application."""
+    ctrl = init_ctrl(app_pidfile_env)
+    with ctrl.run_term(logfile=sys.stdout, reset=False):
+        shell = riotctrl.shell.ShellInteraction(ctrl)
+        res = "".join(shell.cmd_stream("foobar"))
+        assert res.strip() == "foobar"
+        # prompt was consumed so the next command still works
+        res = shell.cmd("snafoo")
+        assert "snafoo" in res
+        parser = riotctrl.shell.json.JSONShellInteractionParser()
+        res = list(parser.parse_stream(shell.cmd_stream('[{"a": 1}, {"b": [2]}]')))
+        assert res == [{"a": 1}, {"b": [2]}]
+        # output after the prompt is left to the next expect
+        res = "".join(shell.cmd_stream("foobar\nleftover output"))
+        assert res.strip() == "foobar"
+        ctrl.term.expect("output")
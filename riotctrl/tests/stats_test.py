@@ -0,0 +1,60 @@
+"""riotctrl.stats test module."""
+
+import pytest
+
+import riotctrl.stats
+
+
+def test_stats_histogram():
+    """Test latency histograms and counters."""
+    events = []
+    stats = riotctrl.stats.Stats(
+        labels={"board": "native"}, sinks=[lambda *event: events.append(event)]
+    )
+    for duration in (0.0005, 0.002, 0.05, 0.05, 100):
+        stats.record("op", duration)
+    stats.count("bytes_in", 10)
+    stats.count("bytes_in", 5)
+
+    res = stats.as_dict()
+    assert res["labels"] == {"board": "native"}
+    assert res["counters"] == {"bytes_in": 15}
+    latency = res["latencies"]["op"]
+    assert latency["count"] == 5
+    assert latency["min"] == 0.0005
+    assert latency["max"] == 100
+    assert latency["mean"] == pytest.approx(100.1025 / 5)
+    assert latency["buckets"] == {
+        "0.001": 1,
+        "0.01": 1,
+        "0.1": 2,
+        "1": 0,
+        "10": 0,
+        "60": 0,
+        "inf": 1,
+    }
+    assert events[0] == ({"board": "native"}, "op", 0.0005)
+    assert events[-1] == ({"board": "native"}, "bytes_in", 5)
+    assert len(events) == 7
+
+    stats.reset()
+    assert stats.as_dict() == {
+        "labels": {"board": "native"},
+        "counters": {},
+        "latencies": {},
+    }
+
+
+def test_timed():
+    """Test timing a block with errors and without stats."""
+    stats = riotctrl.stats.Stats()
+    with riotctrl.stats.timed(stats, "op"):
+        pass
+    with pytest.raises(ValueError):
+        with riotctrl.stats.timed(stats, "op"):
+            raise ValueError()
+    with riotctrl.stats.timed(None, "op"):
+        pass
+    res = stats.as_dict()
+    assert res["latencies"]["op"]["count"] == 2
+    assert res["counters"] == {"op_errors": 1}
@@ -0,0 +1,9 @@
+"""Shared riotctrl test utilities."""
+
+import riotctrl.ctrl
+
+
+class FailingFlashCtrl(riotctrl.ctrl.RIOTCtrl):
+    """RIOTCtrl where flashing fails in make"""
+
+    FLASH_TARGETS = ("non-existing-flash-target",)
@@ -0,0 +1,22 @@
+#! /usr/bin/env python3
+"""Firmware keeping a file open, like a terminal program opening a tty."""
+
+import sys
+import signal
+import argparse
+
+PARSER = argparse.ArgumentParser()
+PARSER.add_argument("tty")
+
+
+def main():
+    """Open the file and keep it open until killed."""
+    args = PARSER.parse_args()
+    with open(args.tty, "r", encoding="utf-8"):
+        print("Opened {}".format(args.tty))
+        while True:
+            signal.pause()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -51,6 +51,11 @@ setup(
         "Topic :: Utilities",
     ],
     install_requires=["pexpect>=4.7", "psutil"],
-    extras_require={"rapidjson": ["python-rapidjson"]},
+    extras_require={
+        "rapidjson": ["python-rapidjson"],
+        "orjson": ["orjson"],
+        "ujson": ["ujson"],
+        "cbor": ["cbor2"],
+    },
     python_requires=">=3.5",
 )